@@ -1,9 +1,13 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from app.api.api_v1.endpoints import categories, products, inventory, sales
+from app.api.api_v1.endpoints import admin, categories, products, inventory, sales
+from app.api.deps import require_admin
 
 api_router = APIRouter()
 api_router.include_router(categories.router, prefix="/categories", tags=["categories"])
 api_router.include_router(products.router, prefix="/products", tags=["products"])
 api_router.include_router(inventory.router, prefix="/inventory", tags=["inventory"])
-api_router.include_router(sales.router, prefix="/sales", tags=["sales"]) 
\ No newline at end of file
+api_router.include_router(sales.router, prefix="/sales", tags=["sales"]) 
+api_router.include_router(
+    admin.router, prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)]
+)
@@ -0,0 +1,92 @@
+from typing import Any, List
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app import schemas
+from app.core import profiler
+from app.core.allocations import allocation_sampler
+from app.db.query_stats import ORDER_FIELDS, statement_stats
+
+router = APIRouter()
+
+@router.get("/statements/", response_model=List[schemas.StatementStat])
+def read_statement_stats(
+    order_by: str = Query("total_time", description="One of: " + ", ".join(ORDER_FIELDS)),
+    # The store keeps at most 500 fingerprints
+    limit: int = Query(50, ge=1, le=500),
+) -> Any:
+    """
+    Retrieve per-fingerprint SQL statement statistics, worst first.
+    """
+    if order_by not in ORDER_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"order_by must be one of: {', '.join(ORDER_FIELDS)}",
+        )
+    return statement_stats.snapshot(order_by=order_by, limit=limit)
+
+@router.get("/statements/slow/", response_model=List[schemas.SlowQuery])
+def read_slow_statements() -> Any:
+    """
+    Retrieve the most recent executions slower than the slow query threshold.
+    """
+    return statement_stats.slow_queries()
+
+@router.get("/statements/{fingerprint}/plan", response_model=schemas.StatementPlan)
+def read_statement_plan(
+    *,
+    fingerprint: str,
+) -> Any:
+    """
+    Get the captured EXPLAIN plan for a statement fingerprint.
+    """
+    plan = statement_stats.get_plan(fingerprint)
+    if not plan:
+        raise HTTPException(
+            status_code=404,
+            detail="No plan captured for this statement",
+        )
+    return plan
+
+@router.delete("/statements/")
+def reset_statement_stats() -> Any:
+    """
+    Reset all statement statistics and captured plans.
+    """
+    statement_stats.reset()
+    return {"message": "Statement statistics reset"}
+
+@router.get("/profile/", response_class=PlainTextResponse)
+def profile_worker(
+    seconds: float = Query(5.0, gt=0, le=profiler.MAX_SECONDS, description="Sampling duration"),
+    hz: int = Query(100, ge=1, le=profiler.MAX_HZ, description="Samples per second"),
+    include_idle: bool = Query(False, description="Keep stacks of threads parked on locks or I/O"),
+) -> Any:
+    """
+    Sample every thread stack of this worker and return collapsed stacks for flamegraph rendering.
+    """
+    try:
+        counts = profiler.sample_stacks(seconds, hz, include_idle=include_idle)
+    except profiler.ProfilerBusy:
+        raise HTTPException(
+            status_code=409,
+            detail="A profile is already running in this worker",
+        )
+    return profiler.render_collapsed(counts)
+
+@router.get("/allocations/", response_model=List[schemas.RouteAllocations])
+def read_allocations() -> Any:
+    """
+    Retrieve tracemalloc peaks and top allocation sites aggregated per route.
+    Requires ALLOCATION_SAMPLE_RATE > 0.
+    """
+    return allocation_sampler.summary()
+
+@router.delete("/allocations/")
+def reset_allocations() -> Any:
+    """
+    Reset aggregated allocation samples.
+    """
+    allocation_sampler.reset()
+    return {"message": "Allocation samples reset"}
@@ -1,24 +1,73 @@
-from typing import Any, List
+import datetime
+from typing import Any, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
+from app.api.conditional import conditional_listing
+from app.api.responses import RowSerializer
+from app.core.config import settings
 from app.db.session import get_db
 
 router = APIRouter()
 
+CATEGORY_ROWS = RowSerializer(schemas.Category)
+
 @router.get("/", response_model=List[schemas.Category])
 def read_categories(
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    validators: Dict[str, str] = Depends(conditional_listing("category")),
 ) -> Any:
     """
     Retrieve all non-deleted categories.
+    Supports If-None-Match / If-Modified-Since revalidation.
     """
-    categories = crud.category.get_multi(db, skip=skip, limit=limit)
-    return categories
+    rows = crud.category.get_multi_rows(db, columns=CATEGORY_ROWS.columns, skip=skip, limit=limit)
+    if settings.FAST_JSON_RESPONSES:
+        return CATEGORY_ROWS.rows_response(rows, headers=validators)
+    return CATEGORY_ROWS.to_dicts(rows)
+
+def _start_of_today() -> datetime.datetime:
+    # Overview revenue windows end on the current UTC day
+    return datetime.datetime.combine(datetime.datetime.utcnow().date(), datetime.time.min)
+
+@router.get("/overview/", response_model=List[schemas.CategoryOverview])
+def read_category_overview(
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    validators: Dict[str, str] = Depends(
+        conditional_listing("category", "product", "inventory", "sale", since=_start_of_today)
+    ),
+) -> Any:
+    """
+    Retrieve non-deleted categories with their active product count, stock
+    units, low-stock product count and revenue over the last 30 days
+    (today included).
+    Supports If-None-Match / If-Modified-Since revalidation.
+    """
+    return crud.category.get_overview(db, today=_start_of_today().date(), skip=skip, limit=limit)
+
+def _check_parent(db: Session, parent_id: int, *, category_id: int = None) -> None:
+    parent = crud.category.get_cached(db, id=parent_id)
+    if not parent:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Parent category with ID {parent_id} does not exist.",
+        )
+    if parent.deleted_at is not None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Parent category with ID {parent_id} is deleted.",
+        )
+    if category_id is not None and crud.category.in_subtree(db, root_id=category_id, id=parent_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot move a category under itself or one of its subcategories.",
+        )
 
 @router.post("/", response_model=schemas.Category)
 def create_category(
@@ -35,6 +84,8 @@ def create_category(
             status_code=400,
             detail="Category with this name already exists.",
         )
+    if category_in.parent_id is not None:
+        _check_parent(db, category_in.parent_id)
     return crud.category.create(db, obj_in=category_in)
 
 @router.get("/{category_id}", response_model=schemas.Category)
@@ -80,8 +131,27 @@ def update_category(
             status_code=400,
             detail="Cannot update a deleted category. Restore it first.",
         )
+    if category_in.parent_id is not None and category_in.parent_id != category.parent_id:
+        _check_parent(db, category_in.parent_id, category_id=category_id)
     return crud.category.update(db, db_obj=category, obj_in=category_in)
 
+@router.get("/{category_id}/path", response_model=List[schemas.Category])
+def read_category_path(
+    *,
+    db: Session = Depends(get_db),
+    category_id: int,
+) -> Any:
+    """
+    Get a category's ancestors, top-level first, ending with the category itself.
+    """
+    path = crud.category.get_path(db, id=category_id)
+    if not path or path[-1].deleted_at is not None:
+        raise HTTPException(
+            status_code=404,
+            detail="Category not found",
+        )
+    return path
+
 @router.delete("/{category_id}", response_model=schemas.Category)
 def delete_category(
     *,
@@ -91,7 +161,7 @@ def delete_category(
     """
     Delete a category (soft delete).
     """
-    category = crud.category.get(db, id=category_id)
+    category = crud.category.get_cached(db, id=category_id)
     if not category:
         raise HTTPException(
             status_code=404,
@@ -105,18 +175,36 @@ def delete_category(
         )
     
     # Check if category has any non-deleted products
-    products = db.query(crud.product.model).filter(
+    product = db.query(crud.product.model.id).filter(
         crud.product.model.category_id == category_id,
         crud.product.model.deleted_at == None
-    ).all()
+    ).first()
     
-    if products:
+    if product:
         raise HTTPException(
             status_code=400,
             detail="Cannot delete category with active products. Delete the products first or move them to another category.",
         )
     
-    return crud.category.remove(db, id=category_id)
+    subcategory = db.query(crud.category.model.id).filter(
+        crud.category.model.parent_id == category_id,
+        crud.category.model.deleted_at == None
+    ).first()
+    
+    if subcategory:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot delete category with active subcategories. Delete or move them first.",
+        )
+    
+    category = crud.category.remove(db, id=category_id)
+    if category is None:
+        # Deleted by another request since the check above
+        raise HTTPException(
+            status_code=404,
+            detail="Category already deleted",
+        )
+    return category
 
 @router.get("/deleted/", response_model=List[schemas.Category])
 def read_deleted_categories(
@@ -139,15 +227,69 @@ def restore_category(
     """
     Restore a previously deleted category.
     """
-    category = crud.category.get(db, id=category_id)
-    if not category:
-        raise HTTPException(
-            status_code=404,
-            detail="Category not found",
-        )
-    if category.deleted_at is None:
+    category = crud.category.restore(db, id=category_id)
+    if category is None:
+        # Nothing was restored; look the category up only to say why
+        if not crud.category.get_cached(db, id=category_id):
+            raise HTTPException(
+                status_code=404,
+                detail="Category not found",
+            )
         raise HTTPException(
             status_code=400,
             detail="Category is not deleted",
         )
-    return crud.category.restore(db, id=category_id) 
\ No newline at end of file
+    return category
+
+@router.post("/bulk-delete/", response_model=schemas.CategoryBulkResult)
+def delete_categories(
+    *,
+    db: Session = Depends(get_db),
+    selection: schemas.CategorySelection,
+) -> Any:
+    """
+    Soft delete several categories. With cascade their subcategories and
+    products are soft deleted too; without it, categories with active products
+    or subcategories outside the selection are refused.
+    """
+    if not selection.cascade:
+        in_use = db.query(crud.product.model.category_id).filter(
+            crud.product.model.category_id.in_(selection.ids),
+            crud.product.model.deleted_at == None
+        ).distinct().all()
+        if in_use:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    "Cannot delete categories with active products (IDs: "
+                    + ", ".join(str(category_id) for category_id, in sorted(in_use))
+                    + "). Delete or move the products first, or set cascade."
+                ),
+            )
+        has_children = db.query(crud.category.model.parent_id).filter(
+            crud.category.model.parent_id.in_(selection.ids),
+            crud.category.model.id.notin_(selection.ids),
+            crud.category.model.deleted_at == None
+        ).distinct().all()
+        if has_children:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    "Cannot delete categories with active subcategories (IDs: "
+                    + ", ".join(str(category_id) for category_id, in sorted(has_children))
+                    + "). Delete or move the subcategories first, or set cascade."
+                ),
+            )
+    return crud.category.remove_many(db, ids=selection.ids, cascade=selection.cascade)
+
+@router.post("/bulk-restore/", response_model=schemas.CategoryBulkResult)
+def restore_categories(
+    *,
+    db: Session = Depends(get_db),
+    selection: schemas.CategorySelection,
+) -> Any:
+    """
+    Restore several deleted categories. With cascade the subcategories and
+    products deleted together with them are restored too.
+    """
+    return crud.category.restore_many(db, ids=selection.ids, cascade=selection.cascade)
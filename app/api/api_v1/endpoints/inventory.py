@@ -1,9 +1,10 @@
-from typing import Any, List
+from typing import Any, Dict, List
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
+from app.api.conditional import conditional_listing
 from app.db.session import get_db
 
 router = APIRouter()
@@ -13,9 +14,11 @@ def read_inventory_items(
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    validators: Dict[str, str] = Depends(conditional_listing("inventory")),
 ) -> Any:
     """
     Retrieve all inventory items.
+    Supports If-None-Match / If-Modified-Since revalidation.
     """
     inventory_items = crud.inventory.get_multi(db, skip=skip, limit=limit)
     return inventory_items
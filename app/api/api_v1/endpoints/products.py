@@ -1,30 +1,47 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from anyio import from_thread
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
+from app.api.conditional import conditional_listing
+from app.api.responses import RowSerializer
+from app.core.config import settings
+from app.crud.crud_product import PRICE_CHANGE_MODES, PRODUCT_SORTS
 from app.db.session import get_db
+from app.imports import catalog
 
 router = APIRouter()
 
+PRODUCT_ROWS = RowSerializer(schemas.Product)
+
 @router.get("/", response_model=List[schemas.Product])
 def read_products(
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     category_id: Optional[int] = None,
+    subtree: bool = False,
     search: Optional[str] = None,
+    validators: Dict[str, str] = Depends(conditional_listing("product", "category")),
 ) -> Any:
     """
-    Retrieve products with optional filtering.
+    Retrieve products with optional filtering; with subtree, category_id
+    includes its subcategories. Supports If-None-Match / If-Modified-Since revalidation.
     """
     if category_id:
-        products = crud.product.get_by_category(db, category_id=category_id, skip=skip, limit=limit)
+        products = crud.product.get_by_category(
+            db, category_id=category_id, skip=skip, limit=limit, subtree=subtree
+        )
     elif search:
         products = crud.product.search_products(db, query=search, skip=skip, limit=limit)
     else:
-        products = crud.product.get_multi(db, skip=skip, limit=limit)
+        rows = crud.product.get_multi_rows(db, columns=PRODUCT_ROWS.columns, skip=skip, limit=limit)
+        if settings.FAST_JSON_RESPONSES:
+            return PRODUCT_ROWS.rows_response(rows, headers=validators)
+        products = PRODUCT_ROWS.to_dicts(rows)
     return products
 
 @router.get("/category/{category_id}", response_model=List[schemas.Product])
@@ -34,19 +51,22 @@ def read_products_by_category(
     category_id: int,
     skip: int = 0,
     limit: int = 100,
+    subtree: bool = False,
 ) -> Any:
     """
-    Retrieve products by category ID.
+    Retrieve products by category ID, with subtree also those of its subcategories.
     """
     # Check if category exists
-    category = crud.category.get(db, id=category_id)
+    category = crud.category.get_cached(db, id=category_id)
     if not category:
         raise HTTPException(
             status_code=404,
             detail=f"Category with ID {category_id} not found",
         )
         
-    products = crud.product.get_by_category(db, category_id=category_id, skip=skip, limit=limit)
+    products = crud.product.get_by_category(
+        db, category_id=category_id, skip=skip, limit=limit, subtree=subtree
+    )
     return products
 
 @router.get("/search/", response_model=List[schemas.Product])
@@ -56,13 +76,67 @@ def search_products(
     query: str = Query(..., min_length=1, description="Search query"),
     skip: int = 0,
     limit: int = 100,
+    fuzzy: bool = Query(True, description="Fall back to typo-tolerant matching when nothing matches exactly"),
 ) -> Any:
     """
-    Search products by name.
+    Search products by name, description and SKU.
     """
-    products = crud.product.search_products(db, query=query, skip=skip, limit=limit)
+    products = crud.product.search_products(db, query=query, skip=skip, limit=limit, fuzzy=fuzzy)
     return products
 
+@router.get("/faceted-search/", response_model=schemas.ProductSearchResult)
+def faceted_search_products(
+    *,
+    db: Session = Depends(get_db),
+    query: Optional[str] = Query(None, description="Full-text query"),
+    category_id: Optional[List[int]] = Query(None, description="Repeat to select several categories"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = False,
+    sort: Optional[str] = Query(None, description="'relevance', 'price_asc', 'price_desc', 'newest' or 'name'"),
+    skip: int = 0,
+    limit: int = 100,
+    validators: Dict[str, str] = Depends(conditional_listing("product", "category", "inventory")),
+) -> Any:
+    """
+    Search products with combined filters, returning a page of matches plus
+    counts per category and price band.
+    Supports If-None-Match / If-Modified-Since revalidation.
+    """
+    if sort is not None and sort != "relevance" and sort not in PRODUCT_SORTS:
+        raise HTTPException(
+            status_code=400,
+            detail="sort must be one of: 'relevance', " + ", ".join(f"'{name}'" for name in PRODUCT_SORTS),
+        )
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(
+            status_code=400,
+            detail="min_price must not be greater than max_price",
+        )
+    return crud.product.faceted_search(
+        db,
+        query=query,
+        category_ids=category_id,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=in_stock,
+        sort=sort,
+        skip=skip,
+        limit=limit,
+    )
+
+@router.get("/autocomplete", response_model=List[schemas.ProductSuggestion])
+def autocomplete_products(
+    *,
+    db: Session = Depends(get_db),
+    prefix: str = Query(..., min_length=1, description="Start of a product name or SKU"),
+    limit: int = Query(10, ge=1, le=50),
+) -> Any:
+    """
+    Suggest products whose name or SKU starts with the prefix.
+    """
+    return crud.product.autocomplete(db, prefix=prefix, limit=limit)
+
 @router.post("/", response_model=schemas.Product)
 def create_product(
     *,
@@ -80,7 +154,7 @@ def create_product(
             detail="Product with this SKU already exists.",
         )
     # Check if category exists
-    category = crud.category.get(db, id=product_in.category_id)
+    category = crud.category.get_cached(db, id=product_in.category_id)
     if not category:
         raise HTTPException(
             status_code=400,
@@ -94,6 +168,98 @@ def create_product(
         )
     return crud.product.create(db, obj_in=product_in)
 
+@router.post("/prices/", response_model=schemas.ProductPriceChangeResult)
+def change_product_prices(
+    *,
+    db: Session = Depends(get_db),
+    change_in: schemas.ProductPriceChange,
+) -> Any:
+    """
+    Reprice many products at once: set one price or change prices by a
+    percentage across a category or a list of ids / SKUs, or set a price per SKU.
+    Deleted products are left alone.
+    """
+    if change_in.mode not in PRICE_CHANGE_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail="mode must be one of: " + ", ".join(f"'{mode}'" for mode in PRICE_CHANGE_MODES),
+        )
+    if change_in.mode == "sku":
+        if not change_in.prices:
+            raise HTTPException(
+                status_code=400,
+                detail="prices is required for mode 'sku'",
+            )
+        if any(price <= 0 for price in change_in.prices.values()):
+            raise HTTPException(
+                status_code=400,
+                detail="Prices must be greater than 0",
+            )
+    else:
+        if change_in.category_id is None and not change_in.ids and not change_in.skus:
+            raise HTTPException(
+                status_code=400,
+                detail="Give category_id, ids or skus to choose the products to reprice",
+            )
+        if change_in.value is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"value is required for mode '{change_in.mode}'",
+            )
+        if change_in.mode == "absolute" and change_in.value <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="Price must be greater than 0",
+            )
+        if change_in.mode == "percent" and change_in.value <= -100:
+            raise HTTPException(
+                status_code=400,
+                detail="A percentage change must be greater than -100",
+            )
+        if change_in.category_id is not None and not crud.category.get_cached(db, id=change_in.category_id):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Category with ID {change_in.category_id} not found",
+            )
+    updated = crud.product.change_prices(
+        db,
+        mode=change_in.mode,
+        value=change_in.value,
+        category_id=change_in.category_id,
+        ids=change_in.ids,
+        skus=change_in.skus,
+        prices=change_in.prices,
+    )
+    return {"updated": updated}
+
+@router.post("/import/", response_model=schemas.CatalogImportResult)
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, description="'csv' or 'ndjson'; defaults from Content-Type"),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Create or update products and their inventory from a CSV or NDJSON catalog
+    in the request body, keyed by SKU. The body is parsed as it streams in.
+    """
+    fmt = format or catalog.format_for(request.headers.get("content-type"))
+    if fmt not in catalog.FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail="Send text/csv or application/x-ndjson, or set format to 'csv' or 'ndjson'.",
+        )
+    body = request.stream()
+
+    def chunks():
+        # Runs in the worker thread, pulling each body chunk from the event loop
+        while True:
+            try:
+                yield from_thread.run(body.__anext__)
+            except StopAsyncIteration:
+                return
+
+    return await run_in_threadpool(catalog.import_catalog, db, catalog.text_lines(chunks()), fmt)
+
 @router.get("/{product_id}", response_model=schemas.Product)
 def read_product(
     *,
@@ -136,7 +302,7 @@ def update_product(
         
     # If category_id is provided, check if it exists and is not deleted
     if product_in.category_id is not None:
-        category = crud.category.get(db, id=product_in.category_id)
+        category = crud.category.get_cached(db, id=product_in.category_id)
         if not category:
             raise HTTPException(
                 status_code=400,
@@ -159,18 +325,19 @@ def delete_product(
     """
     Delete a product (soft delete).
     """
-    product = crud.product.get(db, id=product_id)
-    if not product:
-        raise HTTPException(
-            status_code=404,
-            detail="Product not found",
-        )
-    if product.deleted_at is not None:
+    product = crud.product.remove(db, id=product_id)
+    if product is None:
+        # Nothing was deleted; look the product up only to say why
+        if not crud.product.get(db, id=product_id):
+            raise HTTPException(
+                status_code=404,
+                detail="Product not found",
+            )
         raise HTTPException(
             status_code=404,
             detail="Product already deleted",
         )
-    return crud.product.remove(db, id=product_id)
+    return product
 
 @router.get("/deleted/", response_model=List[schemas.Product])
 def read_deleted_products(
@@ -193,18 +360,56 @@ def restore_product(
     """
     Restore a previously deleted product.
     """
-    product = crud.product.get(db, id=product_id)
-    if not product:
+    product = crud.product.restore(db, id=product_id)
+    if product is None:
+        # Nothing was restored; look the product up only to say why
+        if not crud.product.get(db, id=product_id):
+            raise HTTPException(
+                status_code=404,
+                detail="Product not found",
+            )
         raise HTTPException(
-            status_code=404,
-            detail="Product not found",
+            status_code=400,
+            detail="Product is not deleted",
         )
-    if product.deleted_at is None:
+    return product
+
+def _check_selection(db: Session, selection: schemas.ProductSelection) -> None:
+    if not selection.ids and selection.category_id is None:
         raise HTTPException(
             status_code=400,
-            detail="Product is not deleted",
+            detail="Give ids or category_id to choose the products",
+        )
+    if selection.category_id is not None and not crud.category.get_cached(db, id=selection.category_id):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Category with ID {selection.category_id} not found",
         )
-    return crud.product.restore(db, id=product_id)
+
+@router.post("/bulk-delete/", response_model=schemas.ProductBulkResult)
+def delete_products(
+    *,
+    db: Session = Depends(get_db),
+    selection: schemas.ProductSelection,
+) -> Any:
+    """
+    Soft delete the products among ids and/or in a category.
+    Products already deleted are skipped.
+    """
+    _check_selection(db, selection)
+    return {"products": crud.product.remove_many(db, ids=selection.ids, category_id=selection.category_id)}
+
+@router.post("/bulk-restore/", response_model=schemas.ProductBulkResult)
+def restore_products(
+    *,
+    db: Session = Depends(get_db),
+    selection: schemas.ProductSelection,
+) -> Any:
+    """
+    Restore the deleted products among ids and/or in a category.
+    """
+    _check_selection(db, selection)
+    return {"products": crud.product.restore_many(db, ids=selection.ids, category_id=selection.category_id)}
 
 @router.get("/with-inventory/", response_model=List[schemas.ProductWithInventory])
 def read_products_with_inventory(
@@ -1,16 +1,27 @@
 from typing import Any, List, Optional
 from datetime import datetime, date
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
+from app.api.responses import VARY_ACCEPT, RowSerializer, negotiate
+from app.core.config import settings
 from app.db.session import get_db
 
 router = APIRouter()
 
+SALE_ROWS = RowSerializer(schemas.Sale)
+SALE_BY_PERIOD_ROWS = RowSerializer(schemas.SaleByPeriod)
+SALE_BY_CATEGORY_ROWS = RowSerializer(schemas.SaleByCategory)
+SALE_BY_PLATFORM_ROWS = RowSerializer(schemas.SaleByPlatform)
+
+MAX_INGEST_LINES = 5000
+
 @router.get("/", response_model=List[schemas.Sale])
 def read_sales(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
@@ -21,18 +32,76 @@ def read_sales(
 ) -> Any:
     """
     Retrieve sales with optional filtering.
+    Send Accept: application/vnd.apache.arrow.stream or application/msgpack for a columnar response.
     """
+    filters = {}
     if start_date and end_date:
         # Convert date to datetime
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        return crud.sale.get_by_date_range(db, start_date=start_datetime, end_date=end_datetime, skip=skip, limit=limit)
+        filters["start_date"] = datetime.combine(start_date, datetime.min.time())
+        filters["end_date"] = datetime.combine(end_date, datetime.max.time())
     elif product_id:
-        return crud.sale.get_by_product(db, product_id=product_id, skip=skip, limit=limit)
+        filters["product_id"] = product_id
     elif platform:
-        return crud.sale.get_by_platform(db, platform=platform, skip=skip, limit=limit)
-    else:
-        return crud.sale.get_multi(db, skip=skip, limit=limit)
+        filters["platform"] = platform
+    rows = crud.sale.get_rows(db, columns=SALE_ROWS.columns, skip=skip, limit=limit, **filters)
+    media_type = negotiate(request)
+    if media_type:
+        return SALE_ROWS.binary_response(rows, media_type)
+    if settings.FAST_JSON_RESPONSES:
+        return SALE_ROWS.rows_response(rows, headers=VARY_ACCEPT)
+    response.headers.update(VARY_ACCEPT)
+    return SALE_ROWS.to_dicts(rows)
+
+@router.get("/export/", response_model=List[schemas.Sale])
+def export_sales(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    product_id: Optional[int] = None,
+    platform: Optional[str] = None,
+) -> Any:
+    """
+    Export every sale matching all given filters, without pagination.
+    Send Accept: application/vnd.apache.arrow.stream or application/msgpack for a columnar response.
+    """
+    # Convert date to datetime if provided
+    start_datetime = datetime.combine(start_date, datetime.min.time()) if start_date else None
+    end_datetime = datetime.combine(end_date, datetime.max.time()) if end_date else None
+    
+    rows = crud.sale.get_rows(
+        db,
+        columns=SALE_ROWS.columns,
+        start_date=start_datetime,
+        end_date=end_datetime,
+        product_id=product_id,
+        platform=platform,
+        limit=None,
+    )
+    media_type = negotiate(request)
+    if media_type:
+        return SALE_ROWS.binary_response(rows, media_type)
+    # Exported rows come straight from the table, skip re-validating them
+    return SALE_ROWS.rows_response(rows, headers=VARY_ACCEPT)
+
+@router.post("/ingest/", response_model=schemas.SaleIngestResult)
+def ingest_sales(
+    *,
+    db: Session = Depends(get_db),
+    lines: List[schemas.SaleIngestLine],
+) -> Any:
+    """
+    Record a batch of marketplace sales identified by SKU and update inventory.
+    Lines that cannot be recorded are returned as errors; the rest are committed.
+    """
+    if len(lines) > MAX_INGEST_LINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_INGEST_LINES} lines can be ingested per request.",
+        )
+    created, errors = crud.sale.ingest(db, lines=lines)
+    return {"created": created, "errors": errors}
 
 @router.get("/product/{product_id}", response_model=List[schemas.Sale])
 def get_sales_by_product(
@@ -140,6 +209,8 @@ def get_sales_summary(
 
 @router.get("/by-period/", response_model=List[schemas.SaleByPeriod])
 def get_sales_by_period(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     period_type: str = Query(..., description="Period type: 'day', 'week', 'month', or 'year'"),
     start_date: date = Query(..., description="Start date"),
@@ -147,6 +218,7 @@ def get_sales_by_period(
 ) -> Any:
     """
     Get sales aggregated by specified time period.
+    Send Accept: application/vnd.apache.arrow.stream or application/msgpack for a columnar response.
     """
     if period_type not in ['day', 'week', 'month', 'year']:
         raise HTTPException(
@@ -158,24 +230,42 @@ def get_sales_by_period(
     start_datetime = datetime.combine(start_date, datetime.min.time())
     end_datetime = datetime.combine(end_date, datetime.max.time())
     
-    return crud.sale.get_sales_by_period(
+    media_type = negotiate(request)
+    if media_type:
+        rows = crud.sale.get_sales_by_period_rows(
+            db, period_type=period_type, start_date=start_datetime, end_date=end_datetime
+        )
+        return SALE_BY_PERIOD_ROWS.binary_response(rows, media_type)
+    
+    results = crud.sale.get_sales_by_period(
         db, period_type=period_type, start_date=start_datetime, end_date=end_datetime
     )
+    if settings.FAST_JSON_RESPONSES:
+        return SALE_BY_PERIOD_ROWS.response(results, headers=VARY_ACCEPT)
+    response.headers.update(VARY_ACCEPT)
+    return results
 
 @router.get("/by-category/")
 def get_sales_by_category(
     db: Session = Depends(get_db),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    level: Optional[int] = Query(None, ge=0),
 ) -> Any:
     """
-    Get sales aggregated by product category.
+    Get sales aggregated by product category, or with level rolled up to the
+    ancestor categories at that level (0 for top-level).
     """
     # Convert date to datetime if provided
     start_datetime = datetime.combine(start_date, datetime.min.time()) if start_date else None
     end_datetime = datetime.combine(end_date, datetime.max.time()) if end_date else None
     
-    return crud.sale.get_sales_by_category(db, start_date=start_datetime, end_date=end_datetime)
+    results = crud.sale.get_sales_by_category(
+        db, start_date=start_datetime, end_date=end_datetime, level=level
+    )
+    if settings.FAST_JSON_RESPONSES:
+        return SALE_BY_CATEGORY_ROWS.response(results)
+    return results
 
 @router.get("/by-platform/")
 def get_sales_by_platform(
@@ -190,7 +280,10 @@ def get_sales_by_platform(
     start_datetime = datetime.combine(start_date, datetime.min.time()) if start_date else None
     end_datetime = datetime.combine(end_date, datetime.max.time()) if end_date else None
     
-    return crud.sale.get_sales_by_platform(db, start_date=start_datetime, end_date=end_datetime)
+    results = crud.sale.get_sales_by_platform(db, start_date=start_datetime, end_date=end_datetime)
+    if settings.FAST_JSON_RESPONSES:
+        return SALE_BY_PLATFORM_ROWS.response(results)
+    return results
 
 @router.get("/compare-periods/")
 def compare_periods(
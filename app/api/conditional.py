@@ -0,0 +1,89 @@
+"""
+Conditional GET for listings backed by versioned tables.
+
+Every CRUD write bumps its table's row in ``cache_version``, so the versions of
+the tables a listing reads from, together with the request's path and query,
+identify the listing's content. ``conditional_listing`` turns them into an
+``ETag`` and a ``Last-Modified`` date with a single primary-key lookup and
+answers a matching ``If-None-Match`` / ``If-Modified-Since`` with 304 before
+the endpoint runs its listing query.
+"""
+import datetime
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.db.session import get_db
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime.datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    # HTTP dates have whole-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+def conditional_listing(
+    *entities: str, since: Optional[Callable[[], datetime.datetime]] = None
+) -> Callable[..., Dict[str, str]]:
+    """
+    Dependency for listings that read from the tables named in ``entities``.
+    Raises a 304 when the client's copy is current; otherwise sets the
+    validators on the response and returns them for endpoints that build
+    their own Response.
+
+    Listings that also change with the clock, such as totals over the last
+    few days, pass ``since``: it returns when the current content began (e.g.
+    the start of today), which goes into the ETag and is the earliest
+    Last-Modified.
+    """
+    def dependency(request: Request, response: Response, db: Session = Depends(get_db)) -> Dict[str, str]:
+        versions = crud.cache_version.get_versions(db, entities=entities)
+        parts = [request.url.path, str(request.query_params)]
+        parts += [f"{entity}:{versions[entity][0]}" for entity in entities]
+        stamps = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+        if since is not None:
+            started = since()
+            parts.append(f"since:{started.isoformat()}")
+            stamps.append(started)
+        key = "|".join(parts)
+        etag = '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+        headers = {"ETag": etag}
+        last_modified: Optional[datetime.datetime] = max(stamps) if stamps else None
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(
+                last_modified.replace(tzinfo=datetime.timezone.utc), usegmt=True
+            )
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, etag)
+        else:
+            if_modified_since = request.headers.get("if-modified-since")
+            not_modified = (
+                if_modified_since is not None
+                and last_modified is not None
+                and _not_modified_since(if_modified_since, last_modified)
+            )
+        if not_modified:
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return headers
+
+    return dependency
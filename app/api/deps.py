@@ -0,0 +1,21 @@
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Guard for admin-only endpoints, checked against ADMIN_API_TOKEN.
+    """
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail="Admin API is disabled. Set ADMIN_API_TOKEN to enable it.",
+        )
+    if not secrets.compare_digest(x_admin_token or "", settings.ADMIN_API_TOKEN):
+        raise HTTPException(
+            status_code=403,
+            detail="Invalid admin token",
+        )
@@ -0,0 +1,170 @@
+"""
+Fast JSON responses for data read straight from the database.
+
+Rows produced by our own queries already match the response schemas, so
+re-validating them through ``response_model`` and then encoding with the
+stdlib ``json`` module is wasted work. A ``RowSerializer`` precompiles a
+pydantic ``TypeAdapter`` over a TypedDict mirror of a response schema and
+dumps plain row dicts to JSON bytes in one pass through pydantic-core, without
+constructing model instances. Field selection and order follow the schema, so
+the bytes match what the validated path would produce.
+
+The same serializers encode rows for analytics clients that negotiate a binary
+columnar format instead: Arrow IPC streams (``pyarrow``) and MessagePack maps
+of column name to values (``msgpack``). Both are built by transposing the row
+tuples into columns, so no per-row dict is ever created. The encoders are
+optional dependencies and a request for a format whose package is missing is
+answered with 406. Endpoints that negotiate send ``VARY_ACCEPT`` on every
+response, JSON included, so caches keep the formats apart.
+"""
+import importlib
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type, Union, get_args, get_origin
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+# Accepted spellings of each binary format, mapped to the media type we answer with
+BINARY_MEDIA_TYPES = {
+    ARROW_STREAM: ARROW_STREAM,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+}
+
+VARY_ACCEPT = {"Vary": "Accept"}
+
+def negotiate(request: Request) -> Optional[str]:
+    """
+    Return the binary media type the client prefers, or None to answer with JSON.
+    Types are ranked by q-value, ties keeping header order.
+    """
+    accept = request.headers.get("accept")
+    if not accept:
+        return None
+    ranked = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = (p.strip() for p in part.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranked.append((-quality, position, media_type.lower()))
+    for _, _, media_type in sorted(ranked):
+        if media_type in BINARY_MEDIA_TYPES:
+            return BINARY_MEDIA_TYPES[media_type]
+        if media_type in ("application/json", "application/*", "*/*"):
+            return None
+    return None
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+def _arrow_type(pa, annotation: Any):
+    annotation = _unwrap_optional(annotation)
+    # datetime is a subclass of date, so it must be checked first
+    if annotation is datetime:
+        return pa.timestamp("us")
+    if annotation is date:
+        return pa.date32()
+    if annotation is bool:
+        return pa.bool_()
+    if annotation is int:
+        return pa.int64()
+    if annotation is float:
+        return pa.float64()
+    return pa.string()
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+class RowSerializer:
+    def __init__(self, schema: Type[BaseModel]) -> None:
+        self.schema = schema
+        self.columns = tuple(schema.model_fields)
+        row_type = TypedDict(
+            f"{schema.__name__}Row",
+            {name: field.annotation for name, field in schema.model_fields.items()},
+        )
+        self.adapter = TypeAdapter(List[row_type])
+
+    def to_dicts(self, rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+        """Turn row tuples selected in ``columns`` order into dicts."""
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in rows]
+
+    def dump_json(self, items: List[Dict[str, Any]]) -> bytes:
+        return self.adapter.dump_json(items)
+
+    def response(self, items: List[Dict[str, Any]], headers: Optional[Dict[str, str]] = None) -> Response:
+        """Serialize trusted dicts straight to a JSON response, skipping validation."""
+        return Response(content=self.dump_json(items), media_type="application/json", headers=headers)
+
+    def rows_response(self, rows: Iterable[Sequence[Any]], headers: Optional[Dict[str, str]] = None) -> Response:
+        return self.response(self.to_dicts(rows), headers=headers)
+
+    def transpose(self, rows: Sequence[Sequence[Any]]) -> List[Sequence[Any]]:
+        """Turn row tuples selected in ``columns`` order into one sequence per column."""
+        if not rows:
+            return [() for _ in self.columns]
+        return list(zip(*rows))
+
+    def arrow_schema(self):
+        import pyarrow as pa
+
+        return pa.schema([
+            pa.field(name, _arrow_type(pa, field.annotation))
+            for name, field in self.schema.model_fields.items()
+        ])
+
+    def dump_arrow(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        """Encode rows as a single-batch Arrow IPC stream."""
+        import pyarrow as pa
+
+        schema = self.arrow_schema()
+        arrays = [
+            pa.array(values, type=field.type)
+            for values, field in zip(self.transpose(rows), schema)
+        ]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    def dump_msgpack(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        """Encode rows as a MessagePack map of column name to column values."""
+        import msgpack
+
+        columns = {name: list(values) for name, values in zip(self.columns, self.transpose(rows))}
+        return msgpack.packb(columns, default=_msgpack_default)
+
+    def binary_response(self, rows: Sequence[Sequence[Any]], media_type: str) -> Response:
+        """Encode rows in the negotiated binary ``media_type``."""
+        encode, package = {
+            ARROW_STREAM: (self.dump_arrow, "pyarrow"),
+            MSGPACK: (self.dump_msgpack, "msgpack"),
+        }[media_type]
+        try:
+            importlib.import_module(package)
+        except ImportError:
+            raise HTTPException(
+                status_code=406,
+                detail=f"{media_type} responses require the '{package}' package on the server",
+                headers=VARY_ACCEPT,
+            )
+        return Response(content=encode(rows), media_type=media_type, headers=VARY_ACCEPT)
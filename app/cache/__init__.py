@@ -0,0 +1 @@
+"""Process-local caches kept coherent through the cache_version table."""
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Write-through, process-local cache of the category table.
+
+Categories are few and almost never change, so every worker keeps all of them
+in memory, indexed by id and by name, and serves lookups without touching the
+database. Writes made through ``crud.category`` update this worker's copy
+immediately. Writes from other workers move the ``category`` version, which
+the worker's ``VersionWatcher`` notices and answers by reloading the table;
+until then, a lookup that misses falls back to the database and caches what
+it finds, so categories created or restored elsewhere are usable at once.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.schemas.category import Category as CategorySnapshot
+
+ENTITY = "category"
+
+class CategoryCache:
+    def __init__(self) -> None:
+        self._by_id: Dict[int, CategorySnapshot] = {}
+        self._by_name: Dict[str, CategorySnapshot] = {}
+        self._loaded = False
+        # One list per load in progress, collecting the puts it must replay over its read
+        self._recorders: List[List[CategorySnapshot]] = []
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> None:
+        """Replace the cached table with a fresh read of every category."""
+        recorded: List[CategorySnapshot] = []
+        with self._lock:
+            self._recorders.append(recorded)
+        try:
+            columns = tuple(CategorySnapshot.model_fields)
+            rows = db.execute(select(*(getattr(Category, name) for name in columns))).all()
+            by_id = {}
+            by_name = {}
+            for row in rows:
+                snapshot = CategorySnapshot(**dict(zip(columns, row)))
+                by_id[snapshot.id] = snapshot
+                if snapshot.deleted_at is None:
+                    by_name[snapshot.name] = snapshot
+            with self._lock:
+                self._by_id = by_id
+                self._by_name = by_name
+                self._loaded = True
+                # The read may predate writes this worker put meanwhile, which the
+                # version watcher skips as its own
+                for snapshot in recorded:
+                    self._apply(snapshot)
+        finally:
+            with self._lock:
+                self._recorders.remove(recorded)
+
+    def on_version_change(self, db: Session, entity: str) -> None:
+        """``VersionWatcher`` callback: another worker changed a category."""
+        self.load(db)
+
+    def invalidate(self) -> None:
+        """Drop the cached table; the next lookup reloads it."""
+        with self._lock:
+            self._by_id = {}
+            self._by_name = {}
+            self._loaded = False
+
+    def get(self, db: Session, id: int) -> Optional[CategorySnapshot]:
+        """Category by id, deleted ones included, like ``crud.category.get``."""
+        if not self._loaded:
+            self.load(db)
+        snapshot = self._by_id.get(id)
+        if snapshot is None:
+            from app.crud.crud_category import category
+            snapshot = self.put(category.get(db, id=id))
+        return snapshot
+
+    def get_by_name(self, db: Session, name: str) -> Optional[CategorySnapshot]:
+        """Non-deleted category by name, like ``crud.category.get_by_name``."""
+        if not self._loaded:
+            self.load(db)
+        snapshot = self._by_name.get(name)
+        if snapshot is None:
+            from app.crud.crud_category import category
+            snapshot = self.put(category.get_by_name(db, name=name))
+        return snapshot
+
+    def put(self, category: Optional[Category]) -> Optional[CategorySnapshot]:
+        """
+        Write a category just committed by this worker, or just read, through
+        to the cache. Returns its snapshot, None for None.
+        """
+        if category is None:
+            return None
+        snapshot = CategorySnapshot.model_validate(category)
+        with self._lock:
+            for recorded in self._recorders:
+                recorded.append(snapshot)
+            if self._loaded:
+                self._apply(snapshot)
+        return snapshot
+
+    def _apply(self, snapshot: CategorySnapshot) -> None:
+        previous = self._by_id.get(snapshot.id)
+        if previous is not None and self._by_name.get(previous.name) is previous:
+            del self._by_name[previous.name]
+        self._by_id[snapshot.id] = snapshot
+        if snapshot.deleted_at is None:
+            self._by_name[snapshot.name] = snapshot
+
+category_cache = CategoryCache()
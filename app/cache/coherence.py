@@ -0,0 +1,142 @@
+"""
+Cross-worker cache coherence through the ``cache_version`` table.
+
+Every CRUD write bumps the version of the entity it touched in the same
+transaction, so a committed version change is proof that some worker changed
+that entity. ``VersionWatcher`` runs one background thread per worker that
+compares every entity's version with the one it last saw and calls the
+callbacks registered for those that moved, letting each process-local cache
+catch up with what it holds. Versions this worker committed itself are
+skipped, as its caches were written through already. No broker is needed; the
+cost is one primary-key scan of a small table per interval.
+"""
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.cache_version import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+# Session.info key under which cache_version.bump collects the versions a transaction wrote
+PENDING_VERSIONS = "cache_versions"
+
+Callback = Callable[[Session, str], None]
+
+class VersionWatcher:
+    def __init__(self, *, interval: float, session_factory: Callable[[], Session]) -> None:
+        self.interval = interval
+        self.session_factory = session_factory
+        self._callbacks: List[Tuple[str, Callback]] = []
+        self._versions: Dict[str, int] = {}
+        # entity -> versions committed by this worker and not yet passed by a poll
+        self._own: Dict[str, Set[int]] = {}
+        self._baselined = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, entity: str, callback: Callback) -> None:
+        """
+        Call ``callback(db, entity)`` when ``entity`` moves. An entity ending in
+        ``:`` is a prefix, so ``"sale:"`` matches every sale-day entity.
+        """
+        with self._lock:
+            self._callbacks.append((entity, callback))
+
+    def _matching(self, entity: str) -> List[Callback]:
+        return [
+            callback for key, callback in self._callbacks
+            if key == entity or (key.endswith(":") and entity.startswith(key))
+        ]
+
+    def committed(self, versions: Iterable[Tuple[str, int]]) -> None:
+        """Record ``(entity, version)`` pairs this worker just committed, for poll to skip."""
+        with self._lock:
+            # Before the first poll there is no baseline to move past them from
+            if not self._baselined:
+                return
+            for entity, version in versions:
+                self._own.setdefault(entity, set()).add(version)
+
+    def poll(self, db: Session) -> List[str]:
+        """Read every entity's version and notify the callbacks of those other workers moved."""
+        rows = db.execute(select(CacheVersion.entity, CacheVersion.version)).all()
+        # End the read transaction so the next poll sees newer commits
+        db.commit()
+
+        moved = []
+        with self._lock:
+            for entity, version in rows:
+                seen = self._versions.get(entity, 0)
+                if version == seen:
+                    continue
+                own = self._own.get(entity, set())
+                # The first poll only records a baseline; later ones skip moves that were all ours
+                if self._baselined and not all(v in own for v in range(seen + 1, version + 1)):
+                    moved.append(entity)
+                self._versions[entity] = version
+                if own:
+                    own.difference_update([v for v in own if v <= version])
+            self._baselined = True
+            callbacks = [(entity, self._matching(entity)) for entity in moved]
+        for entity, matched in callbacks:
+            for callback in matched:
+                try:
+                    callback(db, entity)
+                except Exception:
+                    logger.exception("Cache invalidation for %s failed", entity)
+        return moved
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            db = self.session_factory()
+            try:
+                self.poll(db)
+            except Exception:
+                logger.exception("Polling cache versions failed")
+            finally:
+                db.close()
+
+    def start(self) -> None:
+        """Start this worker's poller thread; a non-positive interval leaves it off."""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        db = self.session_factory()
+        try:
+            self.poll(db)
+        except Exception:
+            # The first successful poll in the thread records the baseline instead
+            logger.exception("Polling cache versions failed")
+        finally:
+            db.close()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-version-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+version_watcher = VersionWatcher(
+    interval=settings.CACHE_VERSION_POLL_SECONDS,
+    session_factory=SessionLocal,
+)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_own_versions(session: Session) -> None:
+    versions = session.info.pop(PENDING_VERSIONS, None)
+    if versions:
+        version_watcher.committed(versions)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_own_versions(session: Session) -> None:
+    session.info.pop(PENDING_VERSIONS, None)
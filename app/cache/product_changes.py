@@ -0,0 +1,35 @@
+"""
+Change feed of the product table, for process-local caches that catch up
+incrementally instead of reloading.
+
+Product writers bump the ``product`` cache version before writing rows, and
+every inserted or updated row stores that version in ``revision``. The bump
+holds the version row's lock until commit, so product writes commit in
+revision order: a cache that has applied every row up to revision V catches up
+with the rows whose revision is above V. Rows archived by
+``scripts/purge_deleted.py`` leave no trace, but they were soft deleted, and
+seen as such, long before.
+"""
+from typing import Any, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.cache_version import CacheVersion
+from app.models.product import Product
+
+def current_revision(db: Session) -> int:
+    """Revision every committed product row is at or below."""
+    version = db.scalar(select(CacheVersion.version).where(CacheVersion.entity == "product"))
+    # Databases created without the seed rows may hold rows written before the first bump
+    return max(version or 0, db.scalar(select(func.max(Product.revision))) or 0)
+
+def changed_since(db: Session, revision: int, *columns: Any) -> Tuple[int, List[Any]]:
+    """
+    ``columns`` of every product written after ``revision``, deleted ones
+    included, with the revision to pass next time.
+    """
+    rows = db.execute(
+        select(Product.revision, *columns).where(Product.revision > revision).order_by(Product.revision)
+    ).all()
+    return (rows[-1].revision if rows else revision), rows
@@ -0,0 +1,130 @@
+"""
+Bounded LRU cache of SKU to product, for resolving marketplace feed lines.
+
+Entries hold just what sale ingestion needs (id, price, deleted_at and
+category_id). SKUs with no product are cached too, so a feed repeating an
+unknown SKU does not query for it on every line. Deleted products stay cached
+with their ``deleted_at`` set; the caller decides what a deleted product means.
+``crud.product`` invalidates affected SKUs on every write in this worker. When
+another worker writes, the ``product`` version watcher reads the products
+changed since the cache's revision and drops their old and new SKUs.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.cache.product_changes import changed_since, current_revision
+from app.core.config import settings
+from app.models.product import Product
+
+class SkuEntry(NamedTuple):
+    id: int
+    price: float
+    deleted_at: Optional[datetime]
+    category_id: int
+
+# Cached for SKUs that matched no product
+_MISSING = object()
+
+class SkuCache:
+    def __init__(self, *, max_entries: int = 100000) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, object]" = OrderedDict()
+        # product id -> the SKU it is cached under, to drop entries whose SKU changed
+        self._skus: Dict[int, str] = {}
+        # Product revision every entry is at least as fresh as; None while empty
+        self._revision: Optional[int] = None
+        # Moved by every invalidation, so reads that raced one are not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, db: Session, skus: Iterable[str]) -> Dict[str, Optional[SkuEntry]]:
+        """
+        Resolve ``skus``, None for SKUs without a product. Everything not
+        cached is fetched with a single ``IN`` query.
+        """
+        found: Dict[str, Optional[SkuEntry]] = {}
+        missing = []
+        with self._lock:
+            for sku in dict.fromkeys(skus):
+                entry = self._entries.get(sku)
+                if entry is None:
+                    missing.append(sku)
+                    continue
+                self._entries.move_to_end(sku)
+                found[sku] = None if entry is _MISSING else entry
+        if not missing:
+            return found
+
+        with self._lock:
+            generation = self._generation
+            baselined = self._revision is not None
+        revision = None if baselined else current_revision(db)
+        rows = db.execute(
+            select(Product.sku, Product.id, Product.price, Product.deleted_at, Product.category_id)
+            .where(Product.sku.in_(missing))
+        ).all()
+        loaded = {row.sku: SkuEntry(row.id, row.price, row.deleted_at, row.category_id) for row in rows}
+        with self._lock:
+            cache = generation == self._generation
+            if cache and self._revision is None:
+                self._revision = revision
+            for sku in missing:
+                entry = loaded.get(sku)
+                found[sku] = entry
+                if not cache:
+                    continue
+                self._pop(sku)
+                self._entries[sku] = _MISSING if entry is None else entry
+                if entry is not None:
+                    self._skus[entry.id] = sku
+            while len(self._entries) > self.max_entries:
+                self._pop(next(iter(self._entries)))
+        return found
+
+    def _pop(self, sku: str) -> None:
+        entry = self._entries.pop(sku, None)
+        if isinstance(entry, SkuEntry) and self._skus.get(entry.id) == sku:
+            del self._skus[entry.id]
+
+    def get(self, db: Session, sku: str) -> Optional[SkuEntry]:
+        return self.get_many(db, [sku])[sku]
+
+    def invalidate(self, *skus: Optional[str]) -> None:
+        with self._lock:
+            self._generation += 1
+            for sku in skus:
+                if sku is not None:
+                    self._pop(sku)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._skus.clear()
+            self._revision = None
+
+    def on_version_change(self, db: Session, entity: str) -> None:
+        """``VersionWatcher`` callback: another worker changed a product."""
+        with self._lock:
+            since = self._revision
+        if since is None:
+            return
+        revision, rows = changed_since(db, since, Product.id, Product.sku)
+        with self._lock:
+            if self._revision is None:
+                # Cleared meanwhile
+                return
+            self._generation += 1
+            for row in rows:
+                old_sku = self._skus.get(row.id)
+                if old_sku is not None:
+                    self._pop(old_sku)
+                self._pop(row.sku)
+            self._revision = max(self._revision, revision)
+
+sku_cache = SkuCache(max_entries=settings.SKU_CACHE_MAX_ENTRIES)
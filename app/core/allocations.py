@@ -0,0 +1,179 @@
+"""
+Per-route allocation tracking with ``tracemalloc``.
+
+A sampled request runs with tracemalloc switched on for just that request, so
+unsampled traffic pays nothing. When the response starts, the endpoint's
+results, their validated/serialized form and the rendered body are all still
+alive; that snapshot is split by allocation site into ORM, pydantic, JSON and
+driver buckets. The traced peak for the whole request is recorded alongside.
+
+Only one request is sampled at a time. Allocations made by concurrent requests
+while tracing is on are attributed to the sampled one, so numbers are most
+meaningful on a worker that is not saturated.
+"""
+import os
+import random
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# Ordered (path fragment, category) rules, matched against the innermost frame first
+CATEGORY_RULES: Tuple[Tuple[str, str], ...] = (
+    ("/sqlalchemy/", "orm"),
+    ("/pydantic_core/", "pydantic"),
+    ("/pydantic/", "pydantic"),
+    ("/fastapi/_compat.py", "pydantic"),
+    ("/json/", "json"),
+    ("/fastapi/encoders.py", "json"),
+    ("/starlette/responses.py", "json"),
+    ("/pymysql/", "driver"),
+    ("/MySQLdb/", "driver"),
+    ("/sqlite3/", "driver"),
+)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def classify(traceback: tracemalloc.Traceback) -> str:
+    """Attribute an allocation to the innermost frame that belongs to a known layer."""
+    # Traceback frames run oldest to most recent
+    for frame in reversed(traceback):
+        filename = frame.filename.replace("\\", "/")
+        for fragment, category in CATEGORY_RULES:
+            if fragment in filename:
+                return category
+        if frame.filename.startswith(_APP_DIR):
+            return "app"
+    return "other"
+
+class _RouteAllocations:
+    __slots__ = ("samples", "peak_total", "peak_max", "categories", "sites")
+
+    def __init__(self) -> None:
+        self.samples = 0
+        self.peak_total = 0
+        self.peak_max = 0
+        self.categories: Counter = Counter()
+        self.sites: Counter = Counter()
+
+class AllocationSampler:
+    def __init__(self, *, rate: float = 0.0, nframes: int = 16, top_sites: int = 15) -> None:
+        self.rate = rate
+        self.nframes = nframes
+        self.top_sites = top_sites
+        self._routes: Dict[str, _RouteAllocations] = {}
+        self._sampling = threading.Lock()
+        self._lock = threading.Lock()
+
+    def try_begin(self) -> bool:
+        """Decide whether to sample this request and, if so, start tracing."""
+        if self.rate <= 0 or random.random() >= self.rate:
+            return False
+        # Someone else (PYTHONTRACEMALLOC, a debugger) owns tracemalloc
+        if tracemalloc.is_tracing():
+            return False
+        if not self._sampling.acquire(blocking=False):
+            return False
+        tracemalloc.start(self.nframes)
+        return True
+
+    def capture(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot()
+
+    def end(self, snapshot: Optional[tracemalloc.Snapshot]) -> Tuple[int, tracemalloc.Snapshot]:
+        """Stop tracing and return the traced peak with the response-time snapshot."""
+        try:
+            peak = tracemalloc.get_traced_memory()[1]
+            if snapshot is None:
+                snapshot = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+            self._sampling.release()
+        return peak, snapshot
+
+    def analyze(self, route: str, peak: int, snapshot: tracemalloc.Snapshot) -> None:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        categories: Counter = Counter()
+        for stat in snapshot.statistics("traceback"):
+            categories[classify(stat.traceback)] += stat.size
+        sites: Counter = Counter()
+        for stat in snapshot.statistics("lineno")[: self.top_sites]:
+            frame = stat.traceback[0]
+            sites[f"{frame.filename}:{frame.lineno}"] += stat.size
+        self.record(route, peak, categories, sites)
+
+    def record(self, route: str, peak: int, categories: Counter, sites: Counter) -> None:
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = _RouteAllocations()
+            stats.samples += 1
+            stats.peak_total += peak
+            stats.peak_max = max(stats.peak_max, peak)
+            stats.categories.update(categories)
+            stats.sites.update(sites)
+            # Keep the site table bounded across samples
+            stats.sites = Counter(dict(stats.sites.most_common(self.top_sites)))
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per-route averages, largest mean peak first."""
+        with self._lock:
+            routes = [
+                (route, s.samples, s.peak_total, s.peak_max, dict(s.categories), s.sites.most_common())
+                for route, s in self._routes.items()
+            ]
+        result = []
+        for route, samples, peak_total, peak_max, categories, sites in routes:
+            result.append({
+                "route": route,
+                "samples": samples,
+                "mean_peak_bytes": peak_total // samples,
+                "max_peak_bytes": peak_max,
+                "live_bytes_by_category": {k: v // samples for k, v in sorted(categories.items())},
+                "top_sites": [{"site": site, "mean_bytes": size // samples} for site, size in sites],
+            })
+        result.sort(key=lambda r: r["mean_peak_bytes"], reverse=True)
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+allocation_sampler = AllocationSampler(
+    rate=settings.ALLOCATION_SAMPLE_RATE,
+    nframes=settings.ALLOCATION_TRACE_FRAMES,
+)
+
+class AllocationMiddleware:
+    """ASGI middleware feeding sampled requests to ``allocation_sampler``."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not allocation_sampler.try_begin():
+            await self.app(scope, receive, send)
+            return
+
+        snapshot = None
+
+        async def send_wrapper(message) -> None:
+            nonlocal snapshot
+            if message["type"] == "http.response.start" and snapshot is None:
+                snapshot = allocation_sampler.capture()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            peak, snapshot = allocation_sampler.end(snapshot)
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        # Grouping a large snapshot is slow; keep it off the event loop
+        await run_in_threadpool(allocation_sampler.analyze, route, peak, snapshot)
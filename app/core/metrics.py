@@ -0,0 +1,351 @@
+"""
+In-process Prometheus metrics.
+
+Writers never take a lock on the hot path: every metric child keeps one shard
+per thread and only the owning thread mutates it. Rendering ``/metrics`` sums
+the shards, so a scrape can trail in-progress observations slightly but never
+blocks request handling.
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.pool import QueuePool
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+class _ShardedChild:
+    """A single labelled series whose state is split into per-thread shards."""
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: List[list] = []
+        self._lock = threading.Lock()
+
+    def _new_shard(self) -> list:
+        raise NotImplementedError
+
+    def _shard(self) -> list:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+            # Only taken once per thread, when the shard is first created
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _snapshot(self) -> List[list]:
+        with self._lock:
+            return [list(shard) for shard in self._shards]
+
+class _CounterChild(_ShardedChild):
+    def _new_shard(self) -> list:
+        return [0.0]
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shard()[0] += amount
+
+    def value(self) -> float:
+        return sum(shard[0] for shard in self._snapshot())
+
+class _GaugeChild(_CounterChild):
+    def __init__(self) -> None:
+        super().__init__()
+        self._function: Optional[Callable[[], float]] = None
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._shard()[0] -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the gauge from ``function`` at scrape time instead of tracking it."""
+        self._function = function
+
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return super().value()
+
+class _HistogramChild(_ShardedChild):
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        super().__init__()
+        self._buckets = buckets
+
+    def _new_shard(self) -> list:
+        # One slot per bucket, one for +Inf, and the running sum at the end
+        return [0] * (len(self._buckets) + 1) + [0.0]
+
+    def observe(self, value: float) -> None:
+        shard = self._shard()
+        shard[bisect.bisect_left(self._buckets, value)] += 1
+        shard[-1] += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def totals(self) -> Tuple[List[int], float]:
+        counts = [0] * (len(self._buckets) + 1)
+        total = 0.0
+        for shard in self._snapshot():
+            for i in range(len(counts)):
+                counts[i] += shard[i]
+            total += shard[-1]
+        return counts, total
+
+class _Timer:
+    def __init__(self, child: _HistogramChild) -> None:
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+class _Metric:
+    type_name = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional["Registry"] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _ShardedChild] = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self) -> _ShardedChild:
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _unlabelled(self):
+        return self.labels()
+
+    def _samples(self, labelvalues: Tuple[str, ...], child) -> Iterable[str]:
+        raise NotImplementedError
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type_name}"
+        with self._lock:
+            children = list(self._children.items())
+        for labelvalues, child in children:
+            yield from self._samples(labelvalues, child)
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def _samples(self, labelvalues, child) -> Iterable[str]:
+        labels = _format_labels(self.labelnames, labelvalues)
+        yield f"{self.name}_total{labels} {_format_value(child.value())}"
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+    def _samples(self, labelvalues, child) -> Iterable[str]:
+        labels = _format_labels(self.labelnames, labelvalues)
+        yield f"{self.name}{labels} {_format_value(child.value())}"
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional["Registry"] = None,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def time(self) -> _Timer:
+        return self._unlabelled().time()
+
+    def _samples(self, labelvalues, child) -> Iterable[str]:
+        counts, total = child.totals()
+        names = self.labelnames + ("le",)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(names, labelvalues + (_format_value(bound),))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, labelvalues)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Render every registered metric in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served.",
+)
+POOL_SIZE = Gauge("db_pool_size", "Configured size of the SQLAlchemy connection pool.")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out of the pool.")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond the configured pool size.")
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool.",
+    buckets=POOL_WAIT_BUCKETS,
+)
+CRUD_LATENCY = Histogram(
+    "crud_call_duration_seconds",
+    "Latency of CRUD object method calls.",
+    ("crud", "method"),
+)
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - start)
+
+def instrument_engine(engine) -> None:
+    """Expose the pool gauges of ``engine``, read lazily at scrape time."""
+    def pool_stat(name: str) -> Callable[[], float]:
+        # Look the pool up on every scrape, engine.dispose() replaces it
+        def read() -> float:
+            stat = getattr(engine.pool, name, None)
+            # QueuePool.overflow() counts up from -pool_size until the pool is full
+            return max(stat(), 0) if stat is not None else 0
+        return read
+
+    POOL_SIZE.set_function(pool_stat("size"))
+    POOL_CHECKED_OUT.set_function(pool_stat("checkedout"))
+    POOL_OVERFLOW.set_function(pool_stat("overflow"))
+
+def timed_crud_method(func: Callable) -> Callable:
+    """Wrap a CRUD method so every call lands in ``crud_call_duration_seconds``."""
+    method = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            CRUD_LATENCY.labels(self.model.__tablename__, method).observe(
+                time.perf_counter() - start
+            )
+
+    wrapper.__crud_timed__ = True
+    return wrapper
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and in-flight requests."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; label by its
+            # template so /products/1 and /products/2 share one series.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(elapsed)
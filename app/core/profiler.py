@@ -0,0 +1,96 @@
+"""
+Wall-clock sampling profiler for the current worker process.
+
+Periodically snapshots every thread's Python stack through
+``sys._current_frames()`` and aggregates them as collapsed stacks
+(``frame;frame;frame count``), the input format of flamegraph.pl and
+speedscope. Only one profile runs at a time, and duration, rate and stack
+depth are capped so the sampler's own overhead stays bounded.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+MAX_SECONDS = 60.0
+MAX_HZ = 500
+MAX_DEPTH = 64
+MAX_STACKS = 10000
+
+# Leaf frames of threads that are parked rather than doing work
+IDLE_FRAMES = {
+    "threading:wait",
+    "threading:_wait_for_tstate_lock",
+    "selectors:select",
+}
+
+_profile_lock = threading.Lock()
+
+class ProfilerBusy(Exception):
+    """Raised when another profile is already running in this process."""
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+def _collapse(frame) -> Optional[str]:
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    if not names:
+        return None
+    names.reverse()
+    return ";".join(names)
+
+def sample_stacks(seconds: float, hz: int, *, include_idle: bool = False) -> Dict[str, int]:
+    """
+    Sample all thread stacks for ``seconds`` at ``hz`` samples per second.
+    Returns collapsed stacks prefixed with the thread name, mapped to sample counts.
+    """
+    seconds = min(max(seconds, 0.0), MAX_SECONDS)
+    hz = min(max(hz, 1), MAX_HZ)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        me = threading.get_ident()
+        counts: Counter = Counter()
+        interval = 1.0 / hz
+        next_sample = time.monotonic()
+        deadline = next_sample + seconds
+        thread_names: Dict[int, str] = {}
+        while True:
+            frames = sys._current_frames()
+            if frames.keys() - thread_names.keys():
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                if not include_idle and _frame_name(frame) in IDLE_FRAMES:
+                    continue
+                stack = _collapse(frame)
+                if stack is None:
+                    continue
+                key = f"{thread_names.get(ident, ident)};{stack}"
+                if key in counts or len(counts) < MAX_STACKS:
+                    counts[key] += 1
+                else:
+                    counts["[truncated]"] += 1
+            del frames
+            next_sample += interval
+            now = time.monotonic()
+            if next_sample >= deadline:
+                break
+            if next_sample > now:
+                time.sleep(next_sample - now)
+            else:
+                # Fell behind, skip missed ticks rather than sampling in a burst
+                next_sample = now
+        return dict(counts)
+    finally:
+        _profile_lock.release()
+
+def render_collapsed(counts: Dict[str, int]) -> str:
+    """Render sample counts in the collapsed stack format, hottest first."""
+    lines = [f"{stack} {count}" for stack, count in sorted(counts.items(), key=lambda item: -item[1])]
+    return "\n".join(lines) + ("\n" if lines else "")
@@ -1,4 +1,5 @@
 from app.crud.crud_category import category
 from app.crud.crud_product import product
 from app.crud.crud_inventory import inventory
-from app.crud.crud_sale import sale 
\ No newline at end of file
+from app.crud.crud_sale import sale 
+from app.crud.crud_cache_version import cache_version
\ No newline at end of file
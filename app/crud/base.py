@@ -1,21 +1,49 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import datetime
+import inspect
+from typing import Any, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, bindparam, delete, func, insert, literal, literal_column, select, union_all, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql import Select
 
+from app.core.metrics import timed_crud_method
 from app.db.base_class import Base
 
+# Keeps IN lists and multi-row statements within every driver's bound parameter limit
+BULK_CHUNK_SIZE = 1000
+
+# Rows moved to the archive tables per transaction, so the row locks it takes are short-lived
+ARCHIVE_CHUNK_SIZE = 200
+
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+def _instrument_methods(cls: type) -> None:
+    """Time every public method defined directly on ``cls``."""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(attr):
+            continue
+        if getattr(attr, "__crud_timed__", False):
+            continue
+        setattr(cls, name, timed_crud_method(attr))
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
         """
         self.model = model
+        self._columns = frozenset(model.__table__.columns.keys())
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        _instrument_methods(cls)
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
@@ -25,10 +53,43 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    def _active(self, stmt: Select) -> Select:
+        """Restrict ``stmt`` to the rows that get_multi lists."""
+        return stmt
+
+    def _ordered(self, stmt: Select) -> Select:
+        """Apply the ordering get_multi uses."""
+        return stmt
+
+    def get_multi_rows(
+        self,
+        db: Session,
+        *,
+        columns: Sequence[str],
+        where: Sequence[Any] = (),
+        skip: int = 0,
+        limit: Optional[int] = 100
+    ) -> List[Row]:
+        """
+        Projection mode of get_multi: select only ``columns`` and return plain
+        row tuples, skipping ORM hydration and identity-map bookkeeping.
+        Extra ``where`` criteria narrow the listing; ``limit=None`` returns
+        every matching row.
+        """
+        stmt = select(*(getattr(self.model, name) for name in columns))
+        stmt = self._ordered(self._active(stmt).where(*where)).offset(skip).limit(limit)
+        return db.execute(stmt).all()
+
+    def _bump_version(self, db: Session, db_obj: Optional[ModelType] = None) -> None:
+        """Mark this model's table as changed, committed together with the write to ``db_obj``."""
+        from app.crud.crud_cache_version import cache_version
+        cache_version.bump(db, entity=self.model.__tablename__)
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
+        self._bump_version(db, db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -40,21 +101,382 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in update_data.items():
+            if field in self._columns:
+                setattr(db_obj, field, value)
         db.add(db_obj)
+        self._bump_version(db, db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def _bump_bulk_version(self, db: Session, rows: Sequence[Dict[str, Any]]) -> None:
+        """
+        Mark this model's table as changed by a bulk write of ``rows``, called
+        before the write runs so overrides can still read the rows' old state.
+        """
+        self._bump_version(db)
+
+    def _bulk_committed(self, db: Session, ids: Sequence[Any]) -> None:
+        """Bring process-local caches in line after a bulk write to ``ids`` committed."""
+
+    def _deleted_at_written(self, db: Session, ids: Sequence[Any], deleted_at: Optional[datetime.datetime]) -> None:
+        """
+        Called by the soft delete and restore helpers with the ids they just
+        changed, before the commit, so overrides can update dependent rows in
+        the same transaction.
+        """
+
+    def _load_many(self, db: Session, ids: Sequence[Any]) -> List[ModelType]:
+        """Rows with the given ids, in that order, in one SELECT per chunk."""
+        loaded: Dict[Any, ModelType] = {}
+        for chunk in chunked(ids, BULK_CHUNK_SIZE):
+            for obj in db.query(self.model).filter(self.model.id.in_(chunk)).populate_existing():
+                loaded[obj.id] = obj
+        return [loaded[id] for id in ids if id in loaded]
+
+    def _as_row(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        return {field: value for field, value in data.items() if field in self._columns}
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        commit: bool = True,
+        refresh: bool = True,
+    ) -> Optional[List[ModelType]]:
+        """
+        Insert ``objs_in`` with multi-row INSERTs and commit once. Returns the
+        new rows, reloaded with one SELECT per chunk, or None without ``refresh``.
+        With ``commit=False`` the caller commits, and process-local caches are
+        not told about the new rows.
+        """
+        rows = [self._as_row(obj_in) for obj_in in objs_in]
+        if not rows:
+            return [] if refresh else None
+        self._bump_bulk_version(db, rows)
+        table = self.model.__table__
+        ids: List[Any] = [None] * len(rows)
+        if db.get_bind().dialect.insert_executemany_returning:
+            # Batched into multi-row INSERT ... RETURNING by the dialect
+            for positions, group in _same_keys(rows):
+                stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+                for position, id in zip(positions, db.execute(stmt, group).scalars()):
+                    ids[position] = id
+        elif not (commit or refresh):
+            # Nothing needs the ids; the driver rewrites this into multi-row INSERTs
+            for _, group in _same_keys(rows):
+                db.execute(insert(table), group)
+        else:
+            consecutive = _consecutive_ids(db)
+            for positions, group in _same_keys(rows):
+                key = next((column for column in table.c if column.unique and column.name in group[0]), None)
+                if not consecutive and key is None:
+                    # Only the ORM's one INSERT per row tells interleaved ids apart
+                    db_objs = [self.model(**row) for row in group]
+                    db.add_all(db_objs)
+                    db.flush()
+                    for position, db_obj in zip(positions, db_objs):
+                        ids[position] = db_obj.id
+                    continue
+                for start in range(0, len(group), BULK_CHUNK_SIZE):
+                    chunk = group[start:start + BULK_CHUNK_SIZE]
+                    chunk_positions = positions[start:start + len(chunk)]
+                    db.execute(insert(table).values(chunk))
+                    if consecutive:
+                        # A multi-row INSERT's ids run on from LAST_INSERT_ID()
+                        first = db.scalar(select(func.last_insert_id()))
+                        for offset, position in enumerate(chunk_positions):
+                            ids[position] = first + offset
+                    else:
+                        found = dict(db.execute(
+                            select(key, table.c.id).where(key.in_([row[key.name] for row in chunk]))
+                        ).all())
+                        for position, row in zip(chunk_positions, chunk):
+                            ids[position] = found[row[key.name]]
+        if commit:
+            db.commit()
+            self._bulk_committed(db, ids)
+        return self._load_many(db, ids) if refresh else None
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        updates: Dict[Any, Dict[str, Any]],
+        commit: bool = True,
+        refresh: bool = True,
+    ) -> Optional[List[ModelType]]:
+        """
+        Apply partial updates keyed by id with one executemany UPDATE per set of
+        updated columns, and commit once. Returns the updated rows, reloaded with
+        one SELECT per chunk, or None without ``refresh``.
+        """
+        rows = [
+            {**{field: value for field, value in values.items() if field in self._columns}, "id": id}
+            for id, values in updates.items()
+        ]
+        rows = [row for row in rows if len(row) > 1]
+        if rows:
+            self._bump_bulk_version(db, rows)
+            table = self.model.__table__
+            for _, group in _same_keys(rows):
+                columns = [field for field in group[0] if field != "id"]
+                stmt = (
+                    update(table)
+                    .where(table.c.id == bindparam("_id"))
+                    .values({column: bindparam(column) for column in columns})
+                )
+                # "id" itself cannot be a bind name in an UPDATE that sets columns
+                db.execute(stmt, [{**row, "_id": row["id"]} for row in group])
+        ids = list(updates)
+        if commit:
+            db.commit()
+            if rows:
+                self._bulk_committed(db, ids)
+        return self._load_many(db, ids) if refresh else None
+
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        key: str,
+        update: Optional[Sequence[str]] = None,
+        commit: bool = True,
+        refresh: bool = True,
+    ) -> Optional[List[ModelType]]:
+        """
+        Insert ``objs_in``, updating rows whose unique ``key`` column already
+        exists, with ``INSERT ... ON DUPLICATE KEY UPDATE`` on MySQL and
+        ``INSERT ... ON CONFLICT DO UPDATE`` elsewhere. ``update`` names the
+        columns to overwrite, by default every given column but ``key``. Commits
+        once and returns the written rows in input order, or None without
+        ``refresh``. Keys must be distinct.
+        """
+        rows = [self._as_row(obj_in) for obj_in in objs_in]
+        if not rows:
+            return [] if refresh else None
+        self._bump_bulk_version(db, rows)
+        for _, group in _same_keys(rows):
+            columns = update if update is not None else [field for field in group[0] if field != key]
+            db.execute(self._upsert_statement(db, key=key, update=columns), group)
+        keys = [row[key] for row in rows]
+        ids = None
+        if refresh or commit:
+            column = getattr(self.model, key)
+            found: Dict[Any, Any] = {}
+            for chunk in chunked(keys, BULK_CHUNK_SIZE):
+                found.update(db.execute(select(column, self.model.id).where(column.in_(chunk))).all())
+            ids = [found[k] for k in keys if k in found]
+        if commit:
+            db.commit()
+            self._bulk_committed(db, ids)
+        return self._load_many(db, ids) if refresh else None
+
+    def _upsert_statement(self, db: Session, *, key: str, update: Sequence[str]) -> Any:
+        """
+        Upsert for executemany. It does not depend on the number of rows, so it
+        compiles once; MySQL drivers rewrite it into multi-row INSERTs.
+        """
+        table = self.model.__table__
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+            stmt = mysql_insert(table)
+            set_ = {column: stmt.inserted[column] for column in update}
+        else:
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+            stmt = dialect_insert(table)
+            set_ = {column: stmt.excluded[column] for column in update}
+        # onupdate defaults do not fire for the update half of an upsert
+        for column in table.c:
+            if column.name not in set_ and column.onupdate is not None and column.onupdate.is_clause_element:
+                set_[column.name] = column.onupdate.arg
+        if "updated_at" in table.c and "updated_at" not in set_:
+            set_["updated_at"] = func.current_timestamp()
+        if dialect == "mysql":
+            return stmt.on_duplicate_key_update(set_)
+        return stmt.on_conflict_do_update(index_elements=[key], set_=set_)
+
+    def _set_deleted_at(
+        self, db: Session, *, where: Sequence[Any], deleted_at: Optional[datetime.datetime]
+    ) -> List[Any]:
+        """
+        Soft delete, or with ``deleted_at=None`` restore, every row of a model
+        with ``deleted_at`` matching any of ``where`` and not already in that
+        state: one SELECT per criterion for the ids, then one UPDATE per chunk
+        that leaves updated_at as it was. Returns the changed ids; the caller
+        commits.
+        """
+        table = self.model.__table__
+        state = table.c.deleted_at == None if deleted_at is not None else table.c.deleted_at != None
+        found: Dict[Any, None] = {}
+        for criterion in where:
+            found.update(dict.fromkeys(db.scalars(select(table.c.id).where(criterion, state))))
+        ids = list(found)
+        if not ids:
+            return ids
+        self._bump_version(db)
+        for chunk in chunked(ids):
+            db.execute(
+                update(table)
+                .where(table.c.id.in_(chunk), state)
+                # Setting updated_at to itself also keeps its onupdate default from firing
+                .values(deleted_at=deleted_at, updated_at=table.c.updated_at)
+            )
+        self._deleted_at_written(db, ids, deleted_at)
+        return ids
+
+    def _set_deleted_at_one(
+        self, db: Session, *, id: Any, deleted_at: Optional[datetime.datetime]
+    ) -> Optional[ModelType]:
+        """
+        Soft delete, or with ``deleted_at=None`` restore, one row of a model with
+        ``deleted_at`` in a single UPDATE that leaves updated_at as it was.
+        Returns the row with its committed values, or None when it does not
+        exist or is already in that state. The row comes from ``UPDATE ...
+        RETURNING`` where the dialect has it, otherwise from the session's copy
+        (loaded first unless the caller already has it), and is not read back
+        after the commit.
+        """
+        table = self.model.__table__
+        state = table.c.deleted_at == None if deleted_at is not None else table.c.deleted_at != None
+        stmt = (
+            update(table)
+            .where(table.c.id == id, state)
+            .values(deleted_at=deleted_at, updated_at=table.c.updated_at)
+        )
+        # Bumped first, as the UPDATE stamps product rows with the version it bumps to
+        self._bump_version(db)
+        if db.get_bind().dialect.update_returning:
+            row = db.execute(stmt.returning(*table.c)).first()
+            if row is None:
+                db.rollback()
+                return None
+            values = dict(row._mapping)
+        else:
+            obj = db.get(self.model, id)
+            if obj is None or (obj.deleted_at is None) == (deleted_at is None):
+                db.rollback()
+                return None
+            if deleted_at is not None:
+                # What a DATETIME column keeps, so the returned row matches the stored one
+                deleted_at = deleted_at.replace(microsecond=0)
+            if db.execute(stmt.values(deleted_at=deleted_at)).rowcount == 0:
+                db.rollback()
+                return None
+            values = {column: getattr(obj, column) for column in self._columns}
+            values["deleted_at"] = deleted_at
+        self._deleted_at_written(db, [id], deleted_at)
+        db.commit()
+        return self._as_committed(db, values)
+
+    def _as_committed(self, db: Session, values: Dict[str, Any]) -> ModelType:
+        """
+        The session's instance of the row with column ``values``, set as its
+        committed state so reading it issues no SELECT; a detached copy is
+        added to the session when it holds none.
+        """
+        obj = db.identity_map.get(identity_key(self.model, values["id"]))
+        if obj is None:
+            obj = self.model(**values)
+            make_transient_to_detached(obj)
+            db.add(obj)
+        else:
+            for column, value in values.items():
+                set_committed_value(obj, column, value)
+        return obj
+
+    def _get_deleted_with_archive(
+        self, db: Session, archive: Type[Base], *, skip: int = 0, limit: int = 100
+    ) -> List[Any]:
+        """
+        Page of soft-deleted rows merged with the rows moved to ``archive``,
+        most recently deleted first. Each side reads at most skip + limit keys
+        off its (deleted_at, id) index before the merge; archived rows come back
+        as ``archive`` instances, which carry the same columns.
+        """
+        sides = [
+            select(model.deleted_at, model.id, key.label("key"), literal(archived).label("archived"))
+            .where(model.deleted_at != None)
+            .order_by(model.deleted_at.desc(), model.id.desc())
+            .limit(skip + limit)
+            .subquery()
+            for model, key, archived in ((self.model, self.model.id, False), (archive, archive.archive_id, True))
+        ]
+        merged = union_all(*(select(*side.c) for side in sides)).subquery()
+        page = db.execute(
+            select(merged.c.key, merged.c.archived)
+            .order_by(merged.c.deleted_at.desc(), merged.c.id.desc())
+            .offset(skip)
+            .limit(limit)
+        ).all()
+        live = {obj.id: obj for obj in self._load_many(db, [row.key for row in page if not row.archived])}
+        archived = {
+            obj.archive_id: obj
+            for obj in db.query(archive).filter(archive.archive_id.in_([row.key for row in page if row.archived]))
+        }
+        return [(archived if row.archived else live)[row.key] for row in page]
+
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.query(self.model).get(id)
         db.delete(obj)
+        self._bump_version(db, obj)
         db.commit()
-        return obj 
\ No newline at end of file
+        return obj 
+
+def chunked(items: Sequence[Any], size: int = BULK_CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    """Consecutive slices of ``items`` of at most ``size``."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def move_rows(
+    db: Session, model: Type[Base], archive: Type[Base], *, where: Sequence[Any], archived_at: datetime.datetime
+) -> int:
+    """
+    Copy the rows of ``model`` matching ``where`` into ``archive``, keeping the
+    columns it has and stamping ``archived_at``, then delete them: one
+    INSERT ... SELECT and one DELETE. Returns how many rows moved; the caller
+    commits.
+    """
+    table = model.__table__
+    columns = [column for column in table.columns if column.name in archive.__table__.c]
+    db.execute(
+        insert(archive.__table__).from_select(
+            [*(column.name for column in columns), "archived_at"],
+            select(*columns, literal(archived_at, DateTime)).where(*where),
+        )
+    )
+    return db.execute(delete(table).where(*where)).rowcount
+
+def _consecutive_ids(db: Session) -> bool:
+    """
+    Whether a multi-row INSERT gets consecutive auto-increment ids, as it does
+    unless InnoDB's innodb_autoinc_lock_mode is 2 (interleaved).
+    """
+    if db.get_bind().dialect.name != "mysql":
+        return False
+    return db.scalar(select(literal_column("@@innodb_autoinc_lock_mode"))) < 2
+
+def _same_keys(rows: List[Dict[str, Any]]) -> List[Tuple[List[int], List[Dict[str, Any]]]]:
+    """Split ``rows`` into groups sharing a key set, as executemany requires, with their positions."""
+    groups: Dict[frozenset, Tuple[List[int], List[Dict[str, Any]]]] = {}
+    for position, row in enumerate(rows):
+        positions, group = groups.setdefault(frozenset(row), ([], []))
+        positions.append(position)
+        group.append(row)
+    return list(groups.values())
+
+_instrument_methods(CRUDBase)
@@ -0,0 +1,53 @@
+from typing import Dict, Optional, Sequence, Tuple
+import datetime
+from pydantic import BaseModel
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.cache_version import CacheVersion
+
+def sale_day_entity(day: datetime.date) -> str:
+    """Entity tracking the sales recorded on ``day``."""
+    return f"sale:{day.isoformat()}"
+
+class CRUDCacheVersion(CRUDBase[CacheVersion, BaseModel, BaseModel]):
+    def bump(self, db: Session, *, entity: str) -> None:
+        """
+        Advance the version of ``entity`` inside the caller's transaction, so it
+        becomes visible exactly when the write it describes is committed.
+        """
+        from app.cache.coherence import PENDING_VERSIONS
+        
+        now = datetime.datetime.utcnow()
+        stmt = (
+            update(CacheVersion)
+            .where(CacheVersion.entity == entity)
+            .values(version=CacheVersion.version + 1, updated_at=now)
+        )
+        if db.get_bind().dialect.update_returning:
+            version = db.execute(stmt.returning(CacheVersion.version)).scalar()
+        elif db.execute(stmt).rowcount:
+            # The row is locked by the UPDATE, so this reads the version it wrote
+            version = db.scalar(select(CacheVersion.version).where(CacheVersion.entity == entity))
+        else:
+            version = None
+        if version is None:
+            # Only on databases created without the migration's seed rows
+            version = 1
+            db.add(CacheVersion(entity=entity, version=version, updated_at=now))
+        # Recorded as this worker's own once the transaction commits
+        db.info.setdefault(PENDING_VERSIONS, []).append((entity, version))
+    
+    def get_versions(
+        self, db: Session, *, entities: Sequence[str]
+    ) -> Dict[str, Tuple[int, Optional[datetime.datetime]]]:
+        """Current (version, updated_at) of each entity, (0, None) for entities never written."""
+        rows = db.query(
+            CacheVersion.entity, CacheVersion.version, CacheVersion.updated_at
+        ).filter(CacheVersion.entity.in_(entities)).all()
+        versions = {entity: (0, None) for entity in entities}
+        versions.update({r.entity: (r.version, r.updated_at) for r in rows})
+        return versions
+
+cache_version = CRUDCacheVersion(CacheVersion)
@@ -1,71 +1,409 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Sequence, Union
+from sqlalchemy.orm import Session, aliased
 import datetime
-from sqlalchemy import func
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.sql import Select
 
-from app.crud.base import CRUDBase
-from app.models.category import Category
+from app.cache.category import category_cache
+from app.core.config import settings
+from app.crud.base import ARCHIVE_CHUNK_SIZE, CRUDBase, chunked, move_rows
+from app.models.archive import CategoryArchive
+from app.models.category import Category, CategoryClosure
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
 from app.schemas.category import CategoryCreate, CategoryUpdate
 
+# Length of the trailing revenue window in get_overview, today included
+OVERVIEW_REVENUE_DAYS = 30
+
 class CRUDCategory(CRUDBase[Category, CategoryCreate, CategoryUpdate]):
     def get_by_name(self, db: Session, *, name: str) -> Optional[Category]:
         return db.query(Category).filter(Category.name == name, Category.deleted_at == None).first()
     
+    def get_cached(self, db: Session, *, id: int) -> Optional[Category]:
+        """Read-only get served from the process-local category cache"""
+        if not settings.CATEGORY_CACHE_ENABLED:
+            return self.get(db, id=id)
+        return category_cache.get(db, id)
+    
+    def get_by_name_cached(self, db: Session, *, name: str) -> Optional[Category]:
+        """Read-only get_by_name served from the process-local category cache"""
+        if not settings.CATEGORY_CACHE_ENABLED:
+            return self.get_by_name(db, name=name)
+        return category_cache.get_by_name(db, name)
+    
+    def create(self, db: Session, *, obj_in: CategoryCreate) -> Category:
+        db_obj = Category(**obj_in.model_dump())
+        db_obj.level = self._level_below(db, db_obj.parent_id)
+        db.add(db_obj)
+        db.flush()
+        self._link(db, id=db_obj.id, parent_id=db_obj.parent_id)
+        self._bump_version(db, db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        category_cache.put(db_obj)
+        return db_obj
+    
+    def update(self, db: Session, *, db_obj: Category, obj_in: Union[CategoryUpdate, Dict[str, Any]]) -> Category:
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        moved = "parent_id" in update_data and update_data["parent_id"] != db_obj.parent_id
+        if moved:
+            # Committed together with the new parent_id by super().update
+            self._link(db, id=db_obj.id, parent_id=update_data["parent_id"])
+        obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        if moved:
+            # The levels of the whole subtree changed
+            category_cache.load(db)
+        else:
+            category_cache.put(obj)
+        return obj
+    
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CategoryCreate, Dict[str, Any]]],
+        commit: bool = True,
+        refresh: bool = True,
+    ) -> Optional[List[Category]]:
+        """CRUDBase.create_many that also places the new categories in the tree; parents must come first."""
+        objs = super().create_many(db, objs_in=objs_in, commit=False, refresh=True)
+        return self._relink_many(db, objs, commit=commit, refresh=refresh)
+    
+    def update_many(
+        self,
+        db: Session,
+        *,
+        updates: Dict[Any, Dict[str, Any]],
+        commit: bool = True,
+        refresh: bool = True,
+    ) -> Optional[List[Category]]:
+        """CRUDBase.update_many that also moves categories whose parent_id changed, in the given order."""
+        objs = super().update_many(db, updates=updates, commit=False, refresh=True)
+        objs = [obj for obj in objs if "parent_id" in updates[obj.id]]
+        self._relink_many(db, objs, commit=False, refresh=False)
+        if commit:
+            db.commit()
+            self._bulk_committed(db, list(updates))
+        return self._load_many(db, list(updates)) if refresh else None
+    
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CategoryCreate, Dict[str, Any]]],
+        key: str,
+        update: Optional[Sequence[str]] = None,
+        commit: bool = True,
+        refresh: bool = True,
+    ) -> Optional[List[Category]]:
+        """CRUDBase.upsert_many that also places new and moved categories in the tree; parents must come first."""
+        objs = super().upsert_many(db, objs_in=objs_in, key=key, update=update, commit=False, refresh=True)
+        return self._relink_many(db, objs, commit=commit, refresh=refresh)
+    
+    def _relink_many(
+        self, db: Session, objs: List[Category], *, commit: bool, refresh: bool
+    ) -> Optional[List[Category]]:
+        for obj in objs:
+            self._link(db, id=obj.id, parent_id=obj.parent_id)
+        ids = [obj.id for obj in objs]
+        if commit:
+            db.commit()
+            self._bulk_committed(db, ids)
+        return self._load_many(db, ids) if refresh else None
+    
+    def _level_below(self, db: Session, parent_id: Optional[int]) -> int:
+        """Level of a child of parent_id: the parent's number of ancestors, itself included."""
+        if parent_id is None:
+            return 0
+        return db.scalar(
+            select(func.count()).select_from(CategoryClosure).where(CategoryClosure.descendant_id == parent_id)
+        )
+    
+    def _link(self, db: Session, *, id: int, parent_id: Optional[int]) -> None:
+        """
+        Hang the subtree of category id under parent_id (None for top level) in
+        the closure table and shift the subtree's levels to match, leaving
+        updated_at alone. Serves new categories, which have no closure rows
+        yet, as well as moves. The caller commits.
+        """
+        closure = CategoryClosure.__table__
+        subtree = db.scalars(select(closure.c.descendant_id).where(closure.c.ancestor_id == id)).all()
+        if subtree:
+            # Cut the paths from the old ancestors; paths inside the subtree stay
+            db.execute(
+                delete(closure).where(closure.c.descendant_id.in_(subtree), closure.c.ancestor_id.notin_(subtree))
+            )
+        else:
+            subtree = [id]
+            db.execute(insert(closure).values(ancestor_id=id, descendant_id=id, depth=0))
+        if parent_id is not None:
+            above = closure.alias("above")
+            below = closure.alias("below")
+            db.execute(insert(closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+                .where(above.c.descendant_id == parent_id, below.c.ancestor_id == id),
+            ))
+        table = Category.__table__
+        shift = self._level_below(db, parent_id) - db.scalar(select(table.c.level).where(table.c.id == id))
+        if shift:
+            db.execute(
+                update(table)
+                .where(table.c.id.in_(subtree))
+                .values(level=table.c.level + shift, updated_at=table.c.updated_at)
+            )
+    
+    def in_subtree(self, db: Session, *, root_id: int, id: int) -> bool:
+        """Whether category id is root_id or one of its descendants"""
+        return db.scalar(
+            select(func.count()).select_from(CategoryClosure)
+            .where(CategoryClosure.ancestor_id == root_id, CategoryClosure.descendant_id == id)
+        ) > 0
+    
+    def get_path(self, db: Session, *, id: int) -> List[Category]:
+        """The category and its ancestors, top-level first, with one indexed join"""
+        return db.query(Category).join(
+            CategoryClosure, CategoryClosure.ancestor_id == Category.id
+        ).filter(
+            CategoryClosure.descendant_id == id
+        ).order_by(CategoryClosure.depth.desc()).all()
+    
+    def _subtree_ids(self, db: Session, ids: Sequence[int]) -> List[int]:
+        """ids together with all their descendants"""
+        return sorted({
+            id
+            for chunk in chunked(list(ids))
+            for id in db.scalars(
+                select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id.in_(chunk))
+            )
+        })
+    
+    def get_children(self, db: Session, *, id: int) -> List[Category]:
+        """Non-deleted direct subcategories"""
+        return db.query(Category).filter(
+            Category.parent_id == id,
+            Category.deleted_at == None
+        ).order_by(Category.id).all()
+    
+    def _bulk_committed(self, db: Session, ids: Sequence[Any]) -> None:
+        # Categories are few; reread them all rather than one by one
+        category_cache.load(db)
+    
+    def _active(self, stmt: Select) -> Select:
+        return stmt.where(self.model.deleted_at == None)
+    
+    def _ordered(self, stmt: Select) -> Select:
+        # Id order, read straight off ix_category_deleted_at_id
+        return stmt.order_by(self.model.id)
+    
     def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Category]:
         """Only return non-deleted categories"""
-        return db.query(self.model).filter(self.model.deleted_at == None).offset(skip).limit(limit).all()
-    
-    def remove(self, db: Session, *, id: int) -> Category:
-        """Soft delete a category by setting deleted_at timestamp without updating updated_at"""
-        # First get the current object to preserve the updated_at value
-        obj = db.query(self.model).get(id)
-        if not obj:
-            return None
-            
-        # Get the current updated_at value to preserve it
-        current_updated_at = obj.updated_at
+        return db.query(self.model).filter(self.model.deleted_at == None).order_by(
+            self.model.id
+        ).offset(skip).limit(limit).all()
+    
+    def get_overview(
+        self, db: Session, *, today: datetime.date, skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Page of non-deleted categories with their active product count, stock
+        units, low-stock count and revenue over the OVERVIEW_REVENUE_DAYS days
+        ending today, in one statement. The page is picked first, and product
+        and sale totals are grouped separately so neither multiplies the other.
+        """
+        page = (
+            select(Category.id, Category.name, Category.description, Category.parent_id, Category.level)
+            .where(Category.deleted_at == None)
+            .order_by(Category.id)
+            .offset(skip)
+            .limit(limit)
+            .subquery()
+        )
+        in_page = Product.category_id.in_(select(page.c.id))
+        stock = (
+            select(
+                Product.category_id,
+                func.count(Product.id).label("product_count"),
+                func.sum(Inventory.quantity).label("stock_units"),
+                func.sum(case((Inventory.quantity <= Inventory.low_stock_threshold, 1), else_=0)).label("low_stock_count"),
+            )
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+            .where(in_page, Product.deleted_at == None)
+            .group_by(Product.category_id)
+            .subquery()
+        )
+        since = datetime.datetime.combine(
+            today - datetime.timedelta(days=OVERVIEW_REVENUE_DAYS - 1), datetime.time.min
+        )
+        revenue = (
+            select(Sale.category_id, func.sum(Sale.total_price).label("revenue"))
+            .where(
+                Sale.category_id.in_(select(page.c.id)), Sale.product_active == True, Sale.sale_date >= since
+            )
+            .group_by(Sale.category_id)
+            .subquery()
+        )
+        rows = db.execute(
+            select(
+                page.c.id,
+                page.c.name,
+                page.c.description,
+                page.c.parent_id,
+                page.c.level,
+                func.coalesce(stock.c.product_count, 0),
+                func.coalesce(stock.c.stock_units, 0),
+                func.coalesce(stock.c.low_stock_count, 0),
+                func.coalesce(revenue.c.revenue, 0.0),
+            )
+            .outerjoin(stock, stock.c.category_id == page.c.id)
+            .outerjoin(revenue, revenue.c.category_id == page.c.id)
+            .order_by(page.c.id)
+        ).all()
+        return [
+            {
+                "id": id,
+                "name": name,
+                "description": description,
+                "parent_id": parent_id,
+                "level": level,
+                "product_count": product_count,
+                "stock_units": stock_units,
+                "low_stock_count": low_stock_count,
+                "revenue_30d": round(float(revenue_30d), 2),
+            }
+            for (
+                id, name, description, parent_id, level, product_count, stock_units, low_stock_count, revenue_30d
+            ) in rows
+        ]
+    
+    def remove(self, db: Session, *, id: int) -> Optional[Category]:
+        """
+        Soft delete a category by setting deleted_at timestamp without updating updated_at.
+        Returns None if the category does not exist or is already deleted.
+        """
+        obj = self._set_deleted_at_one(db, id=id, deleted_at=datetime.datetime.now())
+        if obj is not None:
+            category_cache.put(obj)
+        return obj
+    
+    def remove_many(self, db: Session, *, ids: Sequence[int], cascade: bool = False) -> Dict[str, int]:
+        """
+        Soft delete the non-deleted categories among ids, preserving updated_at.
+        With cascade their subcategories at any depth and the non-deleted
+        products of all of them are soft deleted in the same transaction, with
+        the same deleted_at. Returns both counts.
+        """
+        from app.crud.crud_product import product
         
-        # Set deleted_at while preserving the current updated_at
         now = datetime.datetime.now()
-        db.query(self.model).filter(self.model.id == id).update(
-            {
-                "deleted_at": now,
-                "updated_at": current_updated_at  # Explicitly preserve the current updated_at
-            },
-            synchronize_session=False
+        if cascade:
+            ids = self._subtree_ids(db, ids)
+        removed = self._set_deleted_at(
+            db, where=[Category.id.in_(chunk) for chunk in chunked(list(ids))], deleted_at=now
         )
+        removed_products = []
+        if cascade and removed:
+            removed_products = product._set_deleted_at(
+                db, where=[Product.category_id.in_(chunk) for chunk in chunked(removed)], deleted_at=now
+            )
         db.commit()
-        
-        # Get the updated object
-        obj = db.query(self.model).get(id)
-        return obj
+        if removed:
+            self._bulk_committed(db, removed)
+        product._bulk_committed(db, removed_products)
+        return {"categories": len(removed), "products": len(removed_products)}
     
-    def get_deleted(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Category]:
-        """Get all deleted categories"""
-        return db.query(self.model).filter(self.model.deleted_at != None).offset(skip).limit(limit).all()
-    
-    def restore(self, db: Session, *, id: int) -> Category:
-        """Restore a soft-deleted category"""
-        # First get the current object to preserve the updated_at value
-        obj = db.query(self.model).get(id)
-        if not obj:
-            return None
-            
-        # Get the current updated_at value to preserve it
-        current_updated_at = obj.updated_at
+    def restore_many(self, db: Session, *, ids: Sequence[int], cascade: bool = False) -> Dict[str, int]:
+        """
+        Restore the deleted categories among ids, preserving updated_at. With
+        cascade the subcategories and products deleted together with them, i.e.
+        with the same deleted_at, are restored too. Returns both counts.
+        """
+        from app.crud.crud_product import product
         
-        # Clear deleted_at while preserving the current updated_at
-        db.query(self.model).filter(self.model.id == id).update(
-            {
-                "deleted_at": None,
-                "updated_at": current_updated_at  # Explicitly preserve the current updated_at
-            },
-            synchronize_session=False
+        restored_products = []
+        if cascade:
+            ancestor = aliased(Category)
+            ids = sorted({
+                id
+                for chunk in chunked(list(ids))
+                for id in db.scalars(
+                    select(CategoryClosure.descendant_id)
+                    .join(Category, Category.id == CategoryClosure.descendant_id)
+                    .join(ancestor, ancestor.id == CategoryClosure.ancestor_id)
+                    .where(CategoryClosure.ancestor_id.in_(chunk), Category.deleted_at == ancestor.deleted_at)
+                )
+            })
+            deleted_with_category = select(Category.deleted_at).where(
+                Category.id == Product.category_id
+            ).scalar_subquery()
+            restored_products = product._set_deleted_at(
+                db,
+                where=[
+                    (Product.category_id.in_(chunk)) & (Product.deleted_at == deleted_with_category)
+                    for chunk in chunked(list(ids))
+                ],
+                deleted_at=None,
+            )
+        restored = self._set_deleted_at(
+            db, where=[Category.id.in_(chunk) for chunk in chunked(list(ids))], deleted_at=None
         )
         db.commit()
-        
-        # Get the updated object
-        obj = db.query(self.model).get(id)
+        if restored:
+            self._bulk_committed(db, restored)
+        product._bulk_committed(db, restored_products)
+        return {"categories": len(restored), "products": len(restored_products)}
+    
+    def get_deleted(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Union[Category, CategoryArchive]]:
+        """Get all deleted categories, archived ones included, most recently deleted first"""
+        return self._get_deleted_with_archive(db, CategoryArchive, skip=skip, limit=limit)
+    
+    def archive_deleted(
+        self, db: Session, *, deleted_before: datetime.datetime, limit: int = ARCHIVE_CHUNK_SIZE
+    ) -> int:
+        """
+        Move up to ``limit`` categories soft deleted before ``deleted_before``,
+        oldest first, to the archive table with their closure rows dropped, and
+        commit. Categories still holding products or subcategories stay; a
+        subtree goes leaves first, over successive calls, once its products are
+        archived. Sales keep their category_id. Returns how many moved, 0 once
+        none are left.
+        """
+        child = aliased(Category)
+        ids = list(db.scalars(
+            select(Category.id)
+            .where(
+                Category.deleted_at < deleted_before,
+                ~select(Product.id).where(Product.category_id == Category.id).exists(),
+                ~select(child.id).where(child.parent_id == Category.id).exists(),
+            )
+            .order_by(Category.deleted_at, Category.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ))
+        if not ids:
+            db.rollback()
+            return 0
+        where = [Category.id.in_(ids), Category.deleted_at < deleted_before]
+        # Leaves only, so the closure rows to drop are their ancestor paths
+        db.execute(delete(CategoryClosure).where(
+            CategoryClosure.descendant_id.in_(select(Category.id).where(*where))
+        ))
+        moved = move_rows(db, Category, CategoryArchive, where=where, archived_at=datetime.datetime.now())
+        self._bump_version(db)
+        db.commit()
+        category_cache.load(db)
+        return moved
+    
+    def restore(self, db: Session, *, id: int) -> Optional[Category]:
+        """
+        Restore a soft-deleted category, leaving updated_at as it was.
+        Returns None if the category does not exist or is not deleted.
+        """
+        obj = self._set_deleted_at_one(db, id=id, deleted_at=None)
+        if obj is not None:
+            category_cache.put(obj)
         return obj
     
     def get(self, db: Session, id: any) -> Optional[Category]:
@@ -30,6 +30,7 @@ class CRUDInventory(CRUDBase[Inventory, InventoryCreate, InventoryUpdate]):
             inventory.last_restock_date = datetime.now()
             
         db.add(inventory)
+        self._bump_version(db, inventory)
         db.commit()
         db.refresh(inventory)
         return inventory
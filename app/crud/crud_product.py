@@ -1,88 +1,595 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 from sqlalchemy.orm import Session
 import datetime
-from sqlalchemy import func
+from sqlalchemy import Numeric, bindparam, case, cast, func, or_, select, update
+from sqlalchemy.sql import Select
 
-from app.crud.base import CRUDBase
+from app.cache.sku import SkuEntry, sku_cache
+from app.crud.base import ARCHIVE_CHUNK_SIZE, CRUDBase, chunked, move_rows
+from app.search.autocomplete import autocomplete_index
+from app.search.fulltext import boolean_query, query_terms, rank, search_index
+from app.search.trigram import trigram_index
+from app.models.archive import InventoryArchive, ProductArchive
 from app.models.product import Product
+from app.schemas.catalog import CatalogRow
 from app.schemas.product import ProductCreate, ProductUpdate
-from app.models.category import Category
+from app.models.category import Category, CategoryClosure
+from app.models.inventory import Inventory
+from app.models.sale import Sale
+
+# Lower bounds of the price bands counted by faceted_search; the last band is open-ended
+PRICE_BANDS = (0, 25, 50, 100, 250, 500)
+
+PRODUCT_SORTS = {
+    "price_asc": (Product.price, Product.id),
+    "price_desc": (Product.price.desc(), Product.id),
+    "newest": (Product.created_at.desc(), Product.id.desc()),
+    "name": (Product.name, Product.id),
+}
+
+# 'absolute' sets one price, 'percent' scales prices, 'sku' sets a price per SKU
+PRICE_CHANGE_MODES = ("absolute", "percent", "sku")
+
+# Lowest price 'percent' rounds down to, keeping prices above zero
+MIN_PRICE = 0.01
 
 class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
     def get_by_sku(self, db: Session, *, sku: str) -> Optional[Product]:
         return db.query(Product).filter(Product.sku == sku, Product.deleted_at == None).first()
     
-    def get_by_category(self, db: Session, *, category_id: int, skip: int = 0, limit: int = 100) -> List[Product]:
-        return db.query(Product).join(
-            Category, Product.category_id == Category.id
-        ).filter(
-            Product.category_id == category_id,
+    def get_by_sku_cached(self, db: Session, *, sku: str) -> Optional[SkuEntry]:
+        """SKU lookup served from the LRU cache; unlike get_by_sku, deleted products are returned with deleted_at set"""
+        return sku_cache.get(db, sku)
+    
+    def get_many_by_sku_cached(self, db: Session, *, skus: Iterable[str]) -> Dict[str, Optional[SkuEntry]]:
+        """Batch get_by_sku_cached, resolving every uncached SKU with one IN query"""
+        return sku_cache.get_many(db, skus)
+    
+    def _reindex(self, obj: Product) -> None:
+        """Bring the in-process search indexes in line with a product this worker just committed."""
+        search_index.index(obj)
+        autocomplete_index.index(obj)
+        trigram_index.index(obj)
+    
+    def create(self, db: Session, *, obj_in: ProductCreate) -> Product:
+        obj = super().create(db, obj_in=obj_in)
+        # Drop a cached "no such SKU"
+        sku_cache.invalidate(obj.sku)
+        self._reindex(obj)
+        return obj
+    
+    def update(self, db: Session, *, db_obj: Product, obj_in: Union[ProductUpdate, Dict[str, Any]]) -> Product:
+        old_sku = db_obj.sku
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        if update_data.get("category_id", db_obj.category_id) != db_obj.category_id:
+            # Locks in the order soft deletes and restores take them, so the two cannot
+            # deadlock: the product version, the product row, then sales and their version
+            self._bump_version(db)
+            db.execute(select(Product.id).where(Product.id == db_obj.id).with_for_update())
+            # Committed together with the product by super().update
+            self._sync_sales(db, where=[Sale.product_id == db_obj.id], category_id=update_data["category_id"])
+        obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        sku_cache.invalidate(old_sku, obj.sku)
+        self._reindex(obj)
+        return obj
+    
+    def import_catalog_chunk(self, db: Session, *, rows: Sequence[CatalogRow]) -> List[Tuple[str, Optional[str]]]:
+        """
+        Upsert a chunk of catalog rows by SKU, with their inventory, in one transaction.
+        Returns (status, detail) per row: 'created', 'updated' or 'error'.
+        SKUs must be distinct within the chunk.
+        """
+        from app.crud.crud_category import category
+        from app.crud.crud_inventory import inventory
+        
+        skus = [row.sku for row in rows]
+        existing = {
+            sku: deleted_at
+            for sku, deleted_at in db.execute(
+                select(Product.sku, Product.deleted_at).where(Product.sku.in_(skus))
+            ).all()
+        }
+        categories = {
+            category_id: category.get_cached(db, id=category_id)
+            for category_id in {row.category_id for row in rows}
+        }
+        outcomes: List[Tuple[str, Optional[str]]] = []
+        accepted = []
+        for row in rows:
+            found = categories[row.category_id]
+            if found is None:
+                outcomes.append(("error", f"Category with ID {row.category_id} does not exist."))
+            elif found.deleted_at is not None:
+                outcomes.append(("error", f"Category with ID {row.category_id} is deleted."))
+            elif row.sku in existing and existing[row.sku] is not None:
+                outcomes.append(("error", "Product with this SKU is deleted. Restore it first."))
+            else:
+                outcomes.append(("updated" if row.sku in existing else "created", None))
+                accepted.append(row)
+        if not accepted:
+            return outcomes
+        
+        product_fields = ("sku", "name", "description", "price", "category_id")
+        self.upsert_many(
+            db,
+            objs_in=[row.model_dump(include=set(product_fields)) for row in accepted],
+            key="sku", update=product_fields[1:], commit=False, refresh=False,
+        )
+        ids = dict(db.execute(
+            select(Product.sku, Product.id).where(Product.sku.in_([row.sku for row in accepted]))
+        ).all())
+        
+        stocked = [row for row in accepted if row.quantity is not None]
+        # Rows without a threshold keep the current one; new rows get the column default
+        for with_threshold in (True, False):
+            group = [row for row in stocked if (row.low_stock_threshold is not None) == with_threshold]
+            if not group:
+                continue
+            inventory.upsert_many(
+                db,
+                objs_in=[
+                    {
+                        "product_id": ids[row.sku],
+                        "quantity": row.quantity,
+                        "low_stock_threshold": row.low_stock_threshold if with_threshold else 10,
+                    }
+                    for row in group
+                ],
+                key="product_id",
+                update=("quantity", "low_stock_threshold") if with_threshold else ("quantity",),
+                commit=False, refresh=False,
+            )
+        db.commit()
+        self._bulk_committed(db, list(ids.values()))
+        return outcomes
+    
+    def update_many(
+        self, db: Session, *, updates: Dict[Any, Dict[str, Any]], commit: bool = True, refresh: bool = True
+    ) -> Optional[List[Product]]:
+        renamed = [id for id, values in updates.items() if "sku" in values]
+        old_skus = []
+        for chunk in chunked(renamed):
+            old_skus += db.scalars(select(Product.sku).where(Product.id.in_(chunk))).all()
+        super().update_many(db, updates=updates, commit=False, refresh=False)
+        recategorized = [id for id, values in updates.items() if "category_id" in values]
+        self._sync_sales(
+            db,
+            where=[Sale.product_id.in_(chunk) for chunk in chunked(recategorized)],
+            category_id=self._sale_product_category(),
+        )
+        ids = list(updates)
+        if commit:
+            db.commit()
+            self._bulk_committed(db, ids)
+        sku_cache.invalidate(*old_skus)
+        return self._load_many(db, ids) if refresh else None
+    
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[ProductCreate, Dict[str, Any]]],
+        key: str,
+        update: Optional[Sequence[str]] = None,
+        commit: bool = True,
+        refresh: bool = True,
+    ) -> Optional[List[Product]]:
+        """CRUDBase.upsert_many that also moves the sales of products whose category changed"""
+        objs = super().upsert_many(
+            db, objs_in=objs_in, key=key, update=update, commit=False, refresh=commit or refresh
+        )
+        if update is None or "category_id" in update:
+            column = getattr(Product, key)
+            keys = [self._as_row(obj_in)[key] for obj_in in objs_in]
+            self._sync_sales(
+                db,
+                where=[
+                    Sale.product_id.in_(select(Product.id).where(column.in_(chunk)))
+                    for chunk in chunked(keys)
+                ],
+                category_id=self._sale_product_category(),
+            )
+        if not (commit or refresh):
+            return None
+        ids = [obj.id for obj in objs]
+        if commit:
+            db.commit()
+            self._bulk_committed(db, ids)
+        return self._load_many(db, ids) if refresh else None
+    
+    def _sale_product_category(self) -> Any:
+        """The category of each sale's product, for setting sale.category_id in an UPDATE of sales"""
+        return select(Product.category_id).where(Product.id == Sale.product_id).scalar_subquery()
+    
+    def _sync_sales(self, db: Session, *, where: Sequence[Any], **values: Any) -> None:
+        """
+        Copy ``values`` (category_id and/or product_active, as values or SQL
+        expressions) onto the sales matching any of ``where`` that differ, one
+        UPDATE per criterion, and bump the sale version if any changed. Sales of
+        archived products are left alone, as their product_id may have been
+        reused. The caller commits.
+        """
+        from app.crud.crud_cache_version import cache_version
+        
+        table = Sale.__table__
+        changed = 0
+        for criterion in where:
+            changed += db.execute(
+                update(table)
+                .where(
+                    criterion,
+                    table.c.product_archived == False,
+                    or_(*(table.c[column] != value for column, value in values.items())),
+                )
+                .values(values)
+            ).rowcount
+        if changed:
+            cache_version.bump(db, entity="sale")
+    
+    def _deleted_at_written(
+        self, db: Session, ids: Sequence[Any], deleted_at: Optional[datetime.datetime]
+    ) -> None:
+        # Sales carry whether their product is active
+        self._sync_sales(
+            db, where=[Sale.product_id.in_(chunk) for chunk in chunked(list(ids))], product_active=deleted_at is None
+        )
+    
+    def _bulk_committed(self, db: Session, ids: Sequence[Any]) -> None:
+        for chunk in chunked(ids):
+            rows = db.execute(
+                select(Product.id, Product.sku, Product.name, Product.description, Product.deleted_at)
+                .where(Product.id.in_(chunk))
+            ).all()
+            sku_cache.invalidate(*(row.sku for row in rows))
+            for row in rows:
+                self._reindex(row)
+    
+    def change_prices(
+        self,
+        db: Session,
+        *,
+        mode: str,
+        value: Optional[float] = None,
+        category_id: Optional[int] = None,
+        ids: Optional[Sequence[int]] = None,
+        skus: Optional[Sequence[str]] = None,
+        prices: Optional[Dict[str, float]] = None,
+    ) -> int:
+        """
+        Reprice non-deleted products without loading them, in one transaction.
+        'absolute' sets every product in scope to value and 'percent' changes their
+        prices by value percent, rounded to cents but not below MIN_PRICE; the
+        scope is a category and/or ids and skus. 'sku' sets each SKU in prices to
+        its own price.
+        Returns the number of products repriced.
+        """
+        if mode == "sku":
+            scopes = [Product.sku.in_(chunk) for chunk in chunked(list(prices))]
+        else:
+            scopes = [Product.id.in_(chunk) for chunk in chunked(list(ids or ()))]
+            scopes += [Product.sku.in_(chunk) for chunk in chunked(list(skus or ()))]
+            if category_id is not None:
+                scopes.append(Product.category_id == category_id)
+        # id -> sku of every product in scope
+        targets: Dict[int, str] = {}
+        for scope in scopes:
+            targets.update(db.execute(
+                select(Product.id, Product.sku).where(scope, Product.deleted_at == None)
+            ).all())
+        if not targets:
+            return 0
+        
+        self._bump_version(db)
+        table = Product.__table__
+        updated = 0
+        if mode == "sku":
+            stmt = update(table).where(table.c.id == bindparam("_id")).values(price=bindparam("price"))
+            for chunk in chunked(list(targets.items())):
+                db.execute(stmt, [{"_id": id, "price": prices[sku]} for id, sku in chunk])
+                updated += len(chunk)
+        else:
+            if mode == "absolute":
+                price = value
+            else:
+                rounded = func.round(cast(table.c.price * (1 + value / 100), Numeric), 2)
+                price = case((rounded < MIN_PRICE, MIN_PRICE), else_=rounded)
+            for chunk in chunked(list(targets)):
+                updated += db.execute(
+                    update(table)
+                    .where(table.c.id.in_(chunk), table.c.deleted_at == None)
+                    .values(price=price)
+                ).rowcount
+        db.commit()
+        sku_cache.invalidate(*targets.values())
+        return updated
+    
+    def get_by_category(
+        self, db: Session, *, category_id: int, skip: int = 0, limit: int = 100, subtree: bool = False
+    ) -> List[Product]:
+        """
+        Non-deleted products of a non-deleted category. With subtree, products
+        of its subcategories at any depth too, through one join on the closure
+        table.
+        """
+        query = db.query(Product).join(Category, Product.category_id == Category.id)
+        if subtree:
+            query = query.join(
+                CategoryClosure, CategoryClosure.descendant_id == Product.category_id
+            ).filter(CategoryClosure.ancestor_id == category_id).order_by(Product.id)
+        else:
+            query = query.filter(Product.category_id == category_id)
+        return query.filter(
             Product.deleted_at == None,
             Category.deleted_at == None
         ).offset(skip).limit(limit).all()
     
-    def search_products(self, db: Session, *, query: str, skip: int = 0, limit: int = 100) -> List[Product]:
+    def search_products(
+        self, db: Session, *, query: str, skip: int = 0, limit: int = 100, fuzzy: bool = False
+    ) -> List[Product]:
+        """
+        Full-text search over name, description and sku, most relevant first.
+        With fuzzy, a query matching nothing at all falls back to trigram similarity.
+        """
+        products = self._search_exact(db, query=query, skip=skip, limit=limit)
+        if products or not fuzzy:
+            return products
+        # An empty page past the last exact match is not a miss
+        if skip and self._search_exact(db, query=query, skip=0, limit=1):
+            return products
+        return self.search_similar(db, query=query, skip=skip, limit=limit)
+    
+    def search_similar(self, db: Session, *, query: str, skip: int = 0, limit: int = 100) -> List[Product]:
+        """Products whose name or sku shares most of its trigrams with query, most similar first"""
+        return self._by_ids(db, trigram_index.search(db, query, skip=skip, limit=limit))
+    
+    def _search_exact(self, db: Session, *, query: str, skip: int = 0, limit: int = 100) -> List[Product]:
+        terms = query_terms(query)
+        if not terms:
+            # Nothing long enough to index, e.g. "tv"
+            return self._search_by_substring(db, query=query, skip=skip, limit=limit)
+        
+        if db.get_bind().dialect.name == "mysql":
+            from sqlalchemy.dialects.mysql import match
+            
+            relevance = match(
+                Product.name, Product.description, Product.sku, against=boolean_query(terms)
+            ).in_boolean_mode()
+            return db.query(Product).filter(
+                relevance,
+                Product.deleted_at == None
+            ).order_by(relevance.desc(), Product.id).offset(skip).limit(limit).all()
+        
+        return self._by_ids(db, search_index.search(db, terms, skip=skip, limit=limit))
+    
+    def faceted_search(
+        self,
+        db: Session,
+        *,
+        query: Optional[str] = None,
+        category_ids: Optional[Sequence[int]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False,
+        sort: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        Filtered, sorted page of products with counts per category and price band.
+        All facets come from one grouped query. Category counts ignore the category
+        filter, so clients can show what picking another category would add.
+        """
+        conditions = [Product.deleted_at == None, Category.deleted_at == None]
+        if min_price is not None:
+            conditions.append(Product.price >= min_price)
+        if max_price is not None:
+            conditions.append(Product.price <= max_price)
+        
+        relevance = None
+        scores = None
+        if query:
+            terms = query_terms(query)
+            if not terms:
+                conditions.append(Product.name.ilike(f"%{query}%"))
+            elif db.get_bind().dialect.name == "mysql":
+                from sqlalchemy.dialects.mysql import match
+                
+                relevance = match(
+                    Product.name, Product.description, Product.sku, against=boolean_query(terms)
+                ).in_boolean_mode()
+                conditions.append(relevance)
+            else:
+                scores = search_index.scores(db, terms)
+                if not scores:
+                    return {"total": 0, "items": [], "facets": {"categories": [], "price_bands": []}}
+                # Inline the ids; a large match set would overflow SQLite's bound parameter limit
+                conditions.append(Product.id.in_(
+                    bindparam("match_ids", list(scores), expanding=True, literal_execute=True)
+                ))
+        
+        def filtered(stmt: Select) -> Select:
+            stmt = stmt.join(Category, Product.category_id == Category.id)
+            if in_stock:
+                stmt = stmt.join(Inventory, Inventory.product_id == Product.id).where(Inventory.quantity > 0)
+            return stmt.where(*conditions)
+        
+        band = case(
+            *((Product.price < upper, i) for i, upper in enumerate(PRICE_BANDS[1:])),
+            else_=len(PRICE_BANDS) - 1,
+        )
+        facet_rows = db.execute(
+            filtered(select(Product.category_id, band, func.count()).select_from(Product))
+            .group_by(Product.category_id, band)
+        ).all()
+        
+        selected = set(category_ids) if category_ids else None
+        category_counts: Dict[int, int] = {}
+        band_counts = [0] * len(PRICE_BANDS)
+        for category_id, band_index, count in facet_rows:
+            category_counts[category_id] = category_counts.get(category_id, 0) + count
+            if selected is None or category_id in selected:
+                band_counts[band_index] += count
+        total = sum(band_counts)
+        facets = {
+            "categories": [
+                {"category_id": category_id, "count": count}
+                for category_id, count in sorted(category_counts.items(), key=lambda item: (-item[1], item[0]))
+            ],
+            "price_bands": [
+                {
+                    "min_price": PRICE_BANDS[i],
+                    "max_price": PRICE_BANDS[i + 1] if i + 1 < len(PRICE_BANDS) else None,
+                    "count": count,
+                }
+                for i, count in enumerate(band_counts) if count
+            ],
+        }
+        if not total or skip >= total:
+            return {"total": total, "items": [], "facets": facets}
+        
+        if selected is not None:
+            conditions.append(Product.category_id.in_(selected))
+        if scores is not None and sort in (None, "relevance"):
+            # Relevance lives in the in-process index, so rank the filtered ids here
+            ids = db.scalars(filtered(select(Product.id).select_from(Product))).all()
+            items = self._by_ids(db, rank({i: scores[i] for i in ids}, skip=skip, limit=limit))
+        else:
+            if sort in PRODUCT_SORTS:
+                order_by = PRODUCT_SORTS[sort]
+            elif relevance is not None:
+                order_by = (relevance.desc(), Product.id)
+            else:
+                order_by = (Product.id,)
+            items = db.scalars(
+                filtered(select(Product)).order_by(*order_by).offset(skip).limit(limit)
+            ).all()
+        return {"total": total, "items": items, "facets": facets}
+    
+    def _by_ids(self, db: Session, ids: List[int]) -> List[Product]:
+        """Products with the given ids, in that order"""
+        if not ids:
+            return []
+        products = {p.id: p for p in db.query(Product).filter(Product.id.in_(ids)).all()}
+        return [products[i] for i in ids if i in products]
+    
+    def autocomplete(self, db: Session, *, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Non-deleted products whose name or sku starts with prefix, served from memory"""
+        return [
+            {"id": id, "name": name, "sku": sku}
+            for id, name, sku in autocomplete_index.complete(db, prefix, limit=limit)
+        ]
+    
+    def _search_by_substring(self, db: Session, *, query: str, skip: int = 0, limit: int = 100) -> List[Product]:
         return db.query(Product).filter(
             Product.name.ilike(f"%{query}%"),
             Product.deleted_at == None
         ).offset(skip).limit(limit).all()
 
-    def remove(self, db: Session, *, id: int) -> Product:
-        """Soft delete a product by setting deleted_at timestamp without updating updated_at"""
-        # First get the current object to preserve the updated_at value
-        obj = db.query(self.model).get(id)
-        if not obj:
-            return None
-            
-        # Get the current updated_at value to preserve it
-        current_updated_at = obj.updated_at
-        
-        # Set deleted_at while preserving the current updated_at
-        now = datetime.datetime.now()
-        db.query(self.model).filter(self.model.id == id).update(
-            {
-                "deleted_at": now,
-                "updated_at": current_updated_at  # Explicitly preserve the current updated_at
-            },
-            synchronize_session=False
-        )
-        db.commit()
-        
-        # Get the updated object
-        obj = db.query(self.model).get(id)
+    def remove(self, db: Session, *, id: int) -> Optional[Product]:
+        """
+        Soft delete a product by setting deleted_at timestamp without updating updated_at.
+        Returns None if the product does not exist or is already deleted.
+        """
+        obj = self._set_deleted_at_one(db, id=id, deleted_at=datetime.datetime.now())
+        if obj is not None:
+            sku_cache.invalidate(obj.sku)
+            self._reindex(obj)
         return obj
 
+    def _active(self, stmt: Select) -> Select:
+        return stmt.where(self.model.deleted_at == None)
+    
+    def _ordered(self, stmt: Select) -> Select:
+        # Id order, read straight off ix_product_deleted_at_id
+        return stmt.order_by(self.model.id)
+    
     def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Product]:
         """Only return non-deleted products"""
-        return db.query(self.model).filter(self.model.deleted_at == None).offset(skip).limit(limit).all()
+        return db.query(self.model).filter(self.model.deleted_at == None).order_by(
+            self.model.id
+        ).offset(skip).limit(limit).all()
     
-    def restore(self, db: Session, *, id: int) -> Product:
-        """Restore a soft-deleted product"""
-        # First get the current object to preserve the updated_at value
-        obj = db.query(self.model).get(id)
-        if not obj:
-            return None
-            
-        # Get the current updated_at value to preserve it
-        current_updated_at = obj.updated_at
-        
-        # Clear deleted_at while preserving the current updated_at
-        db.query(self.model).filter(self.model.id == id).update(
-            {
-                "deleted_at": None,
-                "updated_at": current_updated_at  # Explicitly preserve the current updated_at
-            },
-            synchronize_session=False
+    def restore(self, db: Session, *, id: int) -> Optional[Product]:
+        """
+        Restore a soft-deleted product, leaving updated_at as it was.
+        Returns None if the product does not exist or is not deleted.
+        """
+        obj = self._set_deleted_at_one(db, id=id, deleted_at=None)
+        if obj is not None:
+            sku_cache.invalidate(obj.sku)
+            self._reindex(obj)
+        return obj
+    
+    def remove_many(
+        self, db: Session, *, ids: Optional[Sequence[int]] = None, category_id: Optional[int] = None
+    ) -> int:
+        """Soft delete the non-deleted products among ids and/or in a category, preserving updated_at"""
+        removed = self._set_deleted_at(
+            db, where=self._selection(ids, category_id), deleted_at=datetime.datetime.now()
         )
         db.commit()
-        
-        # Get the updated object
-        obj = db.query(self.model).get(id)
-        return obj
+        self._bulk_committed(db, removed)
+        return len(removed)
+    
+    def restore_many(
+        self, db: Session, *, ids: Optional[Sequence[int]] = None, category_id: Optional[int] = None
+    ) -> int:
+        """Restore the deleted products among ids and/or in a category, preserving updated_at"""
+        restored = self._set_deleted_at(db, where=self._selection(ids, category_id), deleted_at=None)
+        db.commit()
+        self._bulk_committed(db, restored)
+        return len(restored)
     
-    def get_deleted(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Product]:
-        """Get all deleted products"""
-        return db.query(self.model).filter(self.model.deleted_at != None).offset(skip).limit(limit).all()
+    def _selection(self, ids: Optional[Sequence[int]], category_id: Optional[int]) -> List[Any]:
+        where = [Product.id.in_(chunk) for chunk in chunked(list(ids or ()))]
+        if category_id is not None:
+            where.append(Product.category_id == category_id)
+        return where
+    
+    def get_deleted(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Union[Product, ProductArchive]]:
+        """Get all deleted products, archived ones included, most recently deleted first"""
+        return self._get_deleted_with_archive(db, ProductArchive, skip=skip, limit=limit)
+    
+    def archive_deleted(
+        self, db: Session, *, deleted_before: datetime.datetime, limit: int = ARCHIVE_CHUNK_SIZE
+    ) -> int:
+        """
+        Move up to ``limit`` products soft deleted before ``deleted_before``,
+        oldest first, and their inventory to the archive tables, and commit.
+        Their sales stay, already left out of sales reads as inactive, and are
+        marked product_archived. Returns how many moved, 0 once none are left.
+        """
+        rows = db.execute(
+            select(Product.id, Product.sku)
+            .where(Product.deleted_at < deleted_before)
+            .order_by(Product.deleted_at, Product.id)
+            .limit(limit)
+            # Restores of these rows wait for the commit; other writers are not held up
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            db.rollback()
+            return 0
+        where = [Product.id.in_([row.id for row in rows]), Product.deleted_at < deleted_before]
+        archived_at = datetime.datetime.now()
+        if move_rows(
+            db, Inventory, InventoryArchive,
+            where=[Inventory.product_id.in_(select(Product.id).where(*where))], archived_at=archived_at,
+        ):
+            from app.crud.crud_inventory import inventory
+            inventory._bump_version(db)
+        # Before the ids can be reused; sales reads already leave these sales out,
+        # so the sale version stays
+        db.execute(
+            update(Sale.__table__)
+            .where(Sale.product_id.in_(select(Product.id).where(*where)))
+            .values(product_archived=True)
+        )
+        moved = move_rows(db, Product, ProductArchive, where=where, archived_at=archived_at)
+        self._bump_version(db)
+        db.commit()
+        sku_cache.invalidate(*(row.sku for row in rows))
+        return moved
     
     def get(self, db: Session, id: any) -> Optional[Product]:
         """Override the base get method to include deleted flag"""
@@ -1,13 +1,52 @@
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Sequence, Tuple, Union
 from datetime import datetime, timedelta
-from sqlalchemy import func, extract
+from sqlalchemy import func, extract, inspect, or_, select
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.sql import Select
 
-from app.crud.base import CRUDBase
+from app.cache.sku import SkuEntry
+from app.crud.base import CRUDBase, chunked
 from app.models.sale import Sale
-from app.schemas.sale import SaleCreate, SaleUpdate
+from app.schemas.sale import SaleCreate, SaleUpdate, SaleIngestLine
 
 class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
+    def _product_columns(self, db: Session, product_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """The denormalized category_id and product_active of new sales of each product"""
+        from app.models.product import Product
+        
+        columns = {}
+        for chunk in chunked(list(dict.fromkeys(product_ids))):
+            for id, category_id, deleted_at in db.execute(
+                select(Product.id, Product.category_id, Product.deleted_at).where(Product.id.in_(chunk))
+            ):
+                columns[id] = {"category_id": category_id, "product_active": deleted_at is None}
+        return columns
+    
+    def create(self, db: Session, *, obj_in: SaleCreate) -> Sale:
+        obj_in_data = jsonable_encoder(obj_in)
+        obj_in_data.update(self._product_columns(db, [obj_in_data["product_id"]]).get(obj_in_data["product_id"], {}))
+        return super().create(db, obj_in=obj_in_data)
+    
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[SaleCreate, Dict[str, Any]]],
+        commit: bool = True,
+        refresh: bool = True,
+    ) -> Optional[List[Sale]]:
+        """CRUDBase.create_many that fills in each sale's product category and state"""
+        rows = [self._as_row(obj_in) for obj_in in objs_in]
+        columns = self._product_columns(db, [row["product_id"] for row in rows])
+        return super().create_many(
+            db,
+            objs_in=[{**row, **columns.get(row["product_id"], {})} for row in rows],
+            commit=commit,
+            refresh=refresh,
+        )
+    
     def create_with_product(self, db: Session, *, obj_in: SaleCreate) -> Sale:
         """Create a sale record and update inventory."""
         # Create the sale
@@ -19,73 +58,210 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
         
         return sale
     
+    def ingest(self, db: Session, *, lines: Sequence[SaleIngestLine]) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Record a batch of SKU-identified sales and deduct their stock in one transaction.
+        Lines that cannot be recorded are skipped and reported as errors.
+        """
+        from app.crud.crud_cache_version import cache_version, sale_day_entity
+        from app.crud.crud_product import product
+        from app.models.inventory import Inventory
+        from app.models.product import Product
+        
+        # The cache only narrows the read below to ids, so it may be stale. The category
+        # and state the sales copy are read under a share lock: a concurrent delete or
+        # recategorize either commits first and is seen, or waits and then syncs these sales.
+        cached = product.get_many_by_sku_cached(db, skus=(line.sku for line in lines))
+        ids = [entry.id for entry in cached.values() if entry is not None]
+        unknown = [sku for sku, entry in cached.items() if entry is None]
+        products = {
+            row.sku: SkuEntry(row.id, row.price, row.deleted_at, row.category_id)
+            for row in db.execute(
+                select(Product.id, Product.sku, Product.price, Product.deleted_at, Product.category_id)
+                .where(or_(Product.id.in_(ids), Product.sku.in_(unknown)))
+                .order_by(Product.id)
+                .with_for_update(read=True)
+            )
+        }
+        product_ids = {p.id for p in products.values()}
+        # Locked until the commit, so concurrent ingests deduct from each other's results
+        # instead of overwriting them; product_id order keeps two batches from deadlocking
+        stock = {
+            inv.product_id: inv
+            for inv in db.query(Inventory).filter(Inventory.product_id.in_(product_ids))
+            .order_by(Inventory.product_id).with_for_update().populate_existing()
+        } if product_ids else {}
+        
+        # Same clock as the column default, read once for the whole batch
+        now = db.scalar(select(func.current_timestamp())) if any(l.sale_date is None for l in lines) else None
+        sales = []
+        errors = []
+        for index, line in enumerate(lines):
+            entry = products.get(line.sku)
+            if entry is None:
+                errors.append({"line": index, "sku": line.sku, "detail": "Unknown SKU"})
+                continue
+            if entry.deleted_at is not None:
+                errors.append({"line": index, "sku": line.sku, "detail": "Cannot create sale for deleted product"})
+                continue
+            inventory = stock.get(entry.id)
+            if inventory is None:
+                errors.append({"line": index, "sku": line.sku, "detail": "No inventory found for product"})
+                continue
+            if inventory.quantity < line.quantity:
+                errors.append({
+                    "line": index,
+                    "sku": line.sku,
+                    "detail": f"Insufficient stock. Available: {inventory.quantity}, Requested: {line.quantity}",
+                })
+                continue
+            inventory.quantity -= line.quantity
+            unit_price = line.unit_price if line.unit_price is not None else entry.price
+            sale = Sale(
+                product_id=entry.id,
+                quantity=line.quantity,
+                unit_price=unit_price,
+                total_price=round(unit_price * line.quantity, 2),
+                platform=line.platform,
+                order_id=line.order_id,
+                sale_date=line.sale_date or now,
+                category_id=entry.category_id,
+                product_active=True,
+            )
+            sales.append(sale)
+        
+        if sales:
+            db.add_all(sales)
+            # One bump per entity rather than per line
+            entities = {"sale", "inventory"} | {sale_day_entity(s.sale_date.date()) for s in sales}
+            for entity in sorted(entities):
+                cache_version.bump(db, entity=entity)
+            db.commit()
+        else:
+            db.rollback()
+        return len(sales), errors
+    
+    def _bump_version(self, db: Session, db_obj: Optional[Sale] = None) -> None:
+        """Bump the sale table and every sale day the write touched."""
+        from app.crud.crud_cache_version import cache_version, sale_day_entity
+        
+        previous = list(inspect(db_obj).attrs.sale_date.history.deleted) if db_obj is not None else []
+        super()._bump_version(db, db_obj)
+        if db_obj is None:
+            return
+        if db_obj.sale_date is None:
+            # Left to the database default on insert
+            db.flush()
+            db.refresh(db_obj, ["sale_date"])
+        days = set()
+        for value in previous + [db_obj.sale_date]:
+            # create() assigns jsonable_encoder output, so dates may still be ISO strings
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            if value is not None:
+                days.add(value.date())
+        for day in sorted(days):
+            cache_version.bump(db, entity=sale_day_entity(day))
+    
+    def _bump_bulk_version(self, db: Session, rows: Sequence[Dict[str, Any]]) -> None:
+        """Bump the sale table and the days the rows leave and land on."""
+        from app.crud.crud_cache_version import cache_version, sale_day_entity
+        
+        super()._bump_bulk_version(db, rows)
+        days = set()
+        for ids in chunked([row["id"] for row in rows if "id" in row]):
+            days.update(
+                sale_date.date() for sale_date in db.scalars(select(Sale.sale_date).where(Sale.id.in_(ids)))
+            )
+        # New rows without a date get the column default; its day is read once for the batch
+        if any(row.get("sale_date") is None and "id" not in row for row in rows):
+            days.add(db.scalar(select(func.current_timestamp())).date())
+        for row in rows:
+            value = row.get("sale_date")
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            if value is not None:
+                days.add(value.date())
+        for day in sorted(days):
+            cache_version.bump(db, entity=sale_day_entity(day))
+    
     def get_by_date_range(
         self, db: Session, *, start_date: datetime, end_date: datetime, skip: int = 0, limit: int = 100
     ) -> List[Sale]:
         """Get sales between start_date and end_date."""
-        from app.models.product import Product
-        
-        return db.query(Sale).join(
-            Product, Sale.product_id == Product.id
-        ).filter(
+        return db.query(Sale).filter(
             Sale.sale_date >= start_date,
             Sale.sale_date <= end_date,
-            Product.deleted_at == None
+            Sale.product_active == True
         ).order_by(Sale.sale_date.desc()).offset(skip).limit(limit).all()
     
     def get_by_product(
         self, db: Session, *, product_id: int, skip: int = 0, limit: int = 100
     ) -> List[Sale]:
         """Get sales for a specific product."""
-        from app.models.product import Product
-        
-        return db.query(Sale).join(
-            Product, Sale.product_id == Product.id
-        ).filter(
+        return db.query(Sale).filter(
             Sale.product_id == product_id,
-            Product.deleted_at == None
+            Sale.product_active == True
         ).order_by(Sale.sale_date.desc()).offset(skip).limit(limit).all()
     
     def get_by_platform(
         self, db: Session, *, platform: str, skip: int = 0, limit: int = 100
     ) -> List[Sale]:
         """Get sales for a specific platform."""
-        from app.models.product import Product
-        
-        return db.query(Sale).join(
-            Product, Sale.product_id == Product.id
-        ).filter(
+        return db.query(Sale).filter(
             Sale.platform == platform,
-            Product.deleted_at == None
+            Sale.product_active == True
         ).order_by(Sale.sale_date.desc()).offset(skip).limit(limit).all()
     
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[Sale]:
         """Get all sales for non-deleted products."""
-        from app.models.product import Product
-        
-        return db.query(Sale).join(
-            Product, Sale.product_id == Product.id
-        ).filter(
-            Product.deleted_at == None
+        return db.query(Sale).filter(
+            Sale.product_active == True
         ).order_by(Sale.sale_date.desc()).offset(skip).limit(limit).all()
     
+    def _active(self, stmt: Select) -> Select:
+        return stmt.where(Sale.product_active == True)
+    
+    def _ordered(self, stmt: Select) -> Select:
+        return stmt.order_by(Sale.sale_date.desc())
+    
+    def get_rows(
+        self,
+        db: Session,
+        *,
+        columns: Sequence[str],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        product_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        skip: int = 0,
+        limit: Optional[int] = 100
+    ) -> List[Row]:
+        """Projection-mode listing of sales for non-deleted products, narrowed by any given filters."""
+        criteria = []
+        if start_date:
+            criteria.append(Sale.sale_date >= start_date)
+        if end_date:
+            criteria.append(Sale.sale_date <= end_date)
+        if product_id:
+            criteria.append(Sale.product_id == product_id)
+        if platform:
+            criteria.append(Sale.platform == platform)
+        return self.get_multi_rows(db, columns=columns, where=criteria, skip=skip, limit=limit)
+    
     def get_sales_summary(
         self, db: Session, *, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
     ) -> Dict[str, Any]:
         """Get summary of sales including total count, revenue, average order value, and total units sold."""
-        from app.models.product import Product
-        
         query = db.query(
             func.count(Sale.id).label("total_sales"),
             func.sum(Sale.total_price).label("total_revenue"),
             func.avg(Sale.total_price).label("average_order_value"),
             func.sum(Sale.quantity).label("total_units_sold")
-        ).join(
-            Product, Sale.product_id == Product.id
         ).filter(
-            Product.deleted_at == None
+            Sale.product_active == True
         )
         
         if start_date:
@@ -108,8 +284,22 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
         Get sales aggregated by time period.
         period_type can be 'day', 'week', 'month', or 'year'
         """
-        from app.models.product import Product
-        
+        results = self.get_sales_by_period_rows(
+            db, period_type=period_type, start_date=start_date, end_date=end_date
+        )
+        return [
+            {
+                "period": str(r.period),
+                "sales_count": r.sales_count,
+                "total_revenue": float(r.total_revenue)
+            }
+            for r in results
+        ]
+    
+    def get_sales_by_period_rows(
+        self, db: Session, *, period_type: str, start_date: datetime, end_date: datetime
+    ) -> List[Row]:
+        """Rows of (period, sales_count, total_revenue) behind get_sales_by_period."""
         if period_type == 'day':
             # Daily sales
             date_format = func.date_format(Sale.sale_date, '%Y-%m-%d')
@@ -125,56 +315,67 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
         else:
             raise ValueError("period_type must be one of: 'day', 'week', 'month', 'year'")
         
-        results = db.query(
+        return db.query(
             date_format.label("period"),
             func.count(Sale.id).label("sales_count"),
             func.sum(Sale.total_price).label("total_revenue")
-        ).join(
-            Product, Sale.product_id == Product.id
         ).filter(
             Sale.sale_date >= start_date,
             Sale.sale_date <= end_date,
-            Product.deleted_at == None
+            Sale.product_active == True
         ).group_by("period").order_by("period").all()
-        
-        return [
-            {
-                "period": str(r.period),
-                "sales_count": r.sales_count,
-                "total_revenue": float(r.total_revenue)
-            }
-            for r in results
-        ]
     
     def get_sales_by_category(
-        self, db: Session, *, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+        self,
+        db: Session,
+        *,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        level: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        """Get sales aggregated by product category."""
-        from app.models.product import Product
-        from app.models.category import Category
+        """
+        Get sales aggregated by product category, from sale rows alone. With
+        level, sales are rolled up to each product's ancestor category at that
+        level, through one join on the closure table; products in shallower
+        categories are left out.
+        """
+        from app.models.category import Category, CategoryClosure
         
-        query = db.query(
-            Category.name.label("category_name"),
+        if level is None:
+            group = Sale.category_id
+            query = db.query(group.label("category_id"))
+        else:
+            group = CategoryClosure.ancestor_id
+            query = db.query(group.label("category_id")).join(
+                CategoryClosure, CategoryClosure.descendant_id == Sale.category_id
+            ).join(
+                Category, CategoryClosure.ancestor_id == Category.id
+            ).filter(
+                Category.level == level
+            )
+        query = query.add_columns(
             func.count(Sale.id).label("sales_count"),
             func.sum(Sale.total_price).label("total_revenue")
-        ).join(
-            Product, Sale.product_id == Product.id
-        ).join(
-            Category, Product.category_id == Category.id
         ).filter(
-            Product.deleted_at == None
+            Sale.product_active == True
         )
         
         if start_date:
             query = query.filter(Sale.sale_date >= start_date)
         if end_date:
             query = query.filter(Sale.sale_date <= end_date)
-            
-        results = query.group_by(Category.name).order_by(func.sum(Sale.total_price).desc()).all()
+        
+        # Names are joined onto the per-category totals, one lookup per category rather than per sale
+        totals = query.group_by(group).subquery()
+        results = db.query(
+            Category.name, totals.c.sales_count, totals.c.total_revenue
+        ).join(
+            Category, Category.id == totals.c.category_id
+        ).order_by(totals.c.total_revenue.desc()).all()
         
         return [
             {
-                "category_name": r.category_name,
+                "category_name": r.name,
                 "sales_count": r.sales_count,
                 "total_revenue": float(r.total_revenue)
             }
@@ -185,16 +386,12 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
         self, db: Session, *, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
     ) -> List[Dict[str, Any]]:
         """Get sales aggregated by platform."""
-        from app.models.product import Product
-        
         query = db.query(
             Sale.platform,
             func.count(Sale.id).label("sales_count"),
             func.sum(Sale.total_price).label("total_revenue")
-        ).join(
-            Product, Sale.product_id == Product.id
         ).filter(
-            Product.deleted_at == None
+            Sale.product_active == True
         )
         
         if start_date:
@@ -3,4 +3,6 @@ from app.db.base_class import Base
 from app.models.product import Product
 from app.models.inventory import Inventory
 from app.models.sale import Sale
-from app.models.category import Category 
\ No newline at end of file
+from app.models.category import Category, CategoryClosure
+from app.models.cache_version import CacheVersion
+from app.models.archive import ProductArchive, InventoryArchive, CategoryArchive
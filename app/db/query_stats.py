@@ -0,0 +1,223 @@
+"""
+In-app equivalent of ``pg_stat_statements``.
+
+Every statement executed through the engine is normalized to a fingerprint
+(literals, bind parameters and IN/VALUES lists collapsed) and aggregated in a
+bounded in-memory table. Statements slower than a threshold get their EXPLAIN
+plan captured, rate limited so a burst of slow queries cannot pile extra load
+on the database.
+"""
+import functools
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?|(?<![:\w]):\w+")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)", re.IGNORECASE)
+_ROW = r"\((?:\s*\?\s*,)*\s*\?\s*\)"
+_VALUES_LIST = re.compile(rf"\bVALUES\s*({_ROW})(?:\s*,\s*{_ROW})+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+ORDER_FIELDS = {
+    "total_time": "total_time_ms",
+    "mean_time": "mean_time_ms",
+    "max_time": "max_time_ms",
+    "calls": "calls",
+    "rows": "rows",
+}
+
+@functools.lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """Reduce a SQL statement to its shape, independent of parameter values."""
+    normalized = _STRING.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    normalized = _VALUES_LIST.sub(r"VALUES \1, ...", normalized)
+    return normalized
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+class _Entry:
+    __slots__ = ("query", "calls", "total_time", "min_time", "max_time", "rows", "last_seen")
+
+    def __init__(self, query: str) -> None:
+        self.query = query
+        self.calls = 0
+        self.total_time = 0.0
+        self.min_time = float("inf")
+        self.max_time = 0.0
+        self.rows = 0
+        self.last_seen = 0.0
+
+class StatementStats:
+    def __init__(
+        self,
+        *,
+        max_entries: int = 500,
+        slow_threshold_ms: float = 200.0,
+        explains_per_minute: int = 6,
+        slow_log_size: int = 100,
+    ) -> None:
+        self.max_entries = max_entries
+        self.slow_threshold_ms = slow_threshold_ms
+        self.explains_per_minute = explains_per_minute
+        self._entries: Dict[str, _Entry] = {}
+        self._plans: Dict[str, Dict[str, Any]] = {}
+        self._slow_log: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+        self._explain_times: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine) -> None:
+        """Attach the cursor execution hooks to ``engine``."""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            context._stats_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        start = getattr(context, "_stats_start", None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        query = normalize_statement(statement)
+        key = fingerprint(query)
+        rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+        self.record(key, query, duration, rows)
+
+        duration_ms = duration * 1000
+        if duration_ms >= self.slow_threshold_ms:
+            self._slow_log.append({
+                "fingerprint": key,
+                "query": query,
+                "duration_ms": round(duration_ms, 3),
+                "seen_at": datetime.utcnow().isoformat(),
+            })
+            if statement.lstrip()[:6].upper() == "SELECT" and self._allow_explain(key):
+                self._capture_plan(conn, key, statement, parameters, duration_ms)
+
+    def record(self, key: str, query: str, duration: float, rows: int = 0) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    self._evict()
+                entry = self._entries[key] = _Entry(query)
+            entry.calls += 1
+            entry.total_time += duration
+            entry.rows += rows
+            entry.last_seen = time.time()
+            if duration < entry.min_time:
+                entry.min_time = duration
+            if duration > entry.max_time:
+                entry.max_time = duration
+
+    def _evict(self) -> None:
+        # Like pg_stat_statements, drop the least-executed tenth of the table
+        victims = sorted(self._entries.items(), key=lambda item: item[1].calls)
+        for key, _ in victims[: max(1, len(victims) // 10)]:
+            del self._entries[key]
+            self._plans.pop(key, None)
+
+    def _allow_explain(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            previous = self._plans.get(key)
+            if previous is not None and now - previous["_captured"] < 60:
+                return False
+            while self._explain_times and now - self._explain_times[0] > 60:
+                self._explain_times.popleft()
+            if len(self._explain_times) >= self.explains_per_minute:
+                return False
+            self._explain_times.append(now)
+            self._plans[key] = {"_captured": now}
+            return True
+
+    def _capture_plan(self, conn, key: str, statement: str, parameters, duration_ms: float) -> None:
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        plan: Dict[str, Any] = {
+            "_captured": time.monotonic(),
+            "captured_at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration_ms, 3),
+            "plan": [],
+            "error": None,
+        }
+        # Use a separate DBAPI cursor so the pending result of the original
+        # statement is left untouched for the ORM to fetch. Raw cursors do not
+        # fire engine events, so the EXPLAIN itself is not recorded.
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            columns = [d[0] for d in cursor.description or ()]
+            plan["plan"] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as exc:
+            plan["error"] = str(exc)
+        finally:
+            cursor.close()
+        with self._lock:
+            if key in self._plans:
+                self._plans[key] = plan
+
+    def snapshot(self, *, order_by: str = "total_time", limit: int = 50) -> List[Dict[str, Any]]:
+        """Return aggregated statistics, worst first according to ``order_by``."""
+        with self._lock:
+            items = [(key, entry, self._plans.get(key)) for key, entry in self._entries.items()]
+        stats = []
+        for key, entry, plan in items:
+            stats.append({
+                "fingerprint": key,
+                "query": entry.query,
+                "calls": entry.calls,
+                "total_time_ms": round(entry.total_time * 1000, 3),
+                "mean_time_ms": round(entry.total_time / entry.calls * 1000, 3),
+                "min_time_ms": round(entry.min_time * 1000, 3),
+                "max_time_ms": round(entry.max_time * 1000, 3),
+                "rows": entry.rows,
+                "has_plan": bool(plan and "plan" in plan),
+            })
+        field = ORDER_FIELDS[order_by]
+        stats.sort(key=lambda s: s[field], reverse=True)
+        return stats[:limit]
+
+    def get_plan(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            plan = self._plans.get(key)
+        if entry is None or plan is None or "plan" not in plan:
+            return None
+        return {
+            "fingerprint": key,
+            "query": entry.query,
+            **{k: v for k, v in plan.items() if not k.startswith("_")},
+        }
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        return list(reversed(self._slow_log))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+            self._slow_log.clear()
+            self._explain_times.clear()
+
+statement_stats = StatementStats(
+    max_entries=settings.STATEMENT_STATS_MAX_ENTRIES,
+    slow_threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explains_per_minute=settings.SLOW_QUERY_EXPLAINS_PER_MINUTE,
+)
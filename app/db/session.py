@@ -3,6 +3,8 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine.url import make_url
 
 from app.core.config import settings
+from app.core.metrics import TimedQueuePool, instrument_engine
+from app.db.query_stats import statement_stats
 
 # Add connection timeout settings to help with lock issues during tests
 url = make_url(settings.DATABASE_URL)
@@ -10,10 +12,14 @@ engine = create_engine(
     url,
     pool_recycle=3600,
     pool_pre_ping=True,
+    poolclass=TimedQueuePool,
     connect_args={
         "connect_timeout": 60,  # Connection timeout in seconds
     }
 )
+instrument_engine(engine)
+if settings.STATEMENT_STATS_ENABLED:
+    statement_stats.install(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1 @@
+"""Bulk imports from uploaded files."""
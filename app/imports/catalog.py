@@ -0,0 +1,125 @@
+"""
+Streaming supplier catalog import.
+
+Uploads are CSV with a header row or newline-delimited JSON, one product per
+row or line, with the fields of ``schemas.CatalogRow``. Rows are parsed one at
+a time from any iterable of text lines, validated, and handed to
+``crud.product.import_catalog_chunk`` in chunks, so memory use does not grow
+with the size of the upload and each chunk costs a handful of statements and
+one commit. The report lists every row with its outcome.
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.schemas.catalog import CatalogRow
+
+FORMATS = ("csv", "ndjson")
+
+CHUNK_SIZE = 1000
+
+Parsed = Tuple[int, Optional[str], Optional[CatalogRow], Optional[str]]
+
+class ByteStream(io.RawIOBase):
+    """Readable file over an iterator of byte chunks, e.g. a request body."""
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+def text_lines(chunks: Iterable[bytes]) -> io.TextIOWrapper:
+    """Decode byte chunks as UTF-8 (with or without a BOM) into lines."""
+    return io.TextIOWrapper(io.BufferedReader(ByteStream(chunks)), encoding="utf-8-sig", newline="")
+
+def format_for(content_type: Optional[str], filename: Optional[str] = None) -> Optional[str]:
+    """Guess the upload format from a Content-Type header or a file name."""
+    if content_type:
+        media_type = content_type.split(";")[0].strip().lower()
+        if media_type in ("text/csv", "application/csv"):
+            return "csv"
+        if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+            return "ndjson"
+    if filename:
+        suffix = filename.rsplit(".", 1)[-1].lower()
+        if suffix == "csv":
+            return "csv"
+        if suffix in ("ndjson", "jsonl"):
+            return "ndjson"
+    return None
+
+def _validate(line: int, data: Dict[str, Any]) -> Parsed:
+    sku = data.get("sku") if isinstance(data.get("sku"), str) else None
+    try:
+        return line, sku, CatalogRow.model_validate(data), None
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = ".".join(str(part) for part in error["loc"])
+        return line, sku, None, f"{field}: {error['msg']}" if field else error["msg"]
+
+def parse_rows(lines: Iterable[str], fmt: str) -> Iterator[Parsed]:
+    """Yield (line, sku, row, error) for each record, with row or error set."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # Empty cells mean "not given"
+            data = {key: value for key, value in record.items() if key is not None and value != ""}
+            yield _validate(reader.line_num, data)
+        return
+    for number, text in enumerate(lines, start=1):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            yield number, None, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield number, None, None, "Expected a JSON object"
+            continue
+        yield _validate(number, data)
+
+def import_catalog(db: Session, lines: Iterable[str], fmt: str, *, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Import every row of ``lines`` and return the per-row report."""
+    report: List[Dict[str, Any]] = []
+    chunk: Dict[str, Tuple[int, CatalogRow]] = {}
+
+    def flush() -> None:
+        outcomes = crud.product.import_catalog_chunk(db, rows=[row for _, row in chunk.values()])
+        for (line, row), (status, detail) in zip(chunk.values(), outcomes):
+            report.append({"line": line, "sku": row.sku, "status": status, "detail": detail})
+        chunk.clear()
+
+    for line, sku, row, error in parse_rows(lines, fmt):
+        if row is None:
+            report.append({"line": line, "sku": sku, "status": "error", "detail": error})
+            continue
+        # A repeated SKU starts a new chunk, so later rows win as if applied one by one
+        if row.sku in chunk or len(chunk) >= chunk_size:
+            flush()
+        chunk[row.sku] = (line, row)
+    if chunk:
+        flush()
+
+    report.sort(key=lambda r: r["line"])
+    counts = {"created": 0, "updated": 0, "error": 0}
+    for r in report:
+        counts[r["status"]] += 1
+    return {"created": counts["created"], "updated": counts["updated"], "errors": counts["error"], "rows": report}
@@ -1,8 +1,21 @@
-from fastapi import FastAPI
+import logging
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.api_v1.api import api_router
+from app.cache.category import category_cache
+from app.cache.coherence import version_watcher
+from app.cache.sku import sku_cache
+from app.core import metrics
+from app.core.allocations import AllocationMiddleware
 from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.search.autocomplete import autocomplete_index
+from app.search.fulltext import search_index
+from app.search.trigram import trigram_index
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="E-commerce Admin API",
@@ -19,8 +32,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Inert unless ALLOCATION_SAMPLE_RATE > 0
+app.add_middleware(AllocationMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+if settings.CATEGORY_CACHE_ENABLED:
+    version_watcher.register("category", category_cache.on_version_change)
+version_watcher.register("product", sku_cache.on_version_change)
+version_watcher.register("product", search_index.on_version_change)
+version_watcher.register("product", autocomplete_index.on_version_change)
+version_watcher.register("product", trigram_index.on_version_change)
+
+@app.on_event("startup")
+def start_caches() -> None:
+    """
+    Start the cache version poller, then load process-local caches before
+    serving and start building the search indexes in the background; they
+    load lazily if the database is unreachable.
+    """
+    # Baseline the versions first so writes racing the warm-up are not missed
+    version_watcher.start()
+    if settings.SEARCH_INDEX_PREBUILD:
+        autocomplete_index.warm(SessionLocal)
+        trigram_index.warm(SessionLocal)
+        if engine.dialect.name != "mysql":
+            # MySQL serves full-text search from its FULLTEXT index
+            search_index.warm(SessionLocal)
+    if not settings.CATEGORY_CACHE_ENABLED:
+        return
+    db = SessionLocal()
+    try:
+        category_cache.load(db)
+    except Exception:
+        logger.exception("Could not warm the category cache")
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+def stop_caches() -> None:
+    version_watcher.stop()
+
 @app.get("/")
 async def root():
-    return {"message": "E-commerce Admin API. Go to /docs for documentation."} 
\ No newline at end of file
+    return {"message": "E-commerce Admin API. Go to /docs for documentation."} 
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics() -> Response:
+        """Prometheus scrape endpoint."""
+        return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE_LATEST)
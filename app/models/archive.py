@@ -0,0 +1,60 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+
+from app.db.base_class import Base
+
+# Rows moved out of the live tables by scripts/purge_deleted.py once they have been
+# soft deleted for long enough. Columns copy the live tables', ids included, plus
+# archived_at; there are no foreign keys, as the rows they pointed at may be archived
+# too. Live ids can be reused once their row is gone, so each table has its own key.
+
+class ProductArchive(Base):
+    __tablename__ = "product_archive"
+
+    archive_id = Column(Integer, primary_key=True)
+    id = Column(Integer, nullable=False)
+    name = Column(String(100), nullable=False)
+    description = Column(String(500), nullable=True)
+    # Not unique: the SKU of an archived product may be reused
+    sku = Column(String(50), index=True, nullable=False)
+    price = Column(Float, nullable=False)
+    category_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    deleted_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
+
+    # The deleted listing merges these with live deleted rows, most recently deleted first
+    __table_args__ = (
+        Index("ix_product_archive_deleted_at_id", "deleted_at", "id"),
+    )
+
+class InventoryArchive(Base):
+    __tablename__ = "inventory_archive"
+
+    archive_id = Column(Integer, primary_key=True)
+    id = Column(Integer, nullable=False)
+    product_id = Column(Integer, index=True, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    low_stock_threshold = Column(Integer, nullable=False)
+    last_restock_date = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, nullable=False)
+
+class CategoryArchive(Base):
+    __tablename__ = "category_archive"
+
+    archive_id = Column(Integer, primary_key=True)
+    id = Column(Integer, nullable=False)
+    # Not unique: the name of an archived category may be reused
+    name = Column(String(100), index=True, nullable=False)
+    description = Column(String(255), nullable=True)
+    parent_id = Column(Integer, nullable=True)
+    level = Column(Integer, nullable=False)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    deleted_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_category_archive_deleted_at_id", "deleted_at", "id"),
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, BigInteger, String, DateTime
+import datetime
+
+from app.db.base_class import Base
+
+class CacheVersion(Base):
+    """Per-entity version counter, bumped in the same transaction as every write to that entity."""
+    __tablename__ = "cache_version"
+
+    entity = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import datetime
 
@@ -8,9 +8,35 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, index=True, nullable=False)
     description = Column(String(255), nullable=True)
+    parent_id = Column(Integer, ForeignKey("category.id"), nullable=True)
+    # Depth in the tree; top-level categories are level 0
+    level = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     deleted_at = Column(DateTime, nullable=True)
     
     # Relationships
-    products = relationship("Product", back_populates="category") 
\ No newline at end of file
+    products = relationship("Product", back_populates="category")
+    
+    # Reads filter deleted_at IS NULL (or IS NOT NULL), so the indexes they use carry it
+    __table_args__ = (
+        Index("ix_category_deleted_at_id", "deleted_at", "id"),
+        Index("ix_category_parent_id_deleted_at", "parent_id", "deleted_at"),
+    )
+
+class CategoryClosure(Base):
+    """
+    One row per (ancestor, descendant) pair of the category tree, including each
+    category paired with itself at depth 0, so subtrees and ancestor paths are
+    plain indexed joins. Maintained by ``crud.category``.
+    """
+    __tablename__ = "category_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("category.id"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("category.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Ancestor paths and rollups, which look up by descendant
+        Index("ix_category_closure_descendant_depth", "descendant_id", "depth"),
+    )
@@ -1,21 +1,45 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, BigInteger, Integer, String, Float, ForeignKey, DateTime, Boolean, Index, func, select
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.functions import current_timestamp
 
 from app.db.base_class import Base
+from app.models.cache_version import CacheVersion
+
+# The product cache version of the writing transaction, which bumps it before writing product rows
+_product_version = func.coalesce(
+    select(CacheVersion.version).where(CacheVersion.entity == "product").scalar_subquery(), 0
+)
 
 class Product(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), index=True, nullable=False)
     description = Column(String(500), nullable=True)
     sku = Column(String(50), unique=True, index=True, nullable=False)
-    price = Column(Float, nullable=False)
-    category_id = Column(Integer, ForeignKey("category.id"), nullable=False)
-    created_at = Column(DateTime, default=current_timestamp())
+    price = Column(Float, index=True, nullable=False)
+    category_id = Column(Integer, ForeignKey("category.id"), nullable=False, index=True)
+    created_at = Column(DateTime, index=True, default=current_timestamp())
     updated_at = Column(DateTime, default=current_timestamp(), onupdate=current_timestamp())
     deleted_at = Column(DateTime, nullable=True)
+    # Set on every insert and update, so caches can read just the rows changed since a version
+    revision = Column(
+        BigInteger, nullable=False, default=_product_version, onupdate=_product_version, server_default="0"
+    )
     
     # Relationships
     category = relationship("Category", back_populates="products")
     inventory = relationship("Inventory", back_populates="product", uselist=False)
-    sales = relationship("Sale", back_populates="product") 
\ No newline at end of file
+    sales = relationship(
+        "Sale",
+        back_populates="product",
+        primaryjoin="and_(Product.id == foreign(Sale.product_id), Sale.product_archived == False)",
+    )
+    
+    # Reads filter deleted_at IS NULL (or IS NOT NULL), so the indexes they use carry it
+    __table_args__ = (
+        Index("ix_product_deleted_at_id", "deleted_at", "id"),
+        Index("ix_product_deleted_at_category_id", "deleted_at", "category_id", "id"),
+        # Backs crud.product.search_products; other databases use app.search.fulltext
+        Index("ix_product_fulltext", "name", "description", "sku", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+        # Change feed reads of app.cache.product_changes
+        Index("ix_product_revision", "revision"),
+    ) 
\ No newline at end of file
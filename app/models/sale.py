@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, String
+from sqlalchemy import Boolean, Column, Integer, Float, DateTime, Index, String, false, true
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.functions import current_timestamp
 
@@ -6,13 +6,36 @@ from app.db.base_class import Base
 
 class Sale(Base):
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    # No foreign key: sales outlive products archived by scripts/purge_deleted.py, and new
+    # sales get their category_id from a product that exists, or fail its NOT NULL
+    product_id = Column(Integer, nullable=False)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
     total_price = Column(Float, nullable=False)
     sale_date = Column(DateTime, nullable=False, default=current_timestamp())
     platform = Column(String(50), nullable=False, index=True)  # Amazon, Walmart, etc.
     order_id = Column(String(100), nullable=False, index=True)
+    # Copies of the product's category and of whether it is not soft deleted, kept
+    # in step by crud.product, so sales reads need no join to product
+    # No foreign key either, as the category may be archived
+    category_id = Column(Integer, nullable=False)
+    product_active = Column(Boolean, nullable=False, default=True, server_default=true())
+    # Set when the product is archived, after which product_id may be reused by a new
+    # product, so crud.product leaves these sales alone
+    product_archived = Column(Boolean, nullable=False, default=False, server_default=false())
     
     # Relationships
-    product = relationship("Product", back_populates="sales") 
\ No newline at end of file
+    # None once the product is archived
+    product = relationship(
+        "Product",
+        back_populates="sales",
+        primaryjoin="and_(foreign(Sale.product_id) == Product.id, Sale.product_archived == False)",
+    )
+    
+    __table_args__ = (
+        # Listings, date ranges and summaries of sales of active products, newest first
+        Index("ix_sale_product_active_sale_date", "product_active", "sale_date"),
+        Index("ix_sale_product_active_category_id_sale_date", "product_active", "category_id", "sale_date"),
+        # Per-product sales, newest first
+        Index("ix_sale_product_id_sale_date", "product_id", "sale_date"),
+    )
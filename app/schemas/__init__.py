@@ -1,4 +1,6 @@
-from app.schemas.category import Category, CategoryCreate, CategoryUpdate
-from app.schemas.product import Product, ProductCreate, ProductUpdate, ProductWithInventory
+from app.schemas.category import Category, CategoryCreate, CategoryUpdate, CategorySelection, CategoryBulkResult, CategoryOverview
+from app.schemas.product import Product, ProductCreate, ProductUpdate, ProductWithInventory, ProductSuggestion, ProductSearchResult, ProductPriceChange, ProductPriceChangeResult, ProductSelection, ProductBulkResult
 from app.schemas.inventory import Inventory, InventoryCreate, InventoryUpdate, InventoryRestock
-from app.schemas.sale import Sale, SaleCreate, SaleUpdate, SaleSummary, SaleByPeriod 
\ No newline at end of file
+from app.schemas.sale import Sale, SaleCreate, SaleUpdate, SaleSummary, SaleByPeriod, SaleByPlatform, SaleByCategory, SaleIngestLine, SaleIngestError, SaleIngestResult 
+from app.schemas.admin import StatementStat, StatementPlan, SlowQuery, RouteAllocations
+from app.schemas.catalog import CatalogRow, CatalogImportRow, CatalogImportResult
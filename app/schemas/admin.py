@@ -0,0 +1,43 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+# Aggregated statistics for one statement fingerprint
+class StatementStat(BaseModel):
+    fingerprint: str
+    query: str
+    calls: int
+    total_time_ms: float
+    mean_time_ms: float
+    min_time_ms: float
+    max_time_ms: float
+    rows: int
+    has_plan: bool
+
+# Captured EXPLAIN output for a slow statement
+class StatementPlan(BaseModel):
+    fingerprint: str
+    query: str
+    captured_at: str
+    duration_ms: float
+    plan: List[Dict[str, Any]]
+    error: Optional[str] = None
+
+# A single execution that crossed the slow query threshold
+class SlowQuery(BaseModel):
+    fingerprint: str
+    query: str
+    duration_ms: float
+    seen_at: str
+
+class AllocationSite(BaseModel):
+    site: str
+    mean_bytes: int
+
+# Allocation profile of sampled requests for one route
+class RouteAllocations(BaseModel):
+    route: str
+    samples: int
+    mean_peak_bytes: int
+    max_peak_bytes: int
+    live_bytes_by_category: Dict[str, int]
+    top_sites: List[AllocationSite]
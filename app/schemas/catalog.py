@@ -0,0 +1,25 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+# One product of a supplier catalog upload, keyed by SKU
+class CatalogRow(BaseModel):
+    sku: str = Field(..., min_length=1, max_length=50)
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = Field(None, max_length=500)
+    price: float = Field(..., gt=0)
+    category_id: int
+    # Inventory is left alone when quantity is omitted
+    quantity: Optional[int] = Field(None, ge=0)
+    low_stock_threshold: Optional[int] = Field(None, ge=1)
+
+class CatalogImportRow(BaseModel):
+    line: int
+    sku: Optional[str] = None
+    status: str  # 'created', 'updated' or 'error'
+    detail: Optional[str] = None
+
+class CatalogImportResult(BaseModel):
+    created: int
+    updated: int
+    errors: int
+    rows: List[CatalogImportRow]
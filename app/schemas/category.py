@@ -1,11 +1,12 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 # Shared properties
 class CategoryBase(BaseModel):
     name: str
     description: Optional[str] = None
+    parent_id: Optional[int] = None  # None for a top-level category
 
 # Properties to receive on category creation
 class CategoryCreate(CategoryBase):
@@ -18,6 +19,7 @@ class CategoryUpdate(CategoryBase):
 # Properties shared by models stored in DB
 class CategoryInDBBase(CategoryBase):
     id: int
+    level: int
     created_at: datetime
     updated_at: datetime
     deleted_at: Optional[datetime] = None
@@ -27,4 +29,27 @@ class CategoryInDBBase(CategoryBase):
 
 # Properties to return to client
 class Category(CategoryInDBBase):
-    pass 
\ No newline at end of file
+    pass 
+
+# Bulk soft delete and restore
+class CategorySelection(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+    # Also delete the categories' products, or restore those deleted with them
+    cascade: bool = False
+
+class CategoryBulkResult(BaseModel):
+    categories: int
+    products: int
+
+
+# Category with its catalog, stock and recent revenue totals
+class CategoryOverview(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    parent_id: Optional[int] = None
+    level: int
+    product_count: int
+    stock_units: int
+    low_stock_count: int
+    revenue_30d: float
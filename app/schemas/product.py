@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -40,6 +40,54 @@ class ProductInDBBase(ProductBase):
 class Product(ProductInDBBase):
     pass
 
+# Autocomplete suggestion
+class ProductSuggestion(BaseModel):
+    id: int
+    name: str
+    sku: str
+
+# Faceted search
+class CategoryFacet(BaseModel):
+    category_id: int
+    count: int
+
+class PriceBandFacet(BaseModel):
+    min_price: float
+    max_price: Optional[float] = None  # None for the open-ended top band
+    count: int
+
+class ProductFacets(BaseModel):
+    categories: List[CategoryFacet]
+    price_bands: List[PriceBandFacet]
+
+class ProductSearchResult(BaseModel):
+    total: int
+    items: List[Product]
+    facets: ProductFacets
+
+# Bulk price change
+class ProductPriceChange(BaseModel):
+    mode: str  # 'absolute', 'percent' or 'sku'
+    # New price for 'absolute', change in percent (e.g. -15) for 'percent'
+    value: Optional[float] = None
+    # Products repriced by 'absolute' and 'percent': a category and/or ids and SKUs
+    category_id: Optional[int] = None
+    ids: Optional[List[int]] = None
+    skus: Optional[List[str]] = None
+    # SKU -> new price, for 'sku'
+    prices: Optional[Dict[str, float]] = None
+
+class ProductPriceChangeResult(BaseModel):
+    updated: int
+
+# Bulk soft delete and restore: products among ids and/or in a category
+class ProductSelection(BaseModel):
+    ids: Optional[List[int]] = None
+    category_id: Optional[int] = None
+
+class ProductBulkResult(BaseModel):
+    products: int
+
 # Properties to return with inventory information
 class ProductWithInventory(Product):
     inventory_quantity: int
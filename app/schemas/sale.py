@@ -50,7 +50,30 @@ class SaleSummary(BaseModel):
     total_units_sold: int
     sales_by_platform: List[SaleByPlatform]
 
+class SaleByCategory(BaseModel):
+    category_name: str
+    sales_count: int
+    total_revenue: float
+
 class SaleByPeriod(BaseModel):
     period: str  # e.g. '2023-01', '2023-W01', '2023-01-01'
     sales_count: int
-    total_revenue: float 
\ No newline at end of file
+    total_revenue: float
+
+# Marketplace feed lines identify products by SKU
+class SaleIngestLine(BaseModel):
+    sku: str
+    quantity: int = Field(..., gt=0)
+    unit_price: Optional[float] = Field(None, gt=0)  # defaults to the product's price
+    platform: str
+    order_id: str
+    sale_date: Optional[datetime] = None
+
+class SaleIngestError(BaseModel):
+    line: int
+    sku: str
+    detail: str
+
+class SaleIngestResult(BaseModel):
+    created: int
+    errors: List[SaleIngestError]
\ No newline at end of file
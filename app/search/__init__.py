@@ -0,0 +1 @@
+"""Product search engines."""
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Prefix autocomplete over product names and SKUs.
+
+Each worker keeps every non-deleted product's normalized name and SKU in one
+sorted array, so a lookup is a binary search for the prefix followed by a walk
+over at most ``limit`` neighbouring entries, regardless of catalog size. The
+array is built in the background at startup (or by the first lookup, if that
+comes sooner) and kept current as described in ``app.search.base``.
+"""
+import bisect
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.search.base import ProductIndex
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase ``text`` and collapse runs of whitespace."""
+    return " ".join(text.lower().split()) if text else ""
+
+class PrefixIndex(ProductIndex):
+    columns = ("name", "sku")
+    state = ("_keys", "_ids", "_products")
+
+    def _reset(self) -> None:
+        # Parallel arrays sorted by key; a product appears once for its name and once for its sku
+        self._keys: List[str] = []
+        self._ids: List[int] = []
+        # product id -> (name, sku) as stored, for building suggestions
+        self._products: Dict[int, Tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def _fill(self, rows: Iterable[Any]) -> None:
+        entries = []
+        for row in rows:
+            self._products[row.id] = (row.name, row.sku)
+            entries.append((normalize(row.name), row.id))
+            entries.append((normalize(row.sku), row.id))
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._ids = [product_id for _, product_id in entries]
+
+    def _insert(self, key: str, product_id: int) -> None:
+        i = bisect.bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._ids.insert(i, product_id)
+
+    def _delete(self, key: str, product_id: int) -> None:
+        i = bisect.bisect_left(self._keys, key)
+        while i < len(self._keys) and self._keys[i] == key:
+            if self._ids[i] == product_id:
+                del self._keys[i]
+                del self._ids[i]
+                return
+            i += 1
+
+    def _put(self, product: Any) -> None:
+        previous = self._products.pop(product.id, None)
+        if previous is not None:
+            for text in previous:
+                self._delete(normalize(text), product.id)
+        if product.deleted_at is not None:
+            return
+        self._products[product.id] = (product.name, product.sku)
+        self._insert(normalize(product.name), product.id)
+        self._insert(normalize(product.sku), product.id)
+
+    def complete(self, db: Session, prefix: str, *, limit: int = 10) -> List[Tuple[int, str, str]]:
+        """
+        ``(id, name, sku)`` of up to ``limit`` products whose name or sku starts
+        with ``prefix``, in key order.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.ensure_loaded(db)
+        with self._lock:
+            keys = self._keys
+            i = bisect.bisect_left(keys, prefix)
+            seen: Dict[int, None] = {}
+            while i < len(keys) and len(seen) < limit and keys[i].startswith(prefix):
+                # A product whose name and sku both match is suggested once
+                seen.setdefault(self._ids[i])
+                i += 1
+            return [(product_id, *self._products[product_id]) for product_id in seen]
+
+autocomplete_index = PrefixIndex()
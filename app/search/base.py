@@ -0,0 +1,148 @@
+"""
+Shared lifecycle of the per-worker in-memory product indexes.
+
+An index is built from every non-deleted product into fresh structures while
+lookups keep using the current ones, then swapped in under the lookup lock, so
+no request waits on a build it did not need. ``warm`` runs the first build in
+a background thread at startup; a lookup arriving before it finishes waits for
+that build rather than starting another. Writes through ``crud.product`` in
+this worker update the index directly, and when another worker writes,
+``catch_up`` applies just the products changed since the revision the index
+is at, read from ``app.cache.product_changes``.
+"""
+import logging
+import threading
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.cache.product_changes import changed_since, current_revision
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+class ProductIndex:
+    # Product columns the index reads besides id and deleted_at
+    columns: Sequence[str] = ()
+    # Attributes holding the index structures, swapped in together by a build
+    state: Sequence[str] = ()
+
+    def __init__(self) -> None:
+        self._reset()
+        self._loaded = False
+        # Product revision every indexed product is at least as fresh as
+        self._revision = 0
+        # Moved by invalidate, so a build that raced it is discarded
+        self._generation = 0
+        # Ids indexed by this worker while catch_up reads changes, None otherwise
+        self._touched: Optional[Set[int]] = None
+        # Guards the structures; held by lookups and single-product updates only
+        self._lock = threading.RLock()
+        # One build or catch-up at a time
+        self._build_lock = threading.Lock()
+
+    def _reset(self) -> None:
+        """Set the structures in ``state`` to empty ones."""
+        raise NotImplementedError
+
+    def _fill(self, rows: Iterable[Any]) -> None:
+        """Add ``rows`` of non-deleted products to freshly reset structures."""
+        raise NotImplementedError
+
+    def _put(self, product: Any) -> None:
+        """Add, replace or (if deleted) remove one product; called with the lock held."""
+        raise NotImplementedError
+
+    def _select(self) -> List[Any]:
+        return [Product.id, *(getattr(Product, name) for name in self.columns)]
+
+    def _build(self, db: Session) -> None:
+        with self._lock:
+            generation = self._generation
+        # Read first, so products written during the build are caught up afterwards
+        revision = current_revision(db)
+        rows = db.execute(select(*self._select()).where(Product.deleted_at == None)).all()
+        fresh = object.__new__(type(self))
+        fresh._reset()
+        fresh._fill(rows)
+        with self._lock:
+            if generation != self._generation:
+                return
+            for name in self.state:
+                setattr(self, name, getattr(fresh, name))
+            self._revision = revision
+            self._loaded = True
+
+    def load(self, db: Session) -> None:
+        """Rebuild the index from every non-deleted product and swap it in."""
+        with self._build_lock:
+            self._build(db)
+        self.catch_up(db)
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Build the index unless it is built, waiting for a build already running."""
+        if self._loaded:
+            return
+        with self._build_lock:
+            if self._loaded:
+                return
+            self._build(db)
+        self.catch_up(db)
+
+    def catch_up(self, db: Session) -> None:
+        """Apply the products written since the index's revision, if it is built."""
+        with self._build_lock:
+            with self._lock:
+                if not self._loaded:
+                    return
+                since = self._revision
+                self._touched = set()
+            revision, rows = changed_since(db, since, *self._select(), Product.deleted_at)
+            with self._lock:
+                touched, self._touched = self._touched, None
+                if not self._loaded:
+                    return
+                for row in rows:
+                    if row.id in touched:
+                        # Indexed here while the changes were read; read it again next time
+                        revision = min(revision, row.revision - 1)
+                    else:
+                        self._put(row)
+                self._revision = revision
+
+    def warm(self, session_factory: Callable[[], Session]) -> threading.Thread:
+        """Build the index in a background thread."""
+        def run() -> None:
+            db = session_factory()
+            try:
+                self.ensure_loaded(db)
+            except Exception:
+                # Lookups build it on demand instead
+                logger.exception("Building %s failed", type(self).__name__)
+            finally:
+                db.close()
+
+        thread = threading.Thread(target=run, name=f"warm-{type(self).__name__}", daemon=True)
+        thread.start()
+        return thread
+
+    def invalidate(self) -> None:
+        """Drop the index; the next lookup rebuilds it."""
+        with self._lock:
+            self._generation += 1
+            self._reset()
+            self._loaded = False
+
+    def on_version_change(self, db: Session, entity: str) -> None:
+        """``VersionWatcher`` callback: another worker changed a product."""
+        self.catch_up(db)
+
+    def index(self, product: Product) -> None:
+        """Add, replace or (for deleted products) remove one product, if the index is built."""
+        with self._lock:
+            if not self._loaded:
+                return
+            if self._touched is not None:
+                self._touched.add(product.id)
+            self._put(product)
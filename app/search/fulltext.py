@@ -0,0 +1,156 @@
+"""
+Full-text product search over name, description and sku.
+
+On MySQL, ``search_products`` runs ``MATCH ... AGAINST`` in boolean mode on the
+``ix_product_fulltext`` FULLTEXT index. Other databases (SQLite in development
+and tests) have no equivalent, so each worker keeps an in-memory inverted index
+of non-deleted products instead. Both engines share the tokenizer and query
+semantics: every query term must match, each term matches as a word prefix,
+and results are ranked by relevance with product id breaking ties.
+
+The in-memory index is built in the background at startup (or by the first
+search, if that comes sooner) and kept current as described in
+``app.search.base``.
+"""
+import bisect
+import heapq
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.search.base import ProductIndex
+
+# Matches InnoDB's default innodb_ft_min_token_size, so both engines ignore the same short words
+MIN_TOKEN_LENGTH = 3
+
+# Relevance weight of one occurrence of a term in each field
+FIELD_WEIGHTS = {"name": 3.0, "sku": 2.0, "description": 1.0}
+
+# Term-frequency saturation, as in BM25
+_K1 = 1.2
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) >= MIN_TOKEN_LENGTH]
+
+def query_terms(query: str) -> List[str]:
+    """Distinct search terms of ``query``, in order."""
+    return list(dict.fromkeys(tokenize(query)))
+
+def boolean_query(terms: List[str]) -> str:
+    """MySQL boolean-mode query requiring every term as a word prefix."""
+    return " ".join(f"+{term}*" for term in terms)
+
+class InvertedIndex(ProductIndex):
+    columns = ("name", "description", "sku")
+    state = ("_postings", "_doc_terms", "_vocabulary")
+
+    def _reset(self) -> None:
+        # term -> {product id: saturated, field-weighted term frequency}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        # Sorted vocabulary for prefix expansion
+        self._vocabulary: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def _fill(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            self._add(row.id, row.name, row.description, row.sku)
+        self._vocabulary = sorted(self._postings)
+
+    def _add(self, product_id: int, name: Optional[str], description: Optional[str], sku: Optional[str]) -> List[str]:
+        frequencies: Dict[str, float] = {}
+        for field, text in (("name", name), ("description", description), ("sku", sku)):
+            weight = FIELD_WEIGHTS[field]
+            for term in tokenize(text):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+        new_terms = []
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                new_terms.append(term)
+            postings[product_id] = frequency * (_K1 + 1) / (frequency + _K1)
+        self._doc_terms[product_id] = tuple(frequencies)
+        return new_terms
+
+    def _discard(self, product_id: int) -> None:
+        for term in self._doc_terms.pop(product_id, ()):
+            postings = self._postings[term]
+            del postings[product_id]
+            if not postings:
+                del self._postings[term]
+                i = bisect.bisect_left(self._vocabulary, term)
+                if i < len(self._vocabulary) and self._vocabulary[i] == term:
+                    del self._vocabulary[i]
+
+    def _put(self, product: Any) -> None:
+        self._discard(product.id)
+        if product.deleted_at is not None:
+            return
+        for term in self._add(product.id, product.name, product.description, product.sku):
+            bisect.insort(self._vocabulary, term)
+
+    def _expand(self, prefix: str) -> List[str]:
+        vocabulary = self._vocabulary
+        i = bisect.bisect_left(vocabulary, prefix)
+        terms = []
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+            terms.append(vocabulary[i])
+            i += 1
+        return terms
+
+    def scores(self, db: Session, terms: List[str]) -> Dict[int, float]:
+        """Relevance of every product matching all of ``terms``."""
+        self.ensure_loaded(db)
+        with self._lock:
+            total = len(self._doc_terms)
+            expanded = []
+            for prefix in terms:
+                postings = [self._postings[term] for term in self._expand(prefix)]
+                if not postings:
+                    return {}
+                expanded.append(postings)
+            # Start from the rarest term so later terms only probe its candidates
+            expanded.sort(key=lambda lists: sum(len(p) for p in lists))
+            scores: Dict[int, float] = {}
+            for i, postings_lists in enumerate(expanded):
+                term_scores: Dict[int, float] = {}
+                for postings in postings_lists:
+                    idf = math.log(1 + total / len(postings))
+                    if i == 0:
+                        candidates = postings.items()
+                    elif len(scores) < len(postings):
+                        candidates = ((pid, postings[pid]) for pid in scores if pid in postings)
+                    else:
+                        candidates = ((pid, tf) for pid, tf in postings.items() if pid in scores)
+                    for product_id, tf in candidates:
+                        score = idf * tf
+                        # A prefix counts once per product, through its best expansion
+                        if score > term_scores.get(product_id, 0.0):
+                            term_scores[product_id] = score
+                if i == 0:
+                    scores = term_scores
+                else:
+                    scores = {pid: score + scores[pid] for pid, score in term_scores.items()}
+                if not scores:
+                    return {}
+            return scores
+
+    def search(self, db: Session, terms: List[str], *, skip: int = 0, limit: int = 100) -> List[int]:
+        """Ids of products matching every term, most relevant first."""
+        return rank(self.scores(db, terms), skip=skip, limit=limit)
+
+def rank(scores: Dict[int, float], *, skip: int = 0, limit: int = 100) -> List[int]:
+    """Page of ids from ``scores``, highest first, ties broken by id."""
+    top = heapq.nsmallest(skip + limit, scores.items(), key=lambda item: (-item[1], item[0]))
+    return [product_id for product_id, _ in top[skip:]]
+
+search_index = InvertedIndex()
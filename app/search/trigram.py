@@ -0,0 +1,132 @@
+"""
+Typo-tolerant product matching on trigrams of names and SKUs.
+
+Text is split into words and each word is padded as in PostgreSQL's pg_trgm
+(two spaces before, one after), so "kettle" yields "  k", " ke", "ket", ...,
+"le ". A product matches a query when it contains at least
+``SIMILARITY_THRESHOLD`` of the query's trigrams. Candidates come from the
+posting arrays of the query's trigrams alone, counted in C by ``Counter``, so
+no product outside those postings is ever looked at. Matches are ranked by
+the share of the query they cover, then by pg_trgm similarity so closer,
+shorter names come first, then by product id.
+
+Like the full-text index, each worker builds this index in the background at
+startup and keeps it current as described in ``app.search.base``. Postings and
+per-product trigram lists are ``array("i")`` of ids rather than sets, which
+keeps a million products in a few hundred megabytes. Removing a product from
+an array would mean scanning it, so removals are recorded as tombstones that
+searches subtract, and a posting is compacted once a quarter of it is dead.
+"""
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.search.base import ProductIndex
+
+# Share of the query's trigrams a product must contain to match
+SIMILARITY_THRESHOLD = 0.5
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """pg_trgm-style trigrams of ``text``."""
+    grams: Set[str] = set()
+    if not text:
+        return grams
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class TrigramIndex(ProductIndex):
+    columns = ("name", "sku")
+    state = ("_ids", "_postings", "_docs", "_removed")
+
+    def _reset(self) -> None:
+        self._ids: Dict[str, int] = {}
+        # trigram id -> product ids containing it
+        self._postings: List[array] = []
+        # product id -> trigram ids of its name and sku
+        self._docs: Dict[int, array] = {}
+        # trigram id -> product ids still in its posting array that no longer contain it
+        self._removed: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _fill(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            self._add(row.id, row.name, row.sku)
+
+    def _add(self, product_id: int, name: Optional[str], sku: Optional[str]) -> None:
+        gram_ids = array("i")
+        for gram in trigrams(name) | trigrams(sku):
+            gram_id = self._ids.get(gram)
+            if gram_id is None:
+                gram_id = self._ids[gram] = len(self._postings)
+                self._postings.append(array("i"))
+            removed = self._removed.get(gram_id)
+            if removed is not None and product_id in removed:
+                # Still in the posting array, so reviving it is enough
+                removed.discard(product_id)
+                if not removed:
+                    del self._removed[gram_id]
+            else:
+                self._postings[gram_id].append(product_id)
+            gram_ids.append(gram_id)
+        self._docs[product_id] = gram_ids
+
+    def _discard(self, product_id: int) -> None:
+        for gram_id in self._docs.pop(product_id, ()):
+            removed = self._removed.setdefault(gram_id, set())
+            removed.add(product_id)
+            postings = self._postings[gram_id]
+            if len(removed) * 4 >= len(postings):
+                # Trigram ids stay allocated, possibly with an empty posting array
+                self._postings[gram_id] = array("i", (p for p in postings if p not in removed))
+                del self._removed[gram_id]
+
+    def _put(self, product: Any) -> None:
+        self._discard(product.id)
+        if product.deleted_at is None:
+            self._add(product.id, product.name, product.sku)
+
+    def search(
+        self, db: Session, query: str, *, skip: int = 0, limit: int = 100,
+        threshold: float = SIMILARITY_THRESHOLD,
+    ) -> List[int]:
+        """Ids of products similar to ``query``, most similar first."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        required = math.ceil(threshold * len(grams))
+        self.ensure_loaded(db)
+        with self._lock:
+            # Trigrams no product has still count against the query's coverage
+            known = [self._ids[gram] for gram in grams if gram in self._ids]
+            if len(known) < required:
+                return []
+            shared: Counter = Counter()
+            for gram_id in known:
+                shared.update(self._postings[gram_id])
+                removed = self._removed.get(gram_id)
+                if removed:
+                    shared.subtract(removed)
+            matches = [
+                (count, len(self._docs[product_id]), product_id)
+                for product_id, count in shared.items() if count >= required
+            ]
+        size = len(grams)
+        top = heapq.nsmallest(
+            skip + limit, matches,
+            # Coverage of the query, then similarity = shared / |query ∪ product|
+            key=lambda m: (-m[0], -m[0] / (size + m[1] - m[0]), m[2]),
+        )
+        return [product_id for _, _, product_id in top[skip:]]
+
+trigram_index = TrigramIndex()
@@ -0,0 +1,33 @@
+"""Add FULLTEXT index on product name, description and sku
+
+Revision ID: 8e3b6f0d2c15
+Revises: 5d2f8c1e9a47
+Create Date: 2026-10-19 11:02:17.284409
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3b6f0d2c15'
+down_revision: Union[str, None] = '5d2f8c1e9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FULLTEXT is MySQL-only; other databases search with the in-process index
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.create_index('ix_product_fulltext', 'product', ['name', 'description', 'sku'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.drop_index('ix_product_fulltext', table_name='product')
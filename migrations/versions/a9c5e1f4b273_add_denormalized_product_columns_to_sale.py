@@ -0,0 +1,48 @@
+"""Add denormalized product columns to sale
+
+Revision ID: a9c5e1f4b273
+Revises: f3b8c2d7a914
+Create Date: 2026-10-19 21:07:44.913582
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c5e1f4b273'
+down_revision: Union[str, None] = 'f3b8c2d7a914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sale', sa.Column('category_id', sa.Integer(), nullable=True))
+    op.add_column('sale', sa.Column('product_active', sa.Boolean(), nullable=False, server_default=sa.true()))
+    # Copy each sale's product category and state; crud.product keeps them in step from here on
+    op.execute(
+        'UPDATE sale SET '
+        'category_id = (SELECT product.category_id FROM product WHERE product.id = sale.product_id), '
+        'product_active = (SELECT product.deleted_at IS NULL FROM product WHERE product.id = sale.product_id)'
+    )
+    op.alter_column('sale', 'category_id', existing_type=sa.Integer(), nullable=False)
+    op.create_foreign_key('fk_sale_category_id_category', 'sale', 'category', ['category_id'], ['id'])
+    op.create_index('ix_sale_product_active_sale_date', 'sale', ['product_active', 'sale_date'], unique=False)
+    op.create_index(
+        'ix_sale_product_active_category_id_sale_date', 'sale', ['product_active', 'category_id', 'sale_date'],
+        unique=False,
+    )
+    op.create_index('ix_sale_product_id_sale_date', 'sale', ['product_id', 'sale_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sale_product_id_sale_date', table_name='sale')
+    op.drop_index('ix_sale_product_active_category_id_sale_date', table_name='sale')
+    op.drop_index('ix_sale_product_active_sale_date', table_name='sale')
+    op.drop_constraint('fk_sale_category_id_category', 'sale', type_='foreignkey')
+    op.drop_column('sale', 'product_active')
+    op.drop_column('sale', 'category_id')
@@ -0,0 +1,77 @@
+"""Add archive tables for purged soft-deleted rows
+
+Revision ID: b6e2d8f3c517
+Revises: a9c5e1f4b273
+Create Date: 2026-10-19 22:18:36.402719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d8f3c517'
+down_revision: Union[str, None] = 'a9c5e1f4b273'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_archive',
+    sa.Column('archive_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.String(length=500), nullable=True),
+    sa.Column('sku', sa.String(length=50), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('archive_id')
+    )
+    op.create_index(op.f('ix_product_archive_sku'), 'product_archive', ['sku'], unique=False)
+    op.create_index('ix_product_archive_deleted_at_id', 'product_archive', ['deleted_at', 'id'], unique=False)
+    op.create_table('inventory_archive',
+    sa.Column('archive_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('low_stock_threshold', sa.Integer(), nullable=False),
+    sa.Column('last_restock_date', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('archive_id')
+    )
+    op.create_index(op.f('ix_inventory_archive_product_id'), 'inventory_archive', ['product_id'], unique=False)
+    op.create_table('category_archive',
+    sa.Column('archive_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('level', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('archive_id')
+    )
+    op.create_index(op.f('ix_category_archive_name'), 'category_archive', ['name'], unique=False)
+    op.create_index('ix_category_archive_deleted_at_id', 'category_archive', ['deleted_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_category_archive_deleted_at_id', table_name='category_archive')
+    op.drop_index(op.f('ix_category_archive_name'), table_name='category_archive')
+    op.drop_table('category_archive')
+    op.drop_index(op.f('ix_inventory_archive_product_id'), table_name='inventory_archive')
+    op.drop_table('inventory_archive')
+    op.drop_index('ix_product_archive_deleted_at_id', table_name='product_archive')
+    op.drop_index(op.f('ix_product_archive_sku'), table_name='product_archive')
+    op.drop_table('product_archive')
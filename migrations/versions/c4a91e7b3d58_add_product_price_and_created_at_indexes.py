@@ -0,0 +1,31 @@
+"""Add product price and created_at indexes
+
+Revision ID: c4a91e7b3d58
+Revises: 8e3b6f0d2c15
+Create Date: 2026-10-19 14:36:51.602318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a91e7b3d58'
+down_revision: Union[str, None] = '8e3b6f0d2c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Back the price range filter and the price / newest sorts of faceted search
+    op.create_index(op.f('ix_product_price'), 'product', ['price'], unique=False)
+    op.create_index(op.f('ix_product_created_at'), 'product', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_product_created_at'), table_name='product')
+    op.drop_index(op.f('ix_product_price'), table_name='product')
@@ -0,0 +1,31 @@
+"""Add product revision for cache change feeds
+
+Revision ID: d8a4f1c6e293
+Revises: b6e2d8f3c517
+Create Date: 2026-10-19 23:41:07.518264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a4f1c6e293'
+down_revision: Union[str, None] = 'b6e2d8f3c517'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows start at 0, older than every version a cache can have seen
+    op.add_column('product', sa.Column('revision', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index('ix_product_revision', 'product', ['revision'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_revision', table_name='product')
+    op.drop_column('product', 'revision')
@@ -0,0 +1,53 @@
+"""Add category tree and closure table
+
+Revision ID: e7d2a4c91b06
+Revises: c4a91e7b3d58
+Create Date: 2026-10-19 18:02:37.419263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7d2a4c91b06'
+down_revision: Union[str, None] = 'c4a91e7b3d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('category', sa.Column('parent_id', sa.Integer(), nullable=True))
+    op.add_column('category', sa.Column('level', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index(op.f('ix_category_parent_id'), 'category', ['parent_id'], unique=False)
+    op.create_foreign_key('fk_category_parent_id_category', 'category', 'category', ['parent_id'], ['id'])
+    op.create_table('category_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['category.id'], ),
+    sa.ForeignKeyConstraint(['descendant_id'], ['category.id'], ),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_category_closure_descendant_depth', 'category_closure', ['descendant_id', 'depth'], unique=False)
+    # Subtree listings join the closure table to product.category_id
+    op.create_index(op.f('ix_product_category_id'), 'product', ['category_id'], unique=False)
+    # Existing categories are all top-level: each is only its own ancestor
+    op.execute(
+        'INSERT INTO category_closure (ancestor_id, descendant_id, depth) '
+        'SELECT id, id, 0 FROM category'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_product_category_id'), table_name='product')
+    op.drop_index('ix_category_closure_descendant_depth', table_name='category_closure')
+    op.drop_table('category_closure')
+    op.drop_constraint('fk_category_parent_id_category', 'category', type_='foreignkey')
+    op.drop_index(op.f('ix_category_parent_id'), table_name='category')
+    op.drop_column('category', 'level')
+    op.drop_column('category', 'parent_id')
@@ -0,0 +1,35 @@
+"""Drop sale foreign keys and flag sales of archived products
+
+Revision ID: f1c7b9e4a285
+Revises: d8a4f1c6e293
+Create Date: 2026-10-19 23:56:14.370829
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c7b9e4a285'
+down_revision: Union[str, None] = 'd8a4f1c6e293'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The product_id key came with the initial schema under a server-generated name
+    for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys('sale'):
+        if foreign_key['constrained_columns'] in (['product_id'], ['category_id']):
+            op.drop_constraint(foreign_key['name'], 'sale', type_='foreignkey')
+    op.add_column('sale', sa.Column('product_archived', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sale', 'product_archived')
+    # Fails while sales reference archived products or categories
+    op.create_foreign_key('fk_sale_category_id_category', 'sale', 'category', ['category_id'], ['id'])
+    op.create_foreign_key('fk_sale_product_id_product', 'sale', 'product', ['product_id'], ['id'])
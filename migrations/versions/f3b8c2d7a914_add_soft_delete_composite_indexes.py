@@ -0,0 +1,38 @@
+"""Add soft delete composite indexes
+
+Revision ID: f3b8c2d7a914
+Revises: e7d2a4c91b06
+Create Date: 2026-10-19 19:41:08.275146
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8c2d7a914'
+down_revision: Union[str, None] = 'e7d2a4c91b06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Active (deleted_at IS NULL) and trash (IS NOT NULL) reads seek on deleted_at first
+    op.create_index('ix_product_deleted_at_id', 'product', ['deleted_at', 'id'], unique=False)
+    op.create_index('ix_product_deleted_at_category_id', 'product', ['deleted_at', 'category_id', 'id'], unique=False)
+    op.create_index('ix_category_deleted_at_id', 'category', ['deleted_at', 'id'], unique=False)
+    # Still leads with parent_id, so it keeps backing the foreign key on MySQL
+    op.create_index('ix_category_parent_id_deleted_at', 'category', ['parent_id', 'deleted_at'], unique=False)
+    op.drop_index(op.f('ix_category_parent_id'), table_name='category')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_category_parent_id'), 'category', ['parent_id'], unique=False)
+    op.drop_index('ix_category_parent_id_deleted_at', table_name='category')
+    op.drop_index('ix_category_deleted_at_id', table_name='category')
+    op.drop_index('ix_product_deleted_at_category_id', table_name='product')
+    op.drop_index('ix_product_deleted_at_id', table_name='product')
@@ -0,0 +1,57 @@
+"""
+Compare ILIKE prefix lookups against the in-process autocomplete index.
+
+The ILIKE variant is what the product picker did before, calling
+``/products/search/`` on each keystroke. The index variant is
+``crud.product.autocomplete``. The one-off index build is reported separately.
+Run from the repository root:
+
+    python scripts/benchmarks/bench_autocomplete.py --rows 1000000
+"""
+import argparse
+import time
+
+from common import make_sessionmaker, measure, report, seed
+
+from app import crud
+from app.models.product import Product
+from app.search.autocomplete import autocomplete_index
+
+# Keystrokes of a name, a SKU prefix, and a prefix matching nothing
+PREFIXES = ["w", "wirel", "wireless pro", "SKU-0001", "zeppelin"]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, products=args.rows)
+
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        autocomplete_index.load(db)
+        print(f"index build: {time.perf_counter() - start:.2f}s for {len(autocomplete_index)} products")
+
+    for prefix in PREFIXES:
+        def ilike():
+            with SessionLocal() as db:
+                return db.query(Product).filter(
+                    Product.name.ilike(f"%{prefix}%"),
+                    Product.deleted_at == None
+                ).offset(0).limit(args.limit).all()
+
+        def index():
+            with SessionLocal() as db:
+                return crud.product.autocomplete(db, prefix=prefix, limit=args.limit)
+
+        report(f"autocomplete {prefix!r}, rows={args.rows}, limit={args.limit}", {
+            "ILIKE '%q%'": measure(ilike, repeat=args.repeat),
+            "sorted index": measure(index, repeat=args.repeat),
+        })
+
+if __name__ == "__main__":
+    main()
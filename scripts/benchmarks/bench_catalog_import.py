@@ -0,0 +1,64 @@
+"""
+Compare the streaming catalog import against creating products one by one.
+
+The per-row variant is what onboarding a supplier took before: for every row
+a SKU check, ``crud.product.create`` and ``crud.inventory.create``, each with
+its own commit and refresh. The import variant runs
+``app.imports.catalog.import_catalog`` over the same rows as CSV, first
+creating them and then updating them all. Run from the repository root:
+
+    python scripts/benchmarks/bench_catalog_import.py --rows 50000
+"""
+import argparse
+import io
+import time
+
+from common import make_sessionmaker, seed
+
+from app import crud, schemas
+from app.cache.category import category_cache
+from app.imports import catalog
+
+def catalog_csv(rows: int, *, price: float) -> str:
+    out = io.StringIO()
+    out.write("sku,name,description,price,category_id,quantity,low_stock_threshold\n")
+    for i in range(rows):
+        out.write(f"IMP-{i:08d},Imported Product {i},Supplier item {i},{price},{i % 20 + 1},{i % 100},5\n")
+    return out.getvalue()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--per-row-rows", type=int, default=2000, help="rows for the slow per-row variant")
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, products=0)
+        category_cache.load(db)
+
+        start = time.perf_counter()
+        for i in range(args.per_row_rows):
+            sku = f"ONE-{i:08d}"
+            if crud.product.get_by_sku(db, sku=sku):
+                continue
+            product = crud.product.create(db, obj_in=schemas.ProductCreate(
+                name=f"Imported Product {i}", description=f"Supplier item {i}", sku=sku,
+                price=9.99, category_id=i % 20 + 1,
+            ))
+            crud.inventory.create(db, obj_in=schemas.InventoryCreate(
+                product_id=product.id, quantity=i % 100, low_stock_threshold=5,
+            ))
+        per_row = args.per_row_rows / (time.perf_counter() - start)
+        print(f"per-row create: {per_row:,.0f} rows/s ({args.per_row_rows} rows)")
+
+        for label, price in (("import, all new", 9.99), ("import, all existing", 11.49)):
+            text = catalog_csv(args.rows, price=price)
+            start = time.perf_counter()
+            result = catalog.import_catalog(db, io.StringIO(text, newline=""), "csv")
+            rate = args.rows / (time.perf_counter() - start)
+            print(f"{label}: {rate:,.0f} rows/s ({result['created']} created, "
+                  f"{result['updated']} updated, {result['errors']} errors), {rate / per_row:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare the one-statement category overview against queries per category.
+
+The per-category variant is the cheapest form of what the admin page did by
+calling /products/category/{id} for every category: list the categories, then
+count products, sum stock and low-stock items, and sum recent revenue with
+one aggregate query each per category. The overview variant runs
+``crud.category.get_overview``. Run from the repository root:
+
+    python scripts/benchmarks/bench_category_overview.py --rows 100000 --categories 100
+"""
+import argparse
+import datetime
+
+from sqlalchemy import case, func, select
+
+from common import make_sessionmaker, measure, report, seed
+
+from app import crud
+from app.crud.crud_category import OVERVIEW_REVENUE_DAYS
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+
+def per_category(db, today):
+    since = datetime.datetime.combine(today - datetime.timedelta(days=OVERVIEW_REVENUE_DAYS - 1), datetime.time.min)
+    overview = []
+    for category in crud.category.get_multi(db, limit=None):
+        active = (Product.category_id == category.id, Product.deleted_at == None)
+        product_count = db.scalar(select(func.count(Product.id)).where(*active))
+        stock_units, low_stock_count = db.execute(
+            select(
+                func.coalesce(func.sum(Inventory.quantity), 0),
+                func.coalesce(func.sum(case((Inventory.quantity <= Inventory.low_stock_threshold, 1), else_=0)), 0),
+            ).join(Product, Inventory.product_id == Product.id).where(*active)
+        ).one()
+        revenue = db.scalar(
+            select(func.coalesce(func.sum(Sale.total_price), 0.0))
+            .join(Product, Sale.product_id == Product.id)
+            .where(*active, Sale.sale_date >= since)
+        )
+        overview.append({
+            "id": category.id, "name": category.name, "description": category.description,
+            "parent_id": category.parent_id, "level": category.level,
+            "product_count": product_count, "stock_units": stock_units,
+            "low_stock_count": low_stock_count, "revenue_30d": round(float(revenue), 2),
+        })
+    return overview
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000, help="products, and as many sales")
+    parser.add_argument("--categories", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, categories=args.categories, products=args.rows, sales=args.rows)
+        today = datetime.datetime.utcnow().date()
+        overview = crud.category.get_overview(db, today=today, limit=None)
+        assert overview == per_category(db, today), "both variants must agree"
+        report(f"{args.categories} categories, {args.rows} products and sales", {
+            "query per category": measure(lambda: per_category(db, today), repeat=args.repeat),
+            "get_overview": measure(lambda: crud.category.get_overview(db, today=today, limit=None), repeat=args.repeat),
+        })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare faceted search against counting each facet value with its own query.
+
+The per-facet variant runs one COUNT per category and per price band, plus
+the page query, which is what combining the existing filtered listings would
+take. The grouped variant is ``crud.product.faceted_search``. Run from the
+repository root:
+
+    python scripts/benchmarks/bench_faceted_search.py --rows 1000000
+"""
+import argparse
+
+from common import make_sessionmaker, measure, report, seed
+
+from sqlalchemy import func, select
+
+from app import crud
+from app.crud.crud_product import PRICE_BANDS
+from app.models.category import Category
+from app.models.product import Product
+from app.search.fulltext import search_index
+
+# No text, a common word, and a word with a price range
+CASES = [
+    {},
+    {"query": "speaker"},
+    {"query": "wireless", "min_price": 50, "max_price": 250},
+]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, products=args.rows)
+    with SessionLocal() as db:
+        search_index.load(db)
+
+    for case in CASES:
+        def per_facet():
+            with SessionLocal() as db:
+                conditions = [Product.deleted_at == None]
+                if case.get("query"):
+                    conditions.append(Product.name.ilike(f"%{case['query']}%"))
+                if case.get("min_price") is not None:
+                    conditions.append(Product.price >= case["min_price"])
+                if case.get("max_price") is not None:
+                    conditions.append(Product.price <= case["max_price"])
+                count = select(func.count()).select_from(Product).where(*conditions)
+                for category_id in db.scalars(select(Category.id)).all():
+                    db.scalar(count.where(Product.category_id == category_id))
+                bounds = list(PRICE_BANDS[1:]) + [None]
+                for lower, upper in zip(PRICE_BANDS, bounds):
+                    band = count.where(Product.price >= lower)
+                    db.scalar(band if upper is None else band.where(Product.price < upper))
+                return db.scalars(
+                    select(Product).where(*conditions).order_by(Product.price).limit(args.limit)
+                ).all()
+
+        def grouped():
+            with SessionLocal() as db:
+                return crud.product.faceted_search(db, sort="price_asc", limit=args.limit, **case)
+
+        report(f"facets {case}, rows={args.rows}, limit={args.limit}", {
+            "query per facet": measure(per_facet, repeat=args.repeat),
+            "one grouped query": measure(grouped, repeat=args.repeat),
+        })
+
+if __name__ == "__main__":
+    main()
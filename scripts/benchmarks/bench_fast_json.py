@@ -0,0 +1,60 @@
+"""
+Measure /sales/ and /products/ end to end with and without FAST_JSON_RESPONSES.
+
+Requests go through the real FastAPI app with the database dependency pointed
+at a seeded in-memory SQLite database. Run from the repository root:
+
+    python scripts/benchmarks/bench_fast_json.py --rows 10000
+"""
+import argparse
+
+from common import make_sessionmaker, measure, report, seed
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.main import app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, products=args.rows, sales=args.rows)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    for path in ["/api/v1/sales/", "/api/v1/products/"]:
+        url = f"{path}?limit={args.rows}"
+
+        def fetch():
+            response = client.get(url)
+            assert response.status_code == 200
+            return response.content
+
+        settings.FAST_JSON_RESPONSES = False
+        validated = fetch()
+        before = measure(fetch, repeat=args.repeat)
+        settings.FAST_JSON_RESPONSES = True
+        fast = fetch()
+        after = measure(fetch, repeat=args.repeat)
+        assert validated == fast, "fast path must produce identical bytes"
+        report(f"GET {url} ({len(fast) / 1024:.0f} KiB)", {
+            "response_model + json": before,
+            "TypeAdapter dump_json": after,
+        })
+
+if __name__ == "__main__":
+    main()
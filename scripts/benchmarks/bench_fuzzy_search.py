@@ -0,0 +1,68 @@
+"""
+Measure trigram fuzzy search against a scan computing similarity per product.
+
+The scan variant is the index-free alternative: read every product name and
+SKU and score it in Python. The index variant is
+``crud.product.search_similar``, including fetching the matched page of
+products. Run at several sizes to see how each scales. Run from the repository
+root:
+
+    python scripts/benchmarks/bench_fuzzy_search.py --rows 100000 1000000
+"""
+import argparse
+import heapq
+import time
+
+from common import make_sessionmaker, measure, report, seed
+
+from app import crud
+from app.models.product import Product
+from app.search.trigram import SIMILARITY_THRESHOLD, trigram_index, trigrams
+
+# Misspelt common word, misspelt rare name, misspelt SKU
+QUERIES = ["wireles speker", "zepelin", "SKU-0001234"]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        SessionLocal = make_sessionmaker()
+        with SessionLocal() as db:
+            seed(db, products=rows)
+            db.add(Product(name="Zeppelin Model Kit", sku="RARE-1", price=10.0, category_id=1))
+            db.commit()
+
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            trigram_index.load(db)
+            print(f"index build: {time.perf_counter() - start:.2f}s for {len(trigram_index)} products")
+
+        for query in QUERIES:
+            grams = trigrams(query)
+
+            def scan():
+                with SessionLocal() as db:
+                    scored = []
+                    for id, name, sku in db.query(Product.id, Product.name, Product.sku).filter(
+                        Product.deleted_at == None
+                    ):
+                        shared = len(grams & (trigrams(name) | trigrams(sku)))
+                        if shared >= SIMILARITY_THRESHOLD * len(grams):
+                            scored.append((-shared, id))
+                    return heapq.nsmallest(args.limit, scored)
+
+            def index():
+                with SessionLocal() as db:
+                    return crud.product.search_similar(db, query=query, limit=args.limit)
+
+            report(f"fuzzy {query!r}, rows={rows}, limit={args.limit}", {
+                "scan + score": measure(scan, repeat=args.repeat),
+                "trigram index": measure(index, repeat=args.repeat),
+            })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare ORM hydration against projection-mode rows for list endpoints.
+
+Each variant runs the same pipeline FastAPI applies to a list endpoint:
+fetch, validate against the response model, dump to JSON-compatible data and
+encode. Run from the repository root:
+
+    python scripts/benchmarks/bench_list_projection.py --rows 10000
+"""
+import argparse
+import json
+from typing import List
+
+from common import make_sessionmaker, measure, report, seed
+
+from pydantic import TypeAdapter
+
+from app import crud, schemas
+from app.api.api_v1.endpoints.products import PRODUCT_ROWS
+from app.api.api_v1.endpoints.sales import SALE_ROWS
+
+def pipeline(fetch, adapter: TypeAdapter, *, from_attributes: bool):
+    def run():
+        items = fetch()
+        models = adapter.validate_python(items, from_attributes=from_attributes)
+        return json.dumps(adapter.dump_python(models, mode="json")).encode()
+    return run
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, products=args.rows, sales=args.rows)
+
+    for name, crud_obj, schema, columns in [
+        ("/products/", crud.product, schemas.Product, PRODUCT_ROWS.columns),
+        ("/sales/", crud.sale, schemas.Sale, SALE_ROWS.columns),
+    ]:
+        adapter = TypeAdapter(List[schema])
+
+        def orm():
+            with SessionLocal() as db:
+                return crud_obj.get_multi(db, limit=args.rows)
+
+        def rows():
+            with SessionLocal() as db:
+                return [dict(zip(columns, r)) for r in crud_obj.get_multi_rows(db, columns=columns, limit=args.rows)]
+
+        report(f"{name} limit={args.rows}, fetch only", {
+            "ORM get_multi": measure(orm, repeat=args.repeat),
+            "projection get_multi_rows": measure(rows, repeat=args.repeat),
+        })
+        report(f"{name} limit={args.rows}, fetch + validate + encode", {
+            "ORM get_multi": measure(pipeline(orm, adapter, from_attributes=True), repeat=args.repeat),
+            "projection get_multi_rows": measure(pipeline(rows, adapter, from_attributes=False), repeat=args.repeat),
+        })
+
+if __name__ == "__main__":
+    main()
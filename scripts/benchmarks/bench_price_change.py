@@ -0,0 +1,53 @@
+"""
+Compare the bulk price change against repricing products one by one.
+
+The per-product variant is what a promotion took before: for every product a
+``crud.product.get`` and ``crud.product.update``, each update with its own
+commit and refresh, as ``PUT /products/{id}`` does. The bulk variants run
+``crud.product.change_prices`` over a whole category, an id list and a per-SKU
+price list. Run from the repository root:
+
+    python scripts/benchmarks/bench_price_change.py --rows 100000
+"""
+import argparse
+import time
+
+from sqlalchemy import func, select
+
+from common import make_sessionmaker, seed
+
+from app import crud, schemas
+from app.models.product import Product
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--per-product-rows", type=int, default=1000, help="products for the slow per-product variant")
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, products=args.rows)
+
+        start = time.perf_counter()
+        for id in range(1, args.per_product_rows + 1):
+            product = crud.product.get(db, id=id)
+            crud.product.update(db, db_obj=product, obj_in=schemas.ProductUpdate(price=round(product.price * 0.9, 2)))
+        per_product = args.per_product_rows / (time.perf_counter() - start)
+        print(f"per-product update: {per_product:,.0f} products/s ({args.per_product_rows} products)")
+
+        in_category = db.scalar(select(func.count()).where(Product.category_id == 1))
+        ids = list(range(1, args.rows + 1, 2))
+        prices = {f"SKU-{i:08d}": 9.99 for i in range(2, args.rows + 1, 2)}
+        for label, kwargs, size in (
+            ("percent, one category", {"mode": "percent", "value": -10, "category_id": 1}, in_category),
+            ("absolute, id list", {"mode": "absolute", "value": 19.99, "ids": ids}, len(ids)),
+            ("per-SKU prices", {"mode": "sku", "prices": prices}, len(prices)),
+        ):
+            start = time.perf_counter()
+            updated = crud.product.change_prices(db, **kwargs)
+            rate = size / (time.perf_counter() - start)
+            print(f"{label}: {rate:,.0f} products/s ({updated} updated), {rate / per_product:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare sales analytics joined through product with the denormalized columns.
+
+The joined variant is how sales reads excluded deleted products and found
+categories before sale rows carried them: every query joins ``product`` to
+check ``deleted_at``, and the category breakdown joins ``category`` as well.
+The denormalized variant runs the ``crud.sale`` methods, which read
+``sale.product_active`` and ``sale.category_id`` instead. A tenth of the
+products are soft deleted first so the filter has work to do. Run from the
+repository root:
+
+    python scripts/benchmarks/bench_sales_analytics.py --sales 200000
+"""
+import argparse
+
+from sqlalchemy import func
+
+from common import make_sessionmaker, measure, report, seed
+
+from app import crud
+from app.models.category import Category
+from app.models.product import Product
+from app.models.sale import Sale
+
+def joined(db):
+    active = db.query(Sale).join(Product, Sale.product_id == Product.id).filter(Product.deleted_at == None)
+    summary = active.with_entities(func.count(Sale.id), func.sum(Sale.total_price)).one()
+    by_platform = active.with_entities(
+        Sale.platform, func.count(Sale.id), func.sum(Sale.total_price)
+    ).group_by(Sale.platform).all()
+    by_category = active.join(Category, Product.category_id == Category.id).with_entities(
+        Category.name, func.count(Sale.id), func.sum(Sale.total_price)
+    ).group_by(Category.name).all()
+    return summary, by_platform, by_category
+
+def denormalized(db):
+    return (
+        crud.sale.get_sales_summary(db),
+        crud.sale.get_sales_by_platform(db),
+        crud.sale.get_sales_by_category(db),
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sales", type=int, default=200000)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, categories=50, products=args.products, sales=args.sales)
+        crud.product.remove_many(db, ids=range(1, args.products + 1, 10))
+        summary, by_platform, by_category = joined(db)
+        new_summary, _, new_by_category = denormalized(db)
+        assert new_summary["total_sales"] == summary[0], "both variants must agree"
+        assert sorted((r["category_name"], r["sales_count"]) for r in new_by_category) == sorted(
+            (name, count) for name, count, _ in by_category
+        ), "both variants must agree"
+        report(f"{args.sales} sales of {args.products} products, a tenth deleted", {
+            "joined through product": measure(lambda: joined(db), repeat=args.repeat),
+            "denormalized columns": measure(lambda: denormalized(db), repeat=args.repeat),
+        })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare the old ILIKE product search against the in-process full-text index.
+
+The ILIKE variant is the previous ``search_products`` query, which scans every
+product name. The index variant is the non-MySQL path of the current
+``search_products``, including fetching the matched page of products. The
+one-off index build is reported separately. The MySQL FULLTEXT path needs a
+MySQL server and is not covered. Run from the repository root:
+
+    python scripts/benchmarks/bench_search.py --rows 1000000
+"""
+import argparse
+import time
+
+from common import make_sessionmaker, measure, report, seed
+
+from app import crud
+from app.models.product import Product
+from app.search.fulltext import search_index
+
+# Common word, two words, word prefix, exact SKU, and a term matching nothing
+QUERIES = ["speaker", "wireless pro", "kett", "SKU-00012345", "zeppelin"]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, products=args.rows)
+
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        search_index.load(db)
+        print(f"index build: {time.perf_counter() - start:.2f}s for {len(search_index)} products")
+
+    for query in QUERIES:
+        def ilike():
+            with SessionLocal() as db:
+                return db.query(Product).filter(
+                    Product.name.ilike(f"%{query}%"),
+                    Product.deleted_at == None
+                ).offset(0).limit(args.limit).all()
+
+        def fulltext():
+            with SessionLocal() as db:
+                return crud.product.search_products(db, query=query, limit=args.limit)
+
+        report(f"search {query!r}, rows={args.rows}, limit={args.limit}", {
+            "ILIKE '%q%'": measure(ilike, repeat=args.repeat),
+            "inverted index": measure(fulltext, repeat=args.repeat),
+        })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Count database round trips of DELETE /products/{id} and PUT /products/restore/{id}.
+
+Requests go through the real FastAPI app with the database dependency pointed
+at a seeded in-memory SQLite database, and every statement and commit the
+engine sees is counted. The "before" variant replays what the endpoints did
+until now inside the same app: an endpoint ``get``, then ``get``, UPDATE,
+version bump, commit and a second ``get`` in the CRUD method. "RETURNING"
+is the current path on SQLite and PostgreSQL; "no RETURNING" is the same
+path with the dialect's UPDATE ... RETURNING support switched off, as on
+MySQL. Run from the repository root:
+
+    python scripts/benchmarks/bench_soft_delete.py --requests 500
+"""
+import argparse
+import datetime
+import time
+from collections import Counter
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from common import make_sessionmaker, seed
+
+from app import crud
+from app.db.session import get_db
+from app.main import app
+
+def legacy_set_deleted_at(db, id, deleted_at):
+    # The removed CRUDProduct.remove / restore, after the endpoint's own lookup
+    product = crud.product.get(db, id=id)
+    if not product or (product.deleted_at is None) == (deleted_at is None):
+        return None
+    obj = db.get(crud.product.model, id)
+    current_updated_at = obj.updated_at
+    db.query(crud.product.model).filter(crud.product.model.id == id).update(
+        {"deleted_at": deleted_at, "updated_at": current_updated_at},
+        synchronize_session=False,
+    )
+    crud.product._bump_version(db)
+    db.commit()
+    return db.get(crud.product.model, id)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    SessionLocal = make_sessionmaker()
+    with SessionLocal() as db:
+        seed(db, products=args.requests)
+    engine = SessionLocal.kw["bind"]
+    counts: Counter = Counter()
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *rest: counts.update([statement.split()[0]]))
+    event.listen(engine, "commit", lambda conn: counts.update(["COMMIT"]))
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    original_remove, original_restore = crud.product.remove, crud.product.restore
+
+    for label in ("before", "RETURNING", "no RETURNING"):
+        engine.dialect.update_returning = label == "RETURNING"
+        if label == "before":
+            crud.product.remove = lambda db, *, id: legacy_set_deleted_at(db, id, datetime.datetime.now())
+            crud.product.restore = lambda db, *, id: legacy_set_deleted_at(db, id, None)
+        else:
+            crud.product.remove, crud.product.restore = original_remove, original_restore
+        for method, path in (("delete", "/api/v1/products/{}"), ("put", "/api/v1/products/restore/{}")):
+            counts.clear()
+            start = time.perf_counter()
+            for id in range(1, args.requests + 1):
+                response = getattr(client, method)(path.format(id))
+                assert response.status_code == 200, response.text
+            elapsed = time.perf_counter() - start
+            per_request = {kind: count / args.requests for kind, count in sorted(counts.items())}
+            trips = sum(per_request.values())
+            detail = ", ".join(f"{kind} {count:g}" for kind, count in per_request.items())
+            print(f"{label:<13}{method.upper():<7}{trips:>4g} round trips/request ({detail}), "
+                  f"{elapsed / args.requests * 1000:.2f} ms/request")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway in-memory SQLite database seeded with
+synthetic data, so they need no MySQL server and never touch real data. The
+numbers isolate Python-side costs (hydration, validation, serialization);
+absolute database timings will differ on MySQL.
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+# Add the repository root to the path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.category import Category, CategoryClosure
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+
+PLATFORMS = ["amazon", "walmart", "ebay", "web"]
+WORDS = [
+    "wireless", "smart", "pro", "mini", "ultra", "classic", "organic", "steel",
+    "cotton", "portable", "digital", "premium", "eco", "compact", "deluxe", "kids",
+]
+NOUNS = [
+    "speaker", "watch", "blender", "jacket", "lamp", "backpack", "headphones",
+    "kettle", "mug", "camera", "keyboard", "chair", "novel", "puzzle", "sneakers",
+]
+
+def make_sessionmaker(url: str = "sqlite://") -> sessionmaker:
+    """Create the schema on a fresh database and return a session factory for it."""
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def seed(db: Session, *, categories: int = 20, products: int = 10000, sales: int = 0, seed: int = 42) -> None:
+    """Bulk insert synthetic categories, products with inventory, and sales."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    db.execute(insert(Category), [
+        {"id": i + 1, "name": f"Category {i + 1}", "description": "Benchmark category",
+         "created_at": now, "updated_at": now}
+        for i in range(categories)
+    ])
+    # Top-level categories: each is only its own ancestor
+    db.execute(insert(CategoryClosure), [
+        {"ancestor_id": i + 1, "descendant_id": i + 1, "depth": 0} for i in range(categories)
+    ])
+    batch = 50000
+    # Category of product id i + 1, copied onto its sales
+    product_categories = []
+    for start in range(0, products, batch):
+        chunk = range(start, min(start + batch, products))
+        rows = [
+            {"id": i + 1,
+             "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {rng.choice(NOUNS).title()} {i}",
+             "description": f"{rng.choice(WORDS)} {rng.choice(NOUNS)} for everyday use",
+             "sku": f"SKU-{i + 1:08d}",
+             "price": round(rng.uniform(1, 500), 2),
+             "category_id": rng.randint(1, categories),
+             "created_at": now, "updated_at": now}
+            for i in chunk
+        ]
+        product_categories += [row["category_id"] for row in rows]
+        db.execute(insert(Product), rows)
+        db.execute(insert(Inventory), [
+            {"product_id": i + 1, "quantity": rng.randint(0, 200), "low_stock_threshold": 10,
+             "updated_at": now}
+            for i in chunk
+        ])
+    for start in range(0, sales, batch):
+        chunk = range(start, min(start + batch, sales))
+        rows = []
+        for i in chunk:
+            quantity = rng.randint(1, 5)
+            price = round(rng.uniform(1, 500), 2)
+            product_id = rng.randint(1, products)
+            rows.append({
+                "product_id": product_id, "category_id": product_categories[product_id - 1], "quantity": quantity,
+                "unit_price": price, "total_price": round(price * quantity, 2),
+                "sale_date": now - timedelta(minutes=i), "platform": rng.choice(PLATFORMS),
+                "order_id": f"ORDER-{i + 1:09d}",
+            })
+        db.execute(insert(Sale), rows)
+    db.commit()
+
+def measure(fn: Callable[[], Any], *, repeat: int = 5) -> Dict[str, float]:
+    """Best-of-``repeat`` CPU and wall time, plus the traced Python heap peak of one run."""
+    fn()  # warm up caches and lazy imports
+    cpu, wall = [], []
+    for _ in range(repeat):
+        gc.collect()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        fn()
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"cpu_ms": min(cpu) * 1000, "wall_ms": min(wall) * 1000, "peak_kib": peak / 1024}
+
+def report(title: str, results: Dict[str, Dict[str, float]]) -> None:
+    """Print results as a table, with ratios relative to the first entry."""
+    print(f"\n{title}")
+    print(f"{'variant':<28}{'cpu ms':>10}{'wall ms':>10}{'peak KiB':>12}{'cpu x':>8}{'mem x':>8}")
+    baseline = next(iter(results.values()))
+    for name, r in results.items():
+        print(
+            f"{name:<28}{r['cpu_ms']:>10.1f}{r['wall_ms']:>10.1f}{r['peak_kib']:>12.0f}"
+            f"{baseline['cpu_ms'] / r['cpu_ms']:>8.2f}{baseline['peak_kib'] / r['peak_kib']:>8.2f}"
+        )
@@ -0,0 +1,50 @@
+"""
+Import a supplier catalog file into the database configured by DATABASE_URL.
+
+    python scripts/import_catalog.py catalog.csv
+    python scripts/import_catalog.py catalog.ndjson --report report.json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db.session import SessionLocal
+from app.imports import catalog
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create or update products and inventory from a CSV or NDJSON catalog.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=catalog.FORMATS, help="defaults from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=catalog.CHUNK_SIZE)
+    parser.add_argument("--report", type=Path, help="write the per-row report here as JSON")
+    args = parser.parse_args()
+
+    fmt = args.format or catalog.format_for(None, args.path.name)
+    if fmt is None:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with args.path.open(encoding="utf-8-sig", newline="") as lines:
+            result = catalog.import_catalog(db, lines, fmt, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+
+    total = len(result["rows"])
+    print(f"{total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s): "
+          f"{result['created']} created, {result['updated']} updated, {result['errors']} errors")
+    for row in result["rows"]:
+        if row["status"] == "error":
+            print(f"line {row['line']} ({row['sku']}): {row['detail']}", file=sys.stderr)
+    if args.report:
+        args.report.write_text(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
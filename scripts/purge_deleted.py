@@ -0,0 +1,60 @@
+"""
+Move products and categories soft deleted more than --days ago, with their
+inventory, out of the live tables into the archive tables of the database
+configured by DATABASE_URL. The deleted listings keep showing archived rows.
+
+    python scripts/purge_deleted.py --days 90
+    python scripts/purge_deleted.py --days 30 --chunk-size 100 --pause 1
+
+Each chunk is its own short transaction, followed by --pause seconds of sleep
+so replicas and concurrent writers keep up. Products go first, so categories
+they emptied can follow in the same run. Sales keep pointing at archived rows.
+Rows that stay are reported as skipped: categories still holding products or
+subcategories, and rows locked by a restore at the time.
+"""
+import argparse
+import datetime
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import crud
+from app.crud.base import ARCHIVE_CHUNK_SIZE
+from app.db.session import SessionLocal
+from app.models.category import Category
+from app.models.product import Product
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive long soft-deleted products and categories in small chunks.")
+    parser.add_argument("--days", type=int, default=90, help="archive rows deleted more than this many days ago")
+    parser.add_argument("--chunk-size", type=int, default=ARCHIVE_CHUNK_SIZE)
+    parser.add_argument("--pause", type=float, default=0.5, help="seconds to sleep between chunks")
+    args = parser.parse_args()
+    if args.days < 0 or args.chunk_size < 1 or args.pause < 0:
+        parser.error("--days and --pause must not be negative and --chunk-size must be positive")
+
+    deleted_before = datetime.datetime.now() - datetime.timedelta(days=args.days)
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        for name, crud_obj, model in (("products", crud.product, Product), ("categories", crud.category, Category)):
+            total = 0
+            while True:
+                moved = crud_obj.archive_deleted(db, deleted_before=deleted_before, limit=args.chunk_size)
+                if not moved:
+                    break
+                total += moved
+                print(f"{name}: {total} archived", file=sys.stderr)
+                time.sleep(args.pause)
+            skipped = db.query(model).filter(model.deleted_at < deleted_before).count()
+            db.rollback()
+            print(f"{total} {name} archived, {skipped} skipped")
+    finally:
+        db.close()
+    print(f"done in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import pytest
+from app.db.query_stats import normalize_statement, statement_stats
+
+def test_admin_requires_token(client_with_db, admin_headers):
+    """Test that admin endpoints reject requests without the admin token"""
+    response = client_with_db.get("/api/v1/admin/statements/")
+    assert response.status_code == 403
+
+    response = client_with_db.get(
+        "/api/v1/admin/statements/", headers={"X-Admin-Token": "wrong"}
+    )
+    assert response.status_code == 403
+
+def test_statement_stats_aggregate_by_fingerprint(client_with_db, db, admin_headers):
+    """Test that repeated listings land in a single statement fingerprint"""
+    client_with_db.delete("/api/v1/admin/statements/", headers=admin_headers)
+    client_with_db.get("/api/v1/products/?skip=0&limit=10")
+    client_with_db.get("/api/v1/products/?skip=5&limit=20")
+
+    response = client_with_db.get("/api/v1/admin/statements/?order_by=calls", headers=admin_headers)
+    assert response.status_code == 200
+    product_stats = [s for s in response.json() if "FROM product" in s["query"]]
+    assert len(product_stats) == 1
+    assert product_stats[0]["calls"] == 2
+    assert product_stats[0]["mean_time_ms"] <= product_stats[0]["max_time_ms"]
+
+def test_invalid_order_by(client_with_db, admin_headers):
+    """Test that unknown sort keys and out-of-range limits are rejected"""
+    response = client_with_db.get("/api/v1/admin/statements/?order_by=bogus", headers=admin_headers)
+    assert response.status_code == 400
+    for limit in (0, 501):
+        response = client_with_db.get(f"/api/v1/admin/statements/?limit={limit}", headers=admin_headers)
+        assert response.status_code == 422
+
+def test_slow_statement_plan_captured(client_with_db, db, admin_headers, monkeypatch):
+    """Test that statements over the threshold get an EXPLAIN plan"""
+    client_with_db.delete("/api/v1/admin/statements/", headers=admin_headers)
+    monkeypatch.setattr(statement_stats, "slow_threshold_ms", 0.0)
+    client_with_db.get("/api/v1/categories/")
+    monkeypatch.setattr(statement_stats, "slow_threshold_ms", 1e9)
+
+    slow = client_with_db.get("/api/v1/admin/statements/slow/", headers=admin_headers).json()
+    category_query = next(s for s in slow if "FROM category" in s["query"])
+
+    response = client_with_db.get(
+        f"/api/v1/admin/statements/{category_query['fingerprint']}/plan", headers=admin_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["error"] is None
+    assert len(data["plan"]) > 0
+
+def test_normalize_statement():
+    """Test that literals, placeholders and IN lists are collapsed"""
+    normalized = normalize_statement(
+        "SELECT * FROM sale WHERE id IN (%(id_1_1)s, %(id_1_2)s) AND platform = 'web'  LIMIT 10"
+    )
+    assert normalized == "SELECT * FROM sale WHERE id IN (...) AND platform = ? LIMIT ?"
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_profile_returns_collapsed_stacks(client, admin_headers):
+    """Test that the profiler samples other threads as collapsed stacks"""
+    import threading
+
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        response = client.get("/api/v1/admin/profile/?seconds=0.3&hz=100", headers=admin_headers)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.strip().splitlines()
+    busy = [line for line in lines if line.startswith("busy-worker;")]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert "_busy_loop" in stack
+    assert int(count) > 0
+
+def test_profile_rejects_excessive_duration(client, admin_headers):
+    """Test that the sampling duration is capped"""
+    response = client.get("/api/v1/admin/profile/?seconds=3600", headers=admin_headers)
+    assert response.status_code == 422
+
+def test_allocations_sampled_per_route(client_with_db, db, admin_headers, monkeypatch):
+    """Test that sampled requests report peaks and allocation categories per route"""
+    from app.core.allocations import allocation_sampler
+
+    category_response = client_with_db.post(
+        "/api/v1/categories/", json={"name": "Alloc Category", "description": "Allocation test"}
+    )
+    category_id = category_response.json()["id"]
+    for i in range(5):
+        client_with_db.post("/api/v1/products/", json={
+            "name": f"Alloc Product {i}",
+            "sku": f"ALLOC-{i:03d}",
+            "price": 10.0 + i,
+            "category_id": category_id,
+        })
+
+    allocation_sampler.reset()
+    monkeypatch.setattr(allocation_sampler, "rate", 1.0)
+    response = client_with_db.get("/api/v1/products/")
+    assert response.status_code == 200
+    monkeypatch.setattr(allocation_sampler, "rate", 0.0)
+
+    response = client_with_db.get("/api/v1/admin/allocations/", headers=admin_headers)
+    assert response.status_code == 200
+    routes = {r["route"]: r for r in response.json()}
+    products = routes["/api/v1/products/"]
+    assert products["samples"] == 1
+    assert products["max_peak_bytes"] > 0
+    assert products["live_bytes_by_category"]
+    assert products["top_sites"]
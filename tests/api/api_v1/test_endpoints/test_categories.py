@@ -283,4 +283,246 @@ def test_cannot_update_deleted_category(client_with_db, db):
     update_data = {"name": "Updated Name", "description": "Updated description"}
     update_response = client_with_db.put(f"/api/v1/categories/{category_id}", json=update_data)
     assert update_response.status_code == 400
-    assert "deleted" in update_response.json()["detail"].lower() 
\ No newline at end of file
+    assert "deleted" in update_response.json()["detail"].lower() 
+
+def test_category_listing_conditional_get(client_with_db, db):
+    """Test that the category listing revalidates with ETag and Last-Modified"""
+    response = client_with_db.get("/api/v1/categories/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "last-modified" in response.headers
+
+    response = client_with_db.get("/api/v1/categories/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    # Other pages have their own validators
+    response = client_with_db.get("/api/v1/categories/?limit=1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    # A soft delete keeps updated_at but still moves the listing's version
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "ETag Category"})
+    category_id = category_response.json()["id"]
+    response = client_with_db.get("/api/v1/categories/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    client_with_db.delete(f"/api/v1/categories/{category_id}")
+    response = client_with_db.get("/api/v1/categories/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_category_cache_write_through_and_version_polling(client_with_db, db):
+    """Test that cached category lookups see local writes at once and other workers' writes via cache_version"""
+    from sqlalchemy import update
+    from app.cache.coherence import version_watcher
+    from app.models.cache_version import CacheVersion
+    from app.models.category import Category
+
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Cached Category"})
+    category_id = category_response.json()["id"]
+    product_data = {"name": "Cached Product", "sku": "TEST-CACHE-001", "price": 3.0, "category_id": category_id}
+
+    # Local writes go through the cache without waiting for a version check
+    version_watcher.poll(db)
+    client_with_db.delete(f"/api/v1/categories/{category_id}")
+    response = client_with_db.post("/api/v1/products/", json=product_data)
+    assert response.status_code == 400
+    assert "deleted category" in response.json()["detail"]
+
+    # The watcher skips this worker's own writes, which the cache has already seen
+    assert version_watcher.poll(db) == []
+
+    # Another worker restores the category; the cache notices once the watcher polls
+    db.query(Category).filter(Category.id == category_id).update({"deleted_at": None}, synchronize_session=False)
+    db.execute(
+        update(CacheVersion).where(CacheVersion.entity == "category").values(version=CacheVersion.version + 1)
+    )
+    db.commit()
+    response = client_with_db.post("/api/v1/products/", json=product_data)
+    assert response.status_code == 400
+    assert version_watcher.poll(db) == ["category"]
+    response = client_with_db.post("/api/v1/products/", json=product_data)
+    assert response.status_code == 200
+
+def test_category_cache_falls_back_to_the_database_on_a_miss(client_with_db, db):
+    """Test that categories another worker created are usable before the version watcher polls"""
+    from app.db.session import SessionLocal
+    from app.models.category import Category, CategoryClosure
+
+    client_with_db.post("/api/v1/categories/", json={"name": "Loaded Category"})
+    assert crud.category.get_by_name_cached(db, name="Loaded Category") is not None
+    other = SessionLocal()
+    try:
+        category = Category(name="Elsewhere Category")
+        other.add(category)
+        other.flush()
+        other.add(CategoryClosure(ancestor_id=category.id, descendant_id=category.id, depth=0))
+        other.commit()
+        category_id = category.id
+    finally:
+        other.close()
+
+    response = client_with_db.post("/api/v1/products/", json={
+        "name": "Elsewhere Product", "sku": "TEST-ELSEWHERE-001", "price": 3.0, "category_id": category_id,
+    })
+    assert response.status_code == 200
+    assert crud.category.get_by_name_cached(db, name="Elsewhere Category").id == category_id
+    assert crud.category.get_cached(db, id=category_id + 1000) is None
+
+def test_category_cache_load_keeps_puts_made_while_it_reads(client_with_db, db):
+    """Test that a reload does not drop a category this worker wrote after the reload's read"""
+    from types import SimpleNamespace
+    from app.cache.category import category_cache
+
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Before Rename"}).json()["id"]
+
+    class RacingSession:
+        """Commits a rename through crud.category right after the load has read the table"""
+
+        def execute(self, statement):
+            rows = db.execute(statement).all()
+            crud.category.update(db, db_obj=crud.category.get(db, id=category_id), obj_in={"name": "After Rename"})
+            return SimpleNamespace(all=lambda: rows)
+
+    category_cache.load(RacingSession())
+    assert crud.category.get_cached(db, id=category_id).name == "After Rename"
+    assert crud.category.get_by_name_cached(db, name="After Rename").id == category_id
+
+def test_bulk_soft_delete_and_restore_categories(client_with_db, db):
+    """Test bulk category delete, refused with active products unless it cascades, and cascading restore"""
+    category_ids = [
+        client_with_db.post("/api/v1/categories/", json={"name": f"Seasonal Category {i}"}).json()["id"]
+        for i in range(3)
+    ]
+    product_ids = [
+        client_with_db.post("/api/v1/products/", json={
+            "name": f"Seasonal Product {i}", "sku": f"TEST-SEASON-{i}", "price": 3.0, "category_id": category_ids[i % 2],
+        }).json()["id"]
+        for i in range(3)
+    ]
+    # Deleted on its own, so a cascading restore must leave it deleted
+    client_with_db.delete(f"/api/v1/products/{product_ids[2]}")
+
+    response = client_with_db.post("/api/v1/categories/bulk-delete/", json={"ids": category_ids})
+    assert response.status_code == 400
+    assert f"{category_ids[1]}" in response.json()["detail"]
+    response = client_with_db.post("/api/v1/categories/bulk-delete/", json={"ids": [category_ids[2]]})
+    assert response.json() == {"categories": 1, "products": 0}
+
+    response = client_with_db.post("/api/v1/categories/bulk-delete/", json={"ids": category_ids, "cascade": True})
+    assert response.status_code == 200
+    assert response.json() == {"categories": 2, "products": 2}
+    assert client_with_db.get(f"/api/v1/categories/{category_ids[0]}").status_code == 404
+    assert all(client_with_db.get(f"/api/v1/products/{id}").status_code == 404 for id in product_ids)
+    # The category cache saw the delete
+    assert crud.category.get_cached(db, id=category_ids[0]).deleted_at is not None
+
+    response = client_with_db.post("/api/v1/categories/bulk-restore/", json={"ids": category_ids[:2], "cascade": True})
+    assert response.json() == {"categories": 2, "products": 2}
+    assert [client_with_db.get(f"/api/v1/products/{id}").status_code for id in product_ids] == [200, 200, 404]
+    response = client_with_db.post("/api/v1/categories/bulk-restore/", json={"ids": category_ids})
+    assert response.json() == {"categories": 1, "products": 0}
+
+    assert client_with_db.post("/api/v1/categories/bulk-delete/", json={"ids": []}).status_code == 422
+
+def test_category_overview_counts_stock_and_recent_revenue(client_with_db, db):
+    """Test the category overview totals, pagination and conditional GET"""
+    from datetime import datetime, timedelta
+
+    busy_id = client_with_db.post("/api/v1/categories/", json={"name": "Busy Category"}).json()["id"]
+    empty_id = client_with_db.post("/api/v1/categories/", json={"name": "Empty Category"}).json()["id"]
+    product_ids = []
+    for i, (quantity, threshold) in enumerate([(50, 10), (5, 10), (8, 1)]):
+        product_id = client_with_db.post("/api/v1/products/", json={
+            "name": f"Overview Product {i}", "sku": f"TEST-OVERVIEW-{i}", "price": 10.0, "category_id": busy_id,
+        }).json()["id"]
+        client_with_db.post("/api/v1/inventory/", json={
+            "product_id": product_id, "quantity": quantity, "low_stock_threshold": threshold,
+        })
+        product_ids.append(product_id)
+    crud.sale.create_many(db, objs_in=[
+        {"product_id": product_id, "quantity": 1, "unit_price": total, "total_price": total,
+         "platform": "web", "order_id": f"ORDER-OVERVIEW-{age}", "sale_date": datetime.utcnow() - timedelta(days=age)}
+        for product_id, total, age in [
+            (product_ids[0], 20.0, 0), (product_ids[0], 10.5, 29), (product_ids[1], 99.0, 45), (product_ids[2], 7.0, 1),
+        ]
+    ])
+    # Deleted products count nowhere, nor does their revenue
+    client_with_db.delete(f"/api/v1/products/{product_ids[2]}")
+
+    response = client_with_db.get("/api/v1/categories/overview/")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": busy_id, "name": "Busy Category", "description": None, "parent_id": None, "level": 0, "product_count": 2,
+         "stock_units": 55, "low_stock_count": 1, "revenue_30d": 30.5},
+        {"id": empty_id, "name": "Empty Category", "description": None, "parent_id": None, "level": 0, "product_count": 0,
+         "stock_units": 0, "low_stock_count": 0, "revenue_30d": 0.0},
+    ]
+    assert [c["id"] for c in client_with_db.get("/api/v1/categories/overview/?skip=1&limit=1").json()] == [empty_id]
+
+    etag = response.headers["etag"]
+    assert client_with_db.get("/api/v1/categories/overview/", headers={"If-None-Match": etag}).status_code == 304
+    inventory_id = crud.inventory.get_by_product_id(db, product_id=product_ids[1]).id
+    client_with_db.post(f"/api/v1/inventory/{inventory_id}/restock", json={"quantity": 10})
+    response = client_with_db.get("/api/v1/categories/overview/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["stock_units"] == 65
+
+def test_category_tree_paths_subtree_listing_and_rollup(client_with_db, db):
+    """Test nested categories: levels, moves, ancestor paths, subtree products and rolled-up sales"""
+    def create(name, parent_id=None):
+        return client_with_db.post("/api/v1/categories/", json={"name": name, "parent_id": parent_id}).json()
+
+    home = create("Tree Home")
+    kitchen = create("Tree Kitchen", home["id"])
+    kettles = create("Tree Kettles", kitchen["id"])
+    garden = create("Tree Garden")
+    assert (home["level"], kitchen["level"], kettles["level"]) == (0, 1, 2)
+    assert client_with_db.post("/api/v1/categories/", json={"name": "Orphan", "parent_id": 999999}).status_code == 400
+
+    product_ids = [
+        client_with_db.post("/api/v1/products/", json={
+            "name": f"Tree Product {i}", "sku": f"TEST-TREE-{i}", "price": 5.0, "category_id": category_id,
+        }).json()["id"]
+        for i, category_id in enumerate([kitchen["id"], kettles["id"], garden["id"]])
+    ]
+    response = client_with_db.get(f"/api/v1/products/category/{home['id']}?subtree=true")
+    assert [p["id"] for p in response.json()] == product_ids[:2]
+    assert client_with_db.get(f"/api/v1/products/category/{home['id']}").json() == []
+
+    path = client_with_db.get(f"/api/v1/categories/{kettles['id']}/path").json()
+    assert [c["name"] for c in path] == ["Tree Home", "Tree Kitchen", "Tree Kettles"]
+
+    # Moving kitchen under garden takes kettles along
+    response = client_with_db.put(f"/api/v1/categories/{kitchen['id']}", json={"name": "Tree Kitchen", "parent_id": garden["id"]})
+    assert response.status_code == 200
+    assert response.json()["level"] == 1
+    path = client_with_db.get(f"/api/v1/categories/{kettles['id']}/path").json()
+    assert [c["name"] for c in path] == ["Tree Garden", "Tree Kitchen", "Tree Kettles"]
+    assert path[-1]["level"] == 2
+    response = client_with_db.get(f"/api/v1/products/category/{garden['id']}?subtree=true")
+    assert [p["id"] for p in response.json()] == product_ids
+    assert client_with_db.get(f"/api/v1/products/category/{home['id']}?subtree=true").json() == []
+    # No cycles
+    response = client_with_db.put(f"/api/v1/categories/{garden['id']}", json={"name": "Tree Garden", "parent_id": kettles["id"]})
+    assert response.status_code == 400
+
+    crud.sale.create_many(db, objs_in=[
+        {"product_id": product_id, "quantity": 1, "unit_price": 5.0, "total_price": 5.0,
+         "platform": "web", "order_id": f"ORDER-TREE-{product_id}"}
+        for product_id in product_ids
+    ])
+    response = client_with_db.get("/api/v1/sales/by-category/?level=0")
+    assert response.json() == [{"category_name": "Tree Garden", "sales_count": 3, "total_revenue": 15.0}]
+    response = client_with_db.get("/api/v1/sales/by-category/?level=1")
+    assert response.json() == [{"category_name": "Tree Kitchen", "sales_count": 2, "total_revenue": 10.0}]
+
+    # Subcategories block a plain delete; cascading deletes and restores take the whole subtree
+    assert client_with_db.delete(f"/api/v1/categories/{kettles['id']}").status_code == 400
+    response = client_with_db.post("/api/v1/categories/bulk-delete/", json={"ids": [kitchen["id"]]})
+    assert response.status_code == 400
+    response = client_with_db.post("/api/v1/categories/bulk-delete/", json={"ids": [kitchen["id"]], "cascade": True})
+    assert response.json() == {"categories": 2, "products": 2}
+    response = client_with_db.post("/api/v1/categories/bulk-restore/", json={"ids": [kitchen["id"]], "cascade": True})
+    assert response.json() == {"categories": 2, "products": 2}
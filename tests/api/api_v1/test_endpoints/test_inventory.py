@@ -354,4 +354,39 @@ def test_get_low_stock_inventory(client_with_db, db):
     # Should include the low stock product but not the normal stock one
     product_ids = [inv["product_id"] for inv in data]
     assert product2_id in product_ids
-    assert product1_id not in product_ids 
\ No newline at end of file
+    assert product1_id not in product_ids 
+
+def test_inventory_listing_conditional_get(client_with_db, db):
+    """Test that a sale changes the inventory listing's ETag"""
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Conditional Inventory Category"})
+    category_id = category_response.json()["id"]
+    product_response = client_with_db.post("/api/v1/products/", json={
+        "name": "Conditional Inventory Product",
+        "sku": "TEST-ETAG-INV-001",
+        "price": 5.0,
+        "category_id": category_id
+    })
+    product_id = product_response.json()["id"]
+    client_with_db.post("/api/v1/inventory/", json={
+        "product_id": product_id, "quantity": 10, "low_stock_threshold": 2
+    })
+
+    response = client_with_db.get("/api/v1/inventory/")
+    etag = response.headers["etag"]
+    response = client_with_db.get("/api/v1/inventory/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    last_modified = response.headers["last-modified"]
+    response = client_with_db.get("/api/v1/inventory/", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    client_with_db.post("/api/v1/sales/", json={
+        "product_id": product_id,
+        "quantity": 1,
+        "unit_price": 5.0,
+        "total_price": 5.0,
+        "platform": "web",
+        "order_id": "ETAG-INV-1"
+    })
+    response = client_with_db.get("/api/v1/inventory/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
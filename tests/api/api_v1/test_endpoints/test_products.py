@@ -353,6 +353,26 @@ def test_get_products_by_category(client_with_db, db):
     assert "Product in Category 1" in product_names
     assert "Product in Category 2" not in product_names
 
+def test_get_products_filtered_by_category_id(client_with_db, db):
+    """Test the category_id filter of the product listing, with and without subcategories"""
+    parent_id = client_with_db.post("/api/v1/categories/", json={"name": "Filter Parent"}).json()["id"]
+    child_id = client_with_db.post(
+        "/api/v1/categories/", json={"name": "Filter Child", "parent_id": parent_id}
+    ).json()["id"]
+    ids = [
+        client_with_db.post("/api/v1/products/", json={
+            "name": f"Filter Product {i}", "sku": f"TEST-FILTER-{i}", "price": 3.0, "category_id": category_id,
+        }).json()["id"]
+        for i, category_id in enumerate((parent_id, child_id))
+    ]
+
+    response = client_with_db.get(f"/api/v1/products/?category_id={parent_id}")
+    assert response.status_code == 200
+    assert [p["id"] for p in response.json()] == ids[:1]
+    response = client_with_db.get(f"/api/v1/products/?category_id={parent_id}&subtree=true")
+    assert response.status_code == 200
+    assert [p["id"] for p in response.json()] == ids
+
 def test_search_products(client_with_db, db):
     """Test searching for products by name"""
     # Create a category
@@ -463,4 +483,638 @@ def test_cannot_create_sale_for_deleted_product(client_with_db, db):
     }
     sale_response = client_with_db.post("/api/v1/sales/", json=sale_data)
     assert sale_response.status_code == 400
-    assert "deleted product" in sale_response.json()["detail"].lower() 
\ No newline at end of file
+    assert "deleted product" in sale_response.json()["detail"].lower() 
+
+def test_product_listing_matches_detail(client_with_db, db):
+    """Test that projection-mode listings return the same fields as the detail endpoint"""
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Projection Category"})
+    category_id = category_response.json()["id"]
+    product_response = client_with_db.post("/api/v1/products/", json={
+        "name": "Projection Product",
+        "description": "Listed through row projection",
+        "sku": "TEST-PROJ-001",
+        "price": 12.5,
+        "category_id": category_id
+    })
+    product_id = product_response.json()["id"]
+
+    detail = client_with_db.get(f"/api/v1/products/{product_id}").json()
+    listing = client_with_db.get("/api/v1/products/").json()
+    assert [p for p in listing if p["id"] == product_id] == [detail]
+
+def test_full_text_search_ranks_name_description_and_sku(client_with_db, db):
+    """Test that search matches word prefixes across fields, ranks name matches first and tracks writes"""
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Search Category"})
+    category_id = category_response.json()["id"]
+    products = {}
+    for name, description, sku in [
+        ("Portable Speaker", "Loud wireless audio", "TEST-FTS-001"),
+        ("Desk Lamp", "Pairs well with a portable speaker", "TEST-FTS-002"),
+        ("Coffee Mug", "Ceramic", "TEST-FTS-PORTABLE"),
+        ("Steel Kettle", "Boils water", "TEST-FTS-004"),
+    ]:
+        response = client_with_db.post("/api/v1/products/", json={
+            "name": name, "description": description, "sku": sku, "price": 10.0, "category_id": category_id
+        })
+        products[name] = response.json()["id"]
+
+    response = client_with_db.get("/api/v1/products/search/?query=portab")
+    assert [p["name"] for p in response.json()] == ["Portable Speaker", "Coffee Mug", "Desk Lamp"]
+
+    # Every term has to match
+    response = client_with_db.get("/api/v1/products/search/?query=portable speak")
+    assert [p["name"] for p in response.json()] == ["Portable Speaker", "Desk Lamp"]
+    response = client_with_db.get("/api/v1/products/search/?query=portable speak&skip=1&limit=1")
+    assert [p["name"] for p in response.json()] == ["Desk Lamp"]
+
+    # Writes keep the index current
+    client_with_db.delete(f"/api/v1/products/{products['Portable Speaker']}")
+    client_with_db.put(f"/api/v1/products/{products['Steel Kettle']}", json={"description": "Portable camping kettle"})
+    response = client_with_db.get("/api/v1/products/search/?query=portable")
+    assert [p["name"] for p in response.json()] == ["Coffee Mug", "Desk Lamp", "Steel Kettle"]
+
+def test_autocomplete_by_name_and_sku_prefix(client_with_db, db):
+    """Test that autocomplete matches name and SKU prefixes, skips deleted products and tracks writes"""
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Autocomplete Category"})
+    category_id = category_response.json()["id"]
+    products = {}
+    for name, sku in [
+        ("Wireless  Mouse", "TEST-AC-001"),
+        ("Wireless Keyboard", "TEST-AC-002"),
+        ("Wired Headset", "WIRE-AC-003"),
+    ]:
+        response = client_with_db.post("/api/v1/products/", json={
+            "name": name, "sku": sku, "price": 10.0, "category_id": category_id
+        })
+        products[name] = response.json()["id"]
+
+    # Case and whitespace are normalized; the headset matches through its SKU
+    response = client_with_db.get("/api/v1/products/autocomplete?prefix=WIRE")
+    assert response.status_code == 200
+    assert [p["name"] for p in response.json()] == ["Wired Headset", "Wireless Keyboard", "Wireless  Mouse"]
+    response = client_with_db.get("/api/v1/products/autocomplete?prefix=wireless m")
+    assert response.json() == [{"id": products["Wireless  Mouse"], "name": "Wireless  Mouse", "sku": "TEST-AC-001"}]
+    response = client_with_db.get("/api/v1/products/autocomplete?prefix=test-ac&limit=1")
+    assert [p["sku"] for p in response.json()] == ["TEST-AC-001"]
+
+    # Writes keep the index current
+    client_with_db.delete(f"/api/v1/products/{products['Wireless Keyboard']}")
+    client_with_db.put(f"/api/v1/products/{products['Wired Headset']}", json={"name": "Corded Headset"})
+    response = client_with_db.get("/api/v1/products/autocomplete?prefix=wire")
+    assert [p["name"] for p in response.json()] == ["Corded Headset", "Wireless  Mouse"]
+    client_with_db.put(f"/api/v1/products/restore/{products['Wireless Keyboard']}")
+    response = client_with_db.get("/api/v1/products/autocomplete?prefix=wireless")
+    assert [p["name"] for p in response.json()] == ["Wireless Keyboard", "Wireless  Mouse"]
+
+def test_fuzzy_search_tolerates_typos(client_with_db, db):
+    """Test that a misspelled query falls back to trigram matches ranked by similarity"""
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Fuzzy Category"})
+    category_id = category_response.json()["id"]
+    products = {}
+    for name, sku in [
+        ("Bluetooth Speaker", "TEST-FZ-001"),
+        ("Bluetooth Speaker Stand", "TEST-FZ-002"),
+        ("Kettle", "TEST-FZ-003"),
+    ]:
+        response = client_with_db.post("/api/v1/products/", json={
+            "name": name, "sku": sku, "price": 10.0, "category_id": category_id
+        })
+        products[name] = response.json()["id"]
+
+    response = client_with_db.get("/api/v1/products/search/?query=blutooth speeker")
+    assert [p["name"] for p in response.json()] == ["Bluetooth Speaker", "Bluetooth Speaker Stand"]
+    response = client_with_db.get("/api/v1/products/search/?query=blutooth speeker&skip=1")
+    assert [p["name"] for p in response.json()] == ["Bluetooth Speaker Stand"]
+    # The other SKUs share the "test-fz" trigrams but rank below the closest one
+    response = client_with_db.get("/api/v1/products/search/?query=TEST-FZ-0003")
+    assert response.json()[0]["name"] == "Kettle"
+    response = client_with_db.get("/api/v1/products/search/?query=blutooth speeker&fuzzy=false")
+    assert response.json() == []
+
+    # Exact matches win, and paging past them does not fall back
+    response = client_with_db.get("/api/v1/products/search/?query=kettle&skip=1")
+    assert response.json() == []
+
+    # Writes keep the trigram index current
+    client_with_db.delete(f"/api/v1/products/{products['Bluetooth Speaker']}")
+    client_with_db.put(f"/api/v1/products/{products['Kettle']}", json={"name": "Bluetooth Kettle"})
+    response = client_with_db.get("/api/v1/products/search/?query=blutooth")
+    assert [p["name"] for p in response.json()] == ["Bluetooth Kettle", "Bluetooth Speaker Stand"]
+
+def test_faceted_search_filters_sorts_and_counts(client_with_db, db):
+    """Test that faceted search combines filters and counts categories and price bands"""
+    audio_id = client_with_db.post("/api/v1/categories/", json={"name": "Facet Audio"}).json()["id"]
+    kitchen_id = client_with_db.post("/api/v1/categories/", json={"name": "Facet Kitchen"}).json()["id"]
+    products = {}
+    for name, price, category_id, quantity in [
+        ("Portable Speaker", 30.0, audio_id, 5),
+        ("Portable Radio", 80.0, audio_id, 0),
+        ("Studio Speaker", 300.0, audio_id, 2),
+        ("Portable Kettle", 20.0, kitchen_id, 7),
+    ]:
+        response = client_with_db.post("/api/v1/products/", json={
+            "name": name, "sku": f"TEST-FACET-{len(products)}", "price": price, "category_id": category_id
+        })
+        products[name] = response.json()["id"]
+        client_with_db.post("/api/v1/inventory/", json={
+            "product_id": products[name], "quantity": quantity, "low_stock_threshold": 1
+        })
+
+    response = client_with_db.get("/api/v1/products/faceted-search/?query=portable&sort=price_desc")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert [p["name"] for p in data["items"]] == ["Portable Radio", "Portable Speaker", "Portable Kettle"]
+    assert data["facets"]["categories"] == [
+        {"category_id": audio_id, "count": 2},
+        {"category_id": kitchen_id, "count": 1},
+    ]
+    assert data["facets"]["price_bands"] == [
+        {"min_price": 0, "max_price": 25, "count": 1},
+        {"min_price": 25, "max_price": 50, "count": 1},
+        {"min_price": 50, "max_price": 100, "count": 1},
+    ]
+
+    # Category counts ignore the category filter; price bands and items honour it
+    response = client_with_db.get(
+        f"/api/v1/products/faceted-search/?category_id={audio_id}&in_stock=true&min_price=25&sort=price_asc"
+    )
+    data = response.json()
+    assert data["total"] == 2
+    assert [p["name"] for p in data["items"]] == ["Portable Speaker", "Studio Speaker"]
+    assert data["facets"]["categories"] == [{"category_id": audio_id, "count": 2}]
+    assert [band["min_price"] for band in data["facets"]["price_bands"]] == [25, 250]
+
+    response = client_with_db.get("/api/v1/products/faceted-search/?query=speaker&limit=1&skip=1")
+    data = response.json()
+    assert data["total"] == 2
+    assert len(data["items"]) == 1
+
+    response = client_with_db.get("/api/v1/products/faceted-search/?sort=cheapest")
+    assert response.status_code == 400
+    response = client_with_db.get("/api/v1/products/faceted-search/?min_price=50&max_price=10")
+    assert response.status_code == 400
+
+def test_import_catalog_upserts_products_and_inventory(client_with_db, db):
+    """Test that a streamed CSV / NDJSON catalog creates and updates products and reports each row"""
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Import Category"}).json()["id"]
+    existing = client_with_db.post("/api/v1/products/", json={
+        "name": "Old Name", "sku": "TEST-IMP-001", "price": 5.0, "category_id": category_id
+    }).json()
+    client_with_db.post("/api/v1/inventory/", json={
+        "product_id": existing["id"], "quantity": 1, "low_stock_threshold": 3
+    })
+    deleted = client_with_db.post("/api/v1/products/", json={
+        "name": "Gone", "sku": "TEST-IMP-DEL", "price": 5.0, "category_id": category_id
+    }).json()
+    client_with_db.delete(f"/api/v1/products/{deleted['id']}")
+
+    # Build the in-memory indexes first, so the import has to keep them current
+    client_with_db.get("/api/v1/products/search/?query=old&fuzzy=false")
+    client_with_db.get("/api/v1/products/autocomplete?prefix=old")
+
+    body = "\n".join([
+        "sku,name,description,price,category_id,quantity,low_stock_threshold",
+        f"TEST-IMP-001,New Name,,7.5,{category_id},40,",
+        f'TEST-IMP-002,"Desk, Lamp",Bright,12,{category_id},8,2',
+        f"TEST-IMP-003,No Stock,,3,{category_id},,",
+        f"TEST-IMP-004,Bad Price,,-1,{category_id},,",
+        "TEST-IMP-005,No Category,,3,999999,,",
+        f"TEST-IMP-DEL,Revived,,3,{category_id},,",
+        f"TEST-IMP-003,No Stock Again,,4,{category_id},,",
+    ])
+    response = client_with_db.post(
+        "/api/v1/products/import/", content=body.encode(), headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["updated"], data["errors"]) == (2, 2, 3)
+    assert [(r["line"], r["sku"], r["status"]) for r in data["rows"]] == [
+        (2, "TEST-IMP-001", "updated"),
+        (3, "TEST-IMP-002", "created"),
+        (4, "TEST-IMP-003", "created"),
+        (5, "TEST-IMP-004", "error"),
+        (6, "TEST-IMP-005", "error"),
+        (7, "TEST-IMP-DEL", "error"),
+        (8, "TEST-IMP-003", "updated"),
+    ]
+    assert data["rows"][3]["detail"].startswith("price:")
+
+    product = client_with_db.get(f"/api/v1/products/{existing['id']}").json()
+    assert (product["name"], product["price"]) == ("New Name", 7.5)
+    inventory = client_with_db.get(f"/api/v1/inventory/product/{existing['id']}").json()
+    # An omitted threshold keeps the current one
+    assert (inventory["quantity"], inventory["low_stock_threshold"]) == (40, 3)
+    response = client_with_db.get("/api/v1/products/search/?query=desk lamp")
+    assert [p["sku"] for p in response.json()] == ["TEST-IMP-002"]
+    response = client_with_db.get("/api/v1/products/autocomplete?prefix=no stock")
+    assert [p["name"] for p in response.json()] == ["No Stock Again"]
+
+    lines = [
+        '{"sku": "TEST-IMP-002", "name": "Desk Lamp", "price": 13, "category_id": %d, "quantity": 9}' % category_id,
+        "not json",
+    ]
+    response = client_with_db.post(
+        "/api/v1/products/import/?format=ndjson", content="\n".join(lines).encode()
+    )
+    data = response.json()
+    assert (data["created"], data["updated"], data["errors"]) == (0, 1, 1)
+    assert data["rows"][1]["detail"].startswith("Invalid JSON")
+
+    response = client_with_db.post("/api/v1/products/import/", content=b"sku\n")
+    assert response.status_code == 400
+
+def test_bulk_create_update_and_upsert_products(client_with_db, db):
+    """Test the CRUDBase bulk primitives on products, including the caches they must keep current"""
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Bulk Category"}).json()["id"]
+    # Build the search index and cache a miss first, so the bulk writes have to update both
+    client_with_db.get("/api/v1/products/search/?query=bulk&fuzzy=false")
+    assert crud.product.get_by_sku_cached(db, sku="TEST-BULK-002") is None
+
+    created = crud.product.create_many(db, objs_in=[
+        {"name": f"Bulk Widget {i}", "sku": f"TEST-BULK-00{i}", "price": 1.0 + i, "category_id": category_id}
+        for i in range(1, 4)
+    ])
+    assert [p.sku for p in created] == ["TEST-BULK-001", "TEST-BULK-002", "TEST-BULK-003"]
+    assert all(p.id and p.created_at for p in created)
+    assert crud.product.get_by_sku_cached(db, sku="TEST-BULK-002").id == created[1].id
+
+    updated = crud.product.update_many(db, updates={
+        created[0].id: {"price": 9.5},
+        created[1].id: {"name": "Bulk Gadget", "sku": "TEST-BULK-X02"},
+    })
+    assert [(p.name, p.price) for p in updated] == [("Bulk Widget 1", 9.5), ("Bulk Gadget", 3.0)]
+    assert crud.product.get_by_sku_cached(db, sku="TEST-BULK-002") is None
+
+    assert crud.product.upsert_many(db, objs_in=[
+        {"name": "Bulk Widget 3b", "sku": "TEST-BULK-003", "price": 4.0, "category_id": category_id},
+        {"name": "Bulk Widget 4", "sku": "TEST-BULK-004", "price": 5.0, "category_id": category_id},
+    ], key="sku", refresh=False) is None
+
+    response = client_with_db.get("/api/v1/products/search/?query=bulk widget&fuzzy=false")
+    assert [p["name"] for p in response.json()] == ["Bulk Widget 1", "Bulk Widget 3b", "Bulk Widget 4"]
+    assert len(client_with_db.get("/api/v1/products/search/?query=bulk&fuzzy=false").json()) == 4
+
+def test_bulk_price_change(client_with_db, db):
+    """Test absolute, percent and per-SKU price changes, which skip deleted products"""
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Promo Category"}).json()["id"]
+    other_id = client_with_db.post("/api/v1/categories/", json={"name": "Other Category"}).json()["id"]
+    ids = []
+    for i, (price, category) in enumerate([(10.0, category_id), (20.0, category_id), (30.0, category_id), (40.0, other_id)]):
+        response = client_with_db.post("/api/v1/products/", json={
+            "name": f"Promo Product {i}", "sku": f"TEST-PROMO-{i}", "price": price, "category_id": category,
+        })
+        ids.append(response.json()["id"])
+    client_with_db.delete(f"/api/v1/products/{ids[2]}")
+    # Cache the old price, which the change must invalidate
+    assert crud.product.get_by_sku_cached(db, sku="TEST-PROMO-0").price == 10.0
+
+    def prices():
+        return [crud.product.get(db, id=id).price for id in ids]
+
+    response = client_with_db.post("/api/v1/products/prices/", json={
+        "mode": "percent", "value": -15, "category_id": category_id,
+    })
+    assert response.status_code == 200
+    assert response.json() == {"updated": 2}
+    assert prices() == [8.5, 17.0, 30.0, 40.0]
+    assert crud.product.get_by_sku_cached(db, sku="TEST-PROMO-0").price == 8.5
+
+    response = client_with_db.post("/api/v1/products/prices/", json={
+        "mode": "absolute", "value": 5, "ids": [ids[0]], "skus": ["TEST-PROMO-3", "TEST-PROMO-2"],
+    })
+    assert response.json() == {"updated": 2}
+    assert prices() == [5.0, 17.0, 30.0, 5.0]
+
+    response = client_with_db.post("/api/v1/products/prices/", json={
+        "mode": "sku", "prices": {"TEST-PROMO-1": 12.25, "TEST-PROMO-2": 1.0, "NO-SUCH-SKU": 3.0},
+    })
+    assert response.json() == {"updated": 1}
+    assert prices() == [5.0, 12.25, 30.0, 5.0]
+
+    # A cut that would round a price to 0.00 stops at one cent
+    response = client_with_db.post("/api/v1/products/prices/", json={"mode": "percent", "value": -99.9, "ids": [ids[0]]})
+    assert response.json() == {"updated": 1}
+    assert prices() == [0.01, 12.25, 30.0, 5.0]
+
+    for body in (
+        {"mode": "double", "value": 2, "ids": [ids[0]]},
+        {"mode": "absolute", "value": 5},
+        {"mode": "absolute", "value": 0, "ids": [ids[0]]},
+        {"mode": "percent", "value": -100, "ids": [ids[0]]},
+        {"mode": "sku", "prices": {"TEST-PROMO-1": -1}},
+    ):
+        assert client_with_db.post("/api/v1/products/prices/", json=body).status_code == 400
+    response = client_with_db.post("/api/v1/products/prices/", json={"mode": "absolute", "value": 5, "category_id": 99999})
+    assert response.status_code == 404
+
+def test_bulk_soft_delete_and_restore_products(client_with_db, db):
+    """Test bulk soft delete and restore by ids and by category, which keep updated_at and the search index current"""
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Clearance Category"}).json()["id"]
+    other_id = client_with_db.post("/api/v1/categories/", json={"name": "Kept Category"}).json()["id"]
+    products = [
+        client_with_db.post("/api/v1/products/", json={
+            "name": f"Clearance Item {i}", "sku": f"TEST-CLEAR-{i}", "price": 5.0,
+            "category_id": category_id if i < 3 else other_id,
+        }).json()
+        for i in range(4)
+    ]
+    ids = [p["id"] for p in products]
+    assert len(client_with_db.get("/api/v1/products/search/?query=clearance&fuzzy=false").json()) == 4
+
+    response = client_with_db.post("/api/v1/products/bulk-delete/", json={"category_id": category_id, "ids": [ids[3]]})
+    assert response.status_code == 200
+    assert response.json() == {"products": 4}
+    assert client_with_db.get("/api/v1/products/search/?query=clearance&fuzzy=false").json() == []
+    deleted = {p["id"]: p for p in client_with_db.get("/api/v1/products/deleted/").json()}
+    assert all(deleted[p["id"]]["updated_at"] == p["updated_at"] for p in products)
+    # Already deleted products are not counted again
+    response = client_with_db.post("/api/v1/products/bulk-delete/", json={"ids": ids})
+    assert response.json() == {"products": 0}
+
+    response = client_with_db.post("/api/v1/products/bulk-restore/", json={"ids": ids[:2]})
+    assert response.json() == {"products": 2}
+    found = client_with_db.get("/api/v1/products/search/?query=clearance&fuzzy=false").json()
+    assert sorted(p["id"] for p in found) == ids[:2]
+    assert all(p["updated_at"] == products[i]["updated_at"] for i, p in enumerate(sorted(found, key=lambda p: p["id"])))
+    response = client_with_db.post("/api/v1/products/bulk-restore/", json={"category_id": other_id})
+    assert response.json() == {"products": 1}
+
+    assert client_with_db.post("/api/v1/products/bulk-delete/", json={}).status_code == 400
+    assert client_with_db.post("/api/v1/products/bulk-restore/", json={"category_id": 99999}).status_code == 404
+
+@pytest.mark.parametrize("update_returning", [True, False])
+def test_soft_delete_and_restore_return_committed_row(client_with_db, db, monkeypatch, update_returning):
+    """Test single delete/restore with and without UPDATE ... RETURNING, keeping updated_at and answering repeats"""
+    monkeypatch.setattr(db.get_bind().dialect, "update_returning", update_returning)
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Round Trip Category"}).json()["id"]
+    created = client_with_db.post("/api/v1/products/", json={
+        "name": "Round Trip Product", "sku": "TEST-TRIP-001", "price": 4.5, "category_id": category_id,
+    }).json()
+
+    response = client_with_db.delete(f"/api/v1/products/{created['id']}")
+    assert response.status_code == 200
+    deleted = response.json()
+    assert deleted["deleted_at"] is not None
+    assert {k: v for k, v in deleted.items() if k != "deleted_at"} == {k: v for k, v in created.items() if k != "deleted_at"}
+    assert client_with_db.get("/api/v1/products/deleted/").json() == [deleted]
+    response = client_with_db.delete(f"/api/v1/products/{created['id']}")
+    assert (response.status_code, response.json()["detail"]) == (404, "Product already deleted")
+
+    response = client_with_db.put(f"/api/v1/products/restore/{created['id']}")
+    assert response.json() == created
+    assert client_with_db.get(f"/api/v1/products/{created['id']}").json() == created
+    assert client_with_db.put(f"/api/v1/products/restore/{created['id']}").status_code == 400
+
+def test_archive_long_deleted_products_and_categories(client_with_db, db):
+    """Test archiving rows deleted before a cutoff in chunks, keeping them in the deleted listings"""
+    import datetime
+    from sqlalchemy import update
+    from app.models.archive import InventoryArchive
+    from app.models.category import Category, CategoryClosure
+    from app.models.product import Product
+    from app.models.sale import Sale
+
+    old_category_id = client_with_db.post("/api/v1/categories/", json={"name": "Retired Category"}).json()["id"]
+    kept_category_id = client_with_db.post("/api/v1/categories/", json={"name": "Current Category"}).json()["id"]
+    ids = {}
+    for name, category_id in (("old", old_category_id), ("sold", old_category_id), ("recent", kept_category_id)):
+        ids[name] = client_with_db.post("/api/v1/products/", json={
+            "name": f"Archive {name}", "sku": f"TEST-ARCHIVE-{name}", "price": 8.0, "category_id": category_id,
+        }).json()["id"]
+    for name in ("old", "sold"):
+        client_with_db.post("/api/v1/inventory/", json={"product_id": ids[name], "quantity": 7, "low_stock_threshold": 2})
+    assert client_with_db.post("/api/v1/sales/", json={
+        "product_id": ids["sold"], "quantity": 1, "unit_price": 8.0, "total_price": 8.0,
+        "platform": "web", "order_id": "ORDER-ARCHIVE-1",
+    }).status_code == 200
+    for product_id in ids.values():
+        assert client_with_db.delete(f"/api/v1/products/{product_id}").status_code == 200
+    assert client_with_db.delete(f"/api/v1/categories/{old_category_id}").status_code == 200
+    long_ago = datetime.datetime.now() - datetime.timedelta(days=100)
+    db.execute(update(Product).where(Product.id.in_([ids["old"], ids["sold"]])).values(deleted_at=long_ago))
+    db.execute(update(Category).where(Category.id == old_category_id).values(deleted_at=long_ago))
+    db.commit()
+    deleted_products = client_with_db.get("/api/v1/products/deleted/").json()
+    deleted_categories = client_with_db.get("/api/v1/categories/deleted/").json()
+
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=90)
+    # The category still holds deleted products, so only products move on the first pass
+    assert crud.category.archive_deleted(db, deleted_before=cutoff) == 0
+    assert crud.product.archive_deleted(db, deleted_before=cutoff, limit=1) == 1
+    assert crud.product.archive_deleted(db, deleted_before=cutoff, limit=1) == 1
+    assert crud.product.archive_deleted(db, deleted_before=cutoff, limit=1) == 0
+    # Its sale does not hold the category back
+    assert crud.category.archive_deleted(db, deleted_before=cutoff) == 1
+    assert crud.category.archive_deleted(db, deleted_before=cutoff) == 0
+
+    assert {p.id for p in db.query(Product).filter(Product.id.in_(ids.values()))} == {ids["recent"]}
+    assert sorted(row.product_id for row in db.query(InventoryArchive)) == sorted([ids["old"], ids["sold"]])
+    # Sales keep pointing at the archived rows
+    sale = db.query(Sale).filter(Sale.product_id == ids["sold"]).one()
+    assert (sale.category_id, sale.product) == (old_category_id, None)
+    assert db.query(Category).filter(Category.id == old_category_id).count() == 0
+    assert db.query(CategoryClosure).filter(CategoryClosure.descendant_id == old_category_id).count() == 0
+    assert client_with_db.get("/api/v1/products/deleted/").json() == deleted_products
+    assert client_with_db.get("/api/v1/products/deleted/?skip=1&limit=1").json() == deleted_products[1:2]
+    assert client_with_db.get("/api/v1/categories/deleted/").json() == deleted_categories
+    assert client_with_db.get(f"/api/v1/products/{ids['old']}").status_code == 404
+    assert client_with_db.get(f"/api/v1/categories/{old_category_id}").status_code == 404
+    # Archived SKUs and names are free again
+    assert client_with_db.post("/api/v1/categories/", json={"name": "Retired Category"}).status_code == 200
+    assert client_with_db.post("/api/v1/products/", json={
+        "name": "Archive old", "sku": "TEST-ARCHIVE-old", "price": 8.0, "category_id": kept_category_id,
+    }).status_code == 200
+
+def test_sku_cache_catches_up_on_products_written_by_other_workers(client_with_db, db):
+    """Test that another worker's product write drops just the SKUs it touched from the cache"""
+    from sqlalchemy import update
+    from app.cache.sku import sku_cache
+    from app.db.session import SessionLocal
+    from app.models.product import Product
+
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Feed Category"}).json()["id"]
+    ids = {}
+    for sku in ("TEST-FEED-A", "TEST-FEED-B"):
+        ids[sku] = client_with_db.post("/api/v1/products/", json={
+            "name": f"Feed {sku}", "sku": sku, "price": 10.0, "category_id": category_id,
+        }).json()["id"]
+    cached = crud.product.get_many_by_sku_cached(db, skus=["TEST-FEED-A", "TEST-FEED-B", "TEST-FEED-C"])
+    assert cached["TEST-FEED-C"] is None
+
+    # Another worker renames A to the SKU cached as missing and reprices it
+    other = SessionLocal()
+    try:
+        crud.cache_version.bump(other, entity="product")
+        other.execute(
+            update(Product).where(Product.id == ids["TEST-FEED-A"]).values(sku="TEST-FEED-C", price=12.0)
+        )
+        other.commit()
+    finally:
+        other.close()
+    assert crud.product.get_by_sku_cached(db, sku="TEST-FEED-C") is None
+
+    sku_cache.on_version_change(db, "product")
+    assert crud.product.get_by_sku_cached(db, sku="TEST-FEED-A") is None
+    assert crud.product.get_by_sku_cached(db, sku="TEST-FEED-C").price == 12.0
+    # Untouched SKUs stay cached
+    assert "TEST-FEED-B" in sku_cache._entries
+    sku_cache.on_version_change(db, "product")
+    assert "TEST-FEED-B" in sku_cache._entries
+
+def test_search_index_catches_up_on_products_written_by_other_workers(client_with_db, db, monkeypatch):
+    """Test that the in-memory search index applies another worker's product writes without a rebuild"""
+    from sqlalchemy import insert, update
+    from app.db.session import SessionLocal
+    from app.models.product import Product
+    from app.search.fulltext import search_index
+
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Catchup Category"}).json()["id"]
+    kept_id, renamed_id = [
+        client_with_db.post("/api/v1/products/", json={
+            "name": name, "sku": f"TEST-CATCHUP-{i}", "price": 5.0, "category_id": category_id,
+        }).json()["id"]
+        for i, name in enumerate(["Walnut Tray", "Walnut Bowl"])
+    ]
+    search_index.load(db)
+
+    other = SessionLocal()
+    try:
+        crud.cache_version.bump(other, entity="product")
+        other.execute(update(Product).where(Product.id == renamed_id).values(name="Maple Bowl"))
+        other.execute(insert(Product).values(
+            name="Walnut Spoon", sku="TEST-CATCHUP-2", price=3.0, category_id=category_id,
+        ))
+        other.commit()
+    finally:
+        other.close()
+
+    def fail(db):
+        raise AssertionError("rebuilt")
+
+    monkeypatch.setattr(search_index, "_build", fail)
+    search_index.on_version_change(db, "product")
+    walnut = client_with_db.get("/api/v1/products/search/?query=walnut&fuzzy=false").json()
+    assert sorted(p["name"] for p in walnut) == ["Walnut Spoon", "Walnut Tray"]
+    assert [p["id"] for p in client_with_db.get("/api/v1/products/search/?query=maple&fuzzy=false").json()] == [renamed_id]
+    assert kept_id in search_index._doc_terms
+
+def test_autocomplete_catches_up_on_products_written_by_other_workers(client_with_db, db, monkeypatch):
+    """Test that autocomplete applies another worker's renames and deletes without a rebuild"""
+    import datetime
+    from sqlalchemy import update
+    from app.db.session import SessionLocal
+    from app.models.product import Product
+    from app.search.autocomplete import autocomplete_index
+
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Picker Category"}).json()["id"]
+    ids = [
+        client_with_db.post("/api/v1/products/", json={
+            "name": name, "sku": f"TEST-PICK-{i}", "price": 5.0, "category_id": category_id,
+        }).json()["id"]
+        for i, name in enumerate(["Cedar Chest", "Cedar Shelf"])
+    ]
+    autocomplete_index.load(db)
+
+    other = SessionLocal()
+    try:
+        crud.cache_version.bump(other, entity="product")
+        other.execute(update(Product).where(Product.id == ids[0]).values(name="Pine Chest"))
+        other.execute(update(Product).where(Product.id == ids[1]).values(deleted_at=datetime.datetime.now()))
+        other.commit()
+    finally:
+        other.close()
+
+    def fail(db):
+        raise AssertionError("rebuilt")
+
+    monkeypatch.setattr(autocomplete_index, "_build", fail)
+    autocomplete_index.on_version_change(db, "product")
+    assert client_with_db.get("/api/v1/products/autocomplete?prefix=cedar").json() == []
+    response = client_with_db.get("/api/v1/products/autocomplete?prefix=pine")
+    assert [p["id"] for p in response.json()] == [ids[0]]
+
+def test_fuzzy_search_skips_tombstoned_trigrams(client_with_db, db):
+    """Test that deleted, restored and renamed products match by their current trigrams only"""
+    from app.search.trigram import trigram_index
+
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Tombstone Category"}).json()["id"]
+    ids = [
+        client_with_db.post("/api/v1/products/", json={
+            "name": f"Lantern {i}", "sku": f"TEST-LANTERN-{i}", "price": 5.0, "category_id": category_id,
+        }).json()["id"]
+        for i in range(10)
+    ]
+    assert len(crud.product.search_similar(db, query="lanturn", limit=20)) == 10
+
+    client_with_db.delete(f"/api/v1/products/{ids[0]}")
+    client_with_db.put(f"/api/v1/products/{ids[1]}", json={"name": "Candle", "sku": "TEST-CANDLE-1"})
+    # Below the compaction threshold, so the postings still hold both ids
+    assert trigram_index._removed
+    assert {p.id for p in crud.product.search_similar(db, query="lanturn", limit=20)} == set(ids[2:])
+    assert [p.id for p in crud.product.search_similar(db, query="candle", limit=20)] == [ids[1]]
+
+    client_with_db.put(f"/api/v1/products/restore/{ids[0]}")
+    client_with_db.put(f"/api/v1/products/{ids[1]}", json={"name": "Lantern 1", "sku": "TEST-LANTERN-1"})
+    assert sorted(p.id for p in crud.product.search_similar(db, query="lanturn", limit=20)) == ids
+    assert crud.product.search_similar(db, query="candle") == []
+
+def test_create_many_without_returning(client_with_db, db, monkeypatch):
+    """Test create_many's id read-back on databases without INSERT ... RETURNING, as on MySQL"""
+    from app.crud import base
+    from app.db.session import engine
+    from app.models.product import Product
+
+    monkeypatch.setattr(engine.dialect, "insert_executemany_returning", False)
+    # Interleaved auto-increment, so ids are read back on the unique sku
+    monkeypatch.setattr(base, "_consecutive_ids", lambda db: False)
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Multirow Category"}).json()["id"]
+    created = crud.product.create_many(db, objs_in=[
+        {"name": f"Multirow {i}", "sku": f"TEST-MULTIROW-{i}", "price": 1.0 + i, "category_id": category_id}
+        for i in range(3)
+    ])
+    assert [(p.sku, p.price) for p in created] == [(f"TEST-MULTIROW-{i}", 1.0 + i) for i in range(3)]
+    assert [db.get(Product, p.id).sku for p in created] == [p.sku for p in created]
+
+    assert crud.product.create_many(db, objs_in=[
+        {"name": "Multirow 3", "sku": "TEST-MULTIROW-3", "price": 4.0, "category_id": category_id},
+    ], commit=False, refresh=False) is None
+    db.commit()
+    assert crud.product.get_by_sku(db, sku="TEST-MULTIROW-3").price == 4.0
+
+def test_archived_sales_stay_put_when_the_product_id_is_reused(client_with_db, db):
+    """Test that a new product taking an archived product's id leaves the archived product's sales alone"""
+    import datetime
+    from sqlalchemy import update
+    from app.models.product import Product
+    from app.models.sale import Sale
+
+    old_category_id = client_with_db.post("/api/v1/categories/", json={"name": "Reuse Old Category"}).json()["id"]
+    new_category_id = client_with_db.post("/api/v1/categories/", json={"name": "Reuse New Category"}).json()["id"]
+    product_id = client_with_db.post("/api/v1/products/", json={
+        "name": "Reuse Old", "sku": "TEST-REUSE-OLD", "price": 5.0, "category_id": old_category_id,
+    }).json()["id"]
+    client_with_db.post("/api/v1/inventory/", json={"product_id": product_id, "quantity": 3, "low_stock_threshold": 1})
+    assert client_with_db.post("/api/v1/sales/", json={
+        "product_id": product_id, "quantity": 1, "unit_price": 5.0, "total_price": 5.0,
+        "platform": "web", "order_id": "ORDER-REUSE-1",
+    }).status_code == 200
+    client_with_db.delete(f"/api/v1/products/{product_id}")
+    long_ago = datetime.datetime.now() - datetime.timedelta(days=100)
+    db.execute(update(Product).where(Product.id == product_id).values(deleted_at=long_ago))
+    db.commit()
+    assert crud.product.archive_deleted(db, deleted_before=datetime.datetime.now() - datetime.timedelta(days=90)) == 1
+
+    # As SQLite without AUTOINCREMENT and MySQL 5.7 after a restart may do
+    db.add(Product(id=product_id, name="Reuse New", sku="TEST-REUSE-NEW", price=6.0, category_id=new_category_id))
+    db.commit()
+    client_with_db.delete(f"/api/v1/products/{product_id}")
+    client_with_db.put(f"/api/v1/products/restore/{product_id}")
+    client_with_db.put(f"/api/v1/products/{product_id}", json={"category_id": old_category_id})
+
+    sale = db.query(Sale).filter(Sale.product_id == product_id).one()
+    db.refresh(sale)
+    assert (sale.product_archived, sale.product_active, sale.category_id, sale.product) == (
+        True, False, old_category_id, None
+    )
+    assert client_with_db.get(f"/api/v1/sales/product/{product_id}").json() == []
@@ -497,4 +497,419 @@ def test_cannot_create_sale_for_deleted_product(client_with_db, db):
     }
     sale_response = client_with_db.post("/api/v1/sales/", json=sale_data)
     assert sale_response.status_code == 400
-    assert "deleted product" in sale_response.json()["detail"].lower() 
\ No newline at end of file
+    assert "deleted product" in sale_response.json()["detail"].lower() 
+
+def test_fast_json_responses_match_validated_output(client_with_db, db, monkeypatch):
+    """Test that the trusted serialization path returns the same bytes as response_model validation"""
+    from app.core.config import settings
+
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Fast JSON Category"})
+    category_id = category_response.json()["id"]
+    product_response = client_with_db.post("/api/v1/products/", json={
+        "name": "Fast JSON Product",
+        "sku": "TEST-FASTJSON-001",
+        "price": 9.99,
+        "category_id": category_id
+    })
+    product_id = product_response.json()["id"]
+    client_with_db.post("/api/v1/inventory/", json={
+        "product_id": product_id, "quantity": 50, "low_stock_threshold": 5
+    })
+    for i, platform in enumerate(["amazon", "web", "web"]):
+        client_with_db.post("/api/v1/sales/", json={
+            "product_id": product_id,
+            "quantity": i + 1,
+            "unit_price": 9.99,
+            "total_price": round(9.99 * (i + 1), 2),
+            "platform": platform,
+            "order_id": f"FAST-{i}"
+        })
+
+    urls = ["/api/v1/sales/", "/api/v1/products/", "/api/v1/categories/", "/api/v1/sales/by-platform/"]
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    validated = [client_with_db.get(url) for url in urls]
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    fast = [client_with_db.get(url) for url in urls]
+
+    for before, after in zip(validated, fast):
+        assert after.status_code == 200
+        assert after.headers["content-type"] == "application/json"
+        assert after.json() == before.json()
+
+def test_binary_columnar_sale_responses(client_with_db, db):
+    """Test Arrow and MessagePack negotiation on sale listings and exports"""
+    pa = pytest.importorskip("pyarrow")
+    msgpack = pytest.importorskip("msgpack")
+
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Columnar Category"})
+    category_id = category_response.json()["id"]
+    product_response = client_with_db.post("/api/v1/products/", json={
+        "name": "Columnar Product",
+        "sku": "TEST-COLUMNAR-001",
+        "price": 4.5,
+        "category_id": category_id
+    })
+    product_id = product_response.json()["id"]
+    client_with_db.post("/api/v1/inventory/", json={
+        "product_id": product_id, "quantity": 50, "low_stock_threshold": 5
+    })
+    for i in range(3):
+        client_with_db.post("/api/v1/sales/", json={
+            "product_id": product_id,
+            "quantity": i + 1,
+            "unit_price": 4.5,
+            "total_price": 4.5 * (i + 1),
+            "platform": "web",
+            "order_id": f"COLUMNAR-{i}"
+        })
+    url = f"/api/v1/sales/export/?product_id={product_id}"
+    expected = client_with_db.get(url).json()
+    assert len(expected) == 3
+
+    response = client_with_db.get(url, headers={"Accept": "application/vnd.apache.arrow.stream"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == list(expected[0])
+    assert table.column("order_id").to_pylist() == [s["order_id"] for s in expected]
+    assert table.column("total_price").to_pylist() == [s["total_price"] for s in expected]
+
+    response = client_with_db.get(url, headers={"Accept": "application/msgpack"})
+    assert response.status_code == 200
+    columns = msgpack.unpackb(response.content)
+    assert columns["id"] == [s["id"] for s in expected]
+    assert columns["sale_date"] == [s["sale_date"] for s in expected]
+
+    # JSON stays the default and wins when preferred
+    response = client_with_db.get(
+        "/api/v1/sales/", headers={"Accept": "application/json, application/msgpack;q=0.5"}
+    )
+    assert response.headers["content-type"] == "application/json"
+
+def test_sale_writes_bump_sale_day_versions(client_with_db, db):
+    """Test that recording a sale moves its day's cache version and notifies prefix watchers"""
+    from app.cache.coherence import VersionWatcher
+    from app.crud.crud_cache_version import sale_day_entity
+
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Sale Day Category"})
+    product_response = client_with_db.post("/api/v1/products/", json={
+        "name": "Sale Day Product",
+        "sku": "TEST-SALEDAY-001",
+        "price": 2.0,
+        "category_id": category_response.json()["id"]
+    })
+    product_id = product_response.json()["id"]
+    client_with_db.post("/api/v1/inventory/", json={
+        "product_id": product_id, "quantity": 10, "low_stock_threshold": 2
+    })
+
+    watcher = VersionWatcher(interval=0, session_factory=lambda: db)
+    notified = []
+    watcher.register("sale:", lambda session, entity: notified.append(entity))
+    watcher.poll(db)
+
+    response = client_with_db.post("/api/v1/sales/", json={
+        "product_id": product_id,
+        "quantity": 1,
+        "unit_price": 2.0,
+        "total_price": 2.0,
+        "platform": "web",
+        "order_id": "SALEDAY-1"
+    })
+    assert response.status_code == 200
+    entity = sale_day_entity(datetime.fromisoformat(response.json()["sale_date"]).date())
+    assert crud.cache_version.get_versions(db, entities=[entity])[entity][0] >= 1
+
+    moved = watcher.poll(db)
+    assert entity in moved and "sale" in moved and "inventory" in moved
+    assert notified == [entity]
+
+def test_ingest_sales_by_sku(client_with_db, db):
+    """Test batch sale ingestion resolving SKUs through the cache, including cached unknown SKUs"""
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Ingest Category"})
+    category_id = category_response.json()["id"]
+    product_response = client_with_db.post("/api/v1/products/", json={
+        "name": "Ingest Product", "sku": "TEST-INGEST-001", "price": 12.5, "category_id": category_id
+    })
+    product_id = product_response.json()["id"]
+    client_with_db.post("/api/v1/inventory/", json={
+        "product_id": product_id, "quantity": 5, "low_stock_threshold": 1
+    })
+
+    lines = [
+        {"sku": "TEST-INGEST-001", "quantity": 2, "platform": "amazon", "order_id": "ING-1"},
+        {"sku": "TEST-INGEST-404", "quantity": 1, "platform": "amazon", "order_id": "ING-2"},
+        {"sku": "TEST-INGEST-001", "quantity": 4, "platform": "amazon", "order_id": "ING-3"},
+        {"sku": "TEST-INGEST-001", "quantity": 1, "unit_price": 10.0, "platform": "web", "order_id": "ING-4"},
+    ]
+    response = client_with_db.post("/api/v1/sales/ingest/", json=lines)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert [(e["line"], e["sku"]) for e in data["errors"]] == [(1, "TEST-INGEST-404"), (2, "TEST-INGEST-001")]
+    assert "Unknown SKU" in data["errors"][0]["detail"]
+    assert "Insufficient stock" in data["errors"][1]["detail"]
+
+    sales = client_with_db.get(f"/api/v1/sales/product/{product_id}").json()
+    assert sorted((s["order_id"], s["total_price"]) for s in sales) == [("ING-1", 25.0), ("ING-4", 10.0)]
+    inventory = client_with_db.get(f"/api/v1/inventory/product/{product_id}").json()
+    assert inventory["quantity"] == 2
+
+    # Creating the product drops the cached miss for its SKU
+    product_response = client_with_db.post("/api/v1/products/", json={
+        "name": "Late Product", "sku": "TEST-INGEST-404", "price": 3.0, "category_id": category_id
+    })
+    client_with_db.post("/api/v1/inventory/", json={
+        "product_id": product_response.json()["id"], "quantity": 5, "low_stock_threshold": 1
+    })
+    response = client_with_db.post("/api/v1/sales/ingest/", json=[lines[1]])
+    assert response.json() == {"created": 1, "errors": []}
+
+    # Soft-deleted products are rejected
+    client_with_db.delete(f"/api/v1/products/{product_id}")
+    response = client_with_db.post("/api/v1/sales/ingest/", json=[lines[0]])
+    assert response.json()["created"] == 0
+    assert "deleted product" in response.json()["errors"][0]["detail"]
+
+def test_bulk_sale_writes_bump_old_and_new_sale_days(client_with_db, db):
+    """Test that moving sales with update_many bumps both the day they leave and the day they land on"""
+    from sqlalchemy import event
+    from app.crud.crud_cache_version import sale_day_entity
+    from app.db.session import engine
+
+    category_response = client_with_db.post("/api/v1/categories/", json={"name": "Bulk Sale Category"})
+    product_response = client_with_db.post("/api/v1/products/", json={
+        "name": "Bulk Sale Product", "sku": "TEST-BULKSALE-001", "price": 2.0,
+        "category_id": category_response.json()["id"]
+    })
+    product_id = product_response.json()["id"]
+
+    clock_reads = []
+
+    def count_clock_reads(conn, cursor, statement, parameters, context, executemany):
+        if "CURRENT_TIMESTAMP" in statement.upper() and statement.lstrip().upper().startswith("SELECT"):
+            clock_reads.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_clock_reads)
+    try:
+        sales = crud.sale.create_many(db, objs_in=[
+            {"product_id": product_id, "quantity": 1, "unit_price": 2.0, "total_price": 2.0,
+             "platform": "web", "order_id": f"BULKSALE-{i}"}
+            for i in range(3)
+        ])
+    finally:
+        event.remove(engine, "before_cursor_execute", count_clock_reads)
+    # The undated rows' day is read once for the batch, not once per row
+    assert len(clock_reads) == 1
+    today = sales[0].sale_date.date()
+    target = today - timedelta(days=40)
+    entities = [sale_day_entity(today), sale_day_entity(target)]
+    before = crud.cache_version.get_versions(db, entities=entities)
+
+    moved = crud.sale.update_many(db, updates={
+        sale.id: {"sale_date": datetime.combine(target, datetime.min.time())} for sale in sales
+    })
+    assert {sale.sale_date.date() for sale in moved} == {target}
+    after = crud.cache_version.get_versions(db, entities=entities)
+    assert all(after[entity][0] == before[entity][0] + 1 for entity in entities)
+
+def test_sale_rows_follow_product_category_and_soft_delete(client_with_db, db):
+    """Test that sale.category_id and sale.product_active track product moves, deletes and restores"""
+    from app.models.sale import Sale
+
+    first_id = client_with_db.post("/api/v1/categories/", json={"name": "Denorm First"}).json()["id"]
+    second_id = client_with_db.post("/api/v1/categories/", json={"name": "Denorm Second"}).json()["id"]
+    product_ids = [
+        client_with_db.post("/api/v1/products/", json={
+            "name": f"Denorm Product {i}", "sku": f"TEST-DENORM-{i}", "price": 4.0, "category_id": first_id
+        }).json()["id"]
+        for i in range(2)
+    ]
+    crud.sale.create_many(db, objs_in=[
+        {"product_id": product_id, "quantity": 1, "unit_price": 4.0, "total_price": 4.0,
+         "platform": "web", "order_id": f"DENORM-{product_id}"}
+        for product_id in product_ids
+    ])
+
+    def sale_columns():
+        db.expire_all()
+        return sorted(db.query(Sale.product_id, Sale.category_id, Sale.product_active).all())
+
+    def by_category():
+        return {r["category_name"]: r["sales_count"] for r in client_with_db.get("/api/v1/sales/by-category/").json()}
+
+    assert sale_columns() == [(product_ids[0], first_id, True), (product_ids[1], first_id, True)]
+    assert by_category() == {"Denorm First": 2}
+
+    client_with_db.put(f"/api/v1/products/{product_ids[0]}", json={"category_id": second_id})
+    assert sale_columns()[0] == (product_ids[0], second_id, True)
+    assert by_category() == {"Denorm First": 1, "Denorm Second": 1}
+
+    client_with_db.delete(f"/api/v1/products/{product_ids[0]}")
+    assert sale_columns()[0] == (product_ids[0], second_id, False)
+    assert by_category() == {"Denorm First": 1}
+    assert client_with_db.get("/api/v1/sales/summary/").json()["total_sales"] == 1
+    client_with_db.put(f"/api/v1/products/restore/{product_ids[0]}")
+    assert sale_columns()[0] == (product_ids[0], second_id, True)
+
+    # Set-based paths: bulk delete by category, and a catalog import that recategorizes
+    client_with_db.post("/api/v1/products/bulk-delete/", json={"category_id": first_id})
+    assert sale_columns()[1] == (product_ids[1], first_id, False)
+    client_with_db.post("/api/v1/products/bulk-restore/", json={"category_id": first_id})
+    body = f"sku,name,description,price,category_id\nTEST-DENORM-1,Denorm Product 1,,4.0,{second_id}"
+    client_with_db.post("/api/v1/products/import/", content=body.encode(), headers={"Content-Type": "text/csv"})
+    assert sale_columns() == [(product_ids[0], second_id, True), (product_ids[1], second_id, True)]
+    assert by_category() == {"Denorm Second": 2}
+
+def test_sales_by_category_names_categories_written_by_other_workers(client_with_db, db):
+    """Test that categories this worker's cache has not seen yet still get their names"""
+    from app.db.session import SessionLocal
+    from app.models.category import Category, CategoryClosure
+    from app.models.product import Product
+    from app.models.sale import Sale
+
+    client_with_db.post("/api/v1/categories/", json={"name": "Cached Category"})
+    assert client_with_db.get("/api/v1/sales/by-category/").json() == []
+    # Another worker's writes, which this worker's category cache has not picked up
+    other = SessionLocal()
+    try:
+        category = Category(name="Other Worker Category")
+        other.add(category)
+        other.flush()
+        other.add(CategoryClosure(ancestor_id=category.id, descendant_id=category.id, depth=0))
+        product = Product(name="Other Worker Product", sku="TEST-OTHER-001", price=6.0, category_id=category.id)
+        other.add(product)
+        other.flush()
+        other.add(Sale(
+            product_id=product.id, category_id=category.id, quantity=2, unit_price=6.0, total_price=12.0,
+            platform="web", order_id="ORDER-OTHER-1",
+        ))
+        other.commit()
+    finally:
+        other.close()
+
+    response = client_with_db.get("/api/v1/sales/by-category/")
+    assert response.status_code == 200
+    assert response.json() == [{"category_name": "Other Worker Category", "sales_count": 1, "total_revenue": 12.0}]
+
+def test_ingest_deducts_from_current_stock(client_with_db, db):
+    """Test that ingest checks stock against the locked, current inventory row rather than a stale copy"""
+    from app.db.session import SessionLocal
+    from app.models.inventory import Inventory
+
+    category_id = client_with_db.post("/api/v1/categories/", json={"name": "Contended Category"}).json()["id"]
+    product_id = client_with_db.post("/api/v1/products/", json={
+        "name": "Contended Product", "sku": "TEST-CONTEND-001", "price": 2.0, "category_id": category_id
+    }).json()["id"]
+    client_with_db.post("/api/v1/inventory/", json={"product_id": product_id, "quantity": 5, "low_stock_threshold": 1})
+    # The request session now holds the row with 5 in stock
+    held = db.query(Inventory).filter(Inventory.product_id == product_id).one()
+    assert held.quantity == 5
+    other = SessionLocal()
+    try:
+        other.query(Inventory).filter(Inventory.product_id == product_id).update({"quantity": 1})
+        other.commit()
+    finally:
+        other.close()
+
+    response = client_with_db.post("/api/v1/sales/ingest/", json=[
+        {"sku": "TEST-CONTEND-001", "quantity": 3, "platform": "web", "order_id": "CONTEND-1"},
+    ])
+    assert response.json()["created"] == 0
+    assert "Available: 1" in response.json()["errors"][0]["detail"]
+    response = client_with_db.post("/api/v1/sales/ingest/", json=[
+        {"sku": "TEST-CONTEND-001", "quantity": 1, "platform": "web", "order_id": "CONTEND-2"},
+    ])
+    assert response.json() == {"created": 1, "errors": []}
+    assert client_with_db.get(f"/api/v1/inventory/product/{product_id}").json()["quantity"] == 0
+
+def test_ingest_reads_product_state_past_a_stale_sku_cache(client_with_db, db):
+    """Test that ingest copies the current category and state of products another worker just changed"""
+    import datetime
+    from app.db.session import SessionLocal
+    from app.models.product import Product
+    from app.models.sale import Sale
+
+    first_id = client_with_db.post("/api/v1/categories/", json={"name": "Stale First"}).json()["id"]
+    second_id = client_with_db.post("/api/v1/categories/", json={"name": "Stale Second"}).json()["id"]
+    ids = []
+    for sku in ("TEST-STALE-1", "TEST-STALE-2"):
+        ids.append(client_with_db.post("/api/v1/products/", json={
+            "name": sku, "sku": sku, "price": 3.0, "category_id": first_id,
+        }).json()["id"])
+        client_with_db.post("/api/v1/inventory/", json={"product_id": ids[-1], "quantity": 5, "low_stock_threshold": 1})
+    # Cache both products, and a miss for a SKU about to be created
+    assert crud.product.get_many_by_sku_cached(db, skus=["TEST-STALE-1", "TEST-STALE-2", "TEST-STALE-3"])["TEST-STALE-3"] is None
+
+    # Another worker recategorizes one, deletes the other and renames the first's SKU
+    other = SessionLocal()
+    try:
+        other.query(Product).filter(Product.id == ids[0]).update({"category_id": second_id, "sku": "TEST-STALE-3"})
+        other.query(Product).filter(Product.id == ids[1]).update({"deleted_at": datetime.datetime.now()})
+        other.commit()
+    finally:
+        other.close()
+
+    response = client_with_db.post("/api/v1/sales/ingest/", json=[
+        {"sku": "TEST-STALE-1", "quantity": 1, "platform": "web", "order_id": "STALE-1"},
+        {"sku": "TEST-STALE-2", "quantity": 1, "platform": "web", "order_id": "STALE-2"},
+        {"sku": "TEST-STALE-3", "quantity": 1, "platform": "web", "order_id": "STALE-3"},
+    ])
+    data = response.json()
+    assert data["created"] == 1
+    assert [(e["line"], e["detail"]) for e in data["errors"]] == [
+        (0, "Unknown SKU"), (1, "Cannot create sale for deleted product"),
+    ]
+    sale = db.query(Sale).filter(Sale.order_id == "STALE-3").one()
+    assert (sale.product_id, sale.category_id, sale.product_active) == (ids[0], second_id, True)
+
+def test_recategorize_and_delete_bump_versions_in_the_same_order(client_with_db, db):
+    """Test that product writes that move sales lock the product version before the sale version"""
+    from sqlalchemy import event
+    from app.db.session import engine
+
+    first_id = client_with_db.post("/api/v1/categories/", json={"name": "Order First"}).json()["id"]
+    second_id = client_with_db.post("/api/v1/categories/", json={"name": "Order Second"}).json()["id"]
+    product_id = client_with_db.post("/api/v1/products/", json={
+        "name": "Order Product", "sku": "TEST-ORDER-001", "price": 2.0, "category_id": first_id,
+    }).json()["id"]
+    client_with_db.post("/api/v1/inventory/", json={"product_id": product_id, "quantity": 5, "low_stock_threshold": 1})
+    client_with_db.post("/api/v1/sales/", json={
+        "product_id": product_id, "quantity": 1, "unit_price": 2.0, "total_price": 2.0,
+        "platform": "web", "order_id": "ORDER-LOCKS-1",
+    })
+
+    bumped = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE CACHE_VERSION"):
+            bumped.append(parameters[-1])
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        client_with_db.put(f"/api/v1/products/{product_id}", json={"category_id": second_id})
+        recategorized, bumped[:] = list(bumped), []
+        client_with_db.delete(f"/api/v1/products/{product_id}")
+        deleted = list(bumped)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert recategorized.index("product") < recategorized.index("sale")
+    assert deleted.index("product") < deleted.index("sale")
+
+def test_negotiated_sale_responses_vary_on_accept(client_with_db, db, monkeypatch):
+    """Test that JSON answers from endpoints that negotiate binary formats carry Vary: Accept too"""
+    from app.core.config import settings
+    from app.db.session import engine
+
+    urls = ["/api/v1/sales/", "/api/v1/sales/export/"]
+    if engine.dialect.name == "mysql":
+        # Periods are bucketed with DATE_FORMAT
+        today = datetime.now().date().isoformat()
+        urls.append(f"/api/v1/sales/by-period/?period_type=day&start_date={today}&end_date={today}")
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", fast)
+        for url in urls:
+            response = client_with_db.get(url)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/json"
+            assert response.headers["vary"] == "Accept"
@@ -0,0 +1,37 @@
+from app.core.metrics import Histogram, Registry
+
+def test_metrics_endpoint_exposes_request_latency(client):
+    """Test that served requests show up in the Prometheus scrape"""
+    response = client.get("/")
+    assert response.status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/",status="200"}' in body
+    assert "http_requests_in_flight" in body
+    assert "db_pool_checked_out" in body
+    assert "# TYPE crud_call_duration_seconds histogram" in body
+
+def test_metrics_use_route_templates(client):
+    """Test that path parameters are collapsed into the route template"""
+    client.get("/api/v1/products/search/?query=")
+    body = client.get("/metrics").text
+    assert 'route="/api/v1/products/search/"' in body
+
+def test_histogram_rendering():
+    """Test the text exposition of a labelled histogram"""
+    registry = Registry()
+    histogram = Histogram("demo_seconds", "Demo.", ("kind",), buckets=(0.1, 1.0), registry=registry)
+    histogram.labels("a").observe(0.05)
+    histogram.labels("a").observe(0.5)
+    histogram.labels("a").observe(5)
+
+    lines = registry.render().splitlines()
+    assert 'demo_seconds_bucket{kind="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{kind="a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{kind="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{kind="a"} 3' in lines
+    assert 'demo_seconds_sum{kind="a"} 5.55' in lines
@@ -14,9 +14,10 @@ from sqlalchemy.exc import OperationalError, IntegrityError
 def db():
     # Import models here to ensure they are loaded when the fixture runs
     from app.models.product import Product 
-    from app.models.category import Category
+    from app.models.category import Category, CategoryClosure
     from app.models.inventory import Inventory
     from app.models.sale import Sale
+    from app.models.archive import ProductArchive, InventoryArchive, CategoryArchive
 
     db_session = SessionLocal()
     
@@ -37,9 +38,27 @@ def db():
         db_session.query(Product).delete(synchronize_session=False)
         db_session.commit()
         
-        # Fourth level: Category table (top level parent)
+        # Fourth level: Category table (top level parent) and its closure rows
+        db_session.query(CategoryClosure).delete(synchronize_session=False)
         db_session.query(Category).delete(synchronize_session=False)
         db_session.commit()
+        
+        # Archive tables have no foreign keys
+        for archive in (ProductArchive, InventoryArchive, CategoryArchive):
+            db_session.query(archive).delete(synchronize_session=False)
+        db_session.commit()
+        
+        # The deletes above bypass CRUD, so drop what the process-local caches hold
+        from app.cache.category import category_cache
+        from app.cache.sku import sku_cache
+        from app.search.autocomplete import autocomplete_index
+        from app.search.fulltext import search_index
+        from app.search.trigram import trigram_index
+        category_cache.invalidate()
+        sku_cache.clear()
+        search_index.invalidate()
+        autocomplete_index.invalidate()
+        trigram_index.invalidate()
     except (IntegrityError, OperationalError) as e:
         # If there's an error during setup, rollback and close the session
         db_session.rollback()
@@ -72,4 +91,11 @@ def client_with_db(db):
     with TestClient(app) as c:
         yield c
     
-    app.dependency_overrides = {} 
\ No newline at end of file
+    app.dependency_overrides = {} 
+
+@pytest.fixture(scope="function")
+def admin_headers(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "test-admin-token")
+    return {"X-Admin-Token": "test-admin-token"}
@@ -0,0 +1,135 @@
+import datetime
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import crud
+from app.db.session import engine
+from app.schemas.category import CategoryCreate
+from app.schemas.product import ProductCreate
+
+# A full pass over a soft-deleted table, as opposed to a SEARCH through an index
+FULL_SCAN = re.compile(r"^SCAN (product|category)\b")
+
+def explain(db, statement, parameters):
+    """
+    Query plan of ``statement``: SQLite's EXPLAIN QUERY PLAN detail strings, or
+    MySQL's EXPLAIN rows as dicts with ``table``, ``type`` and ``key``.
+    """
+    connection = db.connection()
+    if engine.dialect.name == "sqlite":
+        return [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+    return [dict(row) for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters).mappings()]
+
+@contextmanager
+def soft_delete_plans(db):
+    """Collect the query plan of every statement filtering on deleted_at."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and "deleted_at IS" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    plans = {}
+    try:
+        yield plans
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    for statement, parameters in statements:
+        plans[statement] = explain(db, statement, parameters)
+
+def test_soft_delete_filtered_queries_use_deleted_at_indexes(db):
+    """Test that every deleted_at-filtered CRUD query seeks through an index rather than scanning"""
+    if engine.dialect.name not in ("sqlite", "mysql"):
+        pytest.skip("Plans are checked on SQLite and MySQL")
+    # Mostly deleted filler, so MySQL's cost model has a reason to prefer the indexes to a scan
+    filler = crud.category.create(db, obj_in=CategoryCreate(name="Plan Filler"))
+    crud.product.create_many(db, objs_in=[
+        {"name": f"Plan Filler {i}", "sku": f"TEST-PLAN-FILLER-{i}", "price": 1.0, "category_id": filler.id}
+        for i in range(200)
+    ], refresh=False)
+    crud.product.remove_many(db, category_id=filler.id)
+    parent = crud.category.create(db, obj_in=CategoryCreate(name="Plan Parent"))
+    child = crud.category.create(db, obj_in=CategoryCreate(name="Plan Child", parent_id=parent.id))
+    products = [
+        crud.product.create(db, obj_in=ProductCreate(
+            name=f"Plan Product {i}", sku=f"TEST-PLAN-{i}", price=10.0, category_id=child.id,
+        ))
+        for i in range(3)
+    ]
+    crud.sale.create_many(db, objs_in=[
+        {"product_id": product.id, "quantity": 1, "unit_price": 10.0, "total_price": 10.0,
+         "platform": "web", "order_id": f"ORDER-PLAN-{product.id}"}
+        for product in products
+    ])
+
+    with soft_delete_plans(db) as plans:
+        crud.product.get_multi(db)
+        crud.product.get_multi_rows(db, columns=["id", "name"])
+        crud.product.get_by_sku(db, sku="TEST-PLAN-0")
+        crud.product.get_by_category(db, category_id=child.id)
+        crud.product.get_by_category(db, category_id=parent.id, subtree=True)
+        crud.product.change_prices(db, mode="percent", value=10, category_id=child.id)
+        crud.product.remove(db, id=products[0].id)
+        crud.product.get_deleted(db)
+        crud.product.restore(db, id=products[0].id)
+        crud.product.remove_many(db, category_id=child.id)
+        crud.product.restore_many(db, category_id=child.id)
+        crud.category.get_multi(db)
+        crud.category.get_multi_rows(db, columns=["id", "name"])
+        crud.category.get_by_name(db, name="Plan Child")
+        crud.category.get_children(db, id=parent.id)
+        crud.category.get_overview(db, today=datetime.date.today())
+        crud.category.remove_many(db, ids=[parent.id], cascade=True)
+        crud.category.get_deleted(db)
+        crud.category.restore_many(db, ids=[parent.id], cascade=True)
+        crud.sale.get_multi(db)
+        crud.sale.get_by_product(db, product_id=products[1].id)
+        crud.sale.get_sales_by_category(db, level=0)
+
+    assert len(plans) > 20
+
+    def steps(fragment):
+        return next(plan for statement, plan in plans.items() if fragment in " ".join(statement.split()))
+
+    if engine.dialect.name == "mysql":
+        for statement, plan in plans.items():
+            scans = [row for row in plan if row["table"] in ("product", "category") and row["type"] == "ALL"]
+            assert not scans, (statement, plan)
+
+        def keys(fragment):
+            return [row["key"] for row in steps(fragment)]
+
+        assert keys("FROM product WHERE product.deleted_at IS NULL ORDER BY product.id")[0] == "ix_product_deleted_at_id"
+        assert keys(
+            "FROM product WHERE product.category_id = %s AND product.deleted_at IS NULL"
+        )[0] == "ix_product_deleted_at_category_id"
+        deleted_listing = keys("FROM product WHERE product.deleted_at IS NOT NULL ORDER BY")
+        assert {"ix_product_deleted_at_id", "ix_product_archive_deleted_at_id"} <= set(deleted_listing)
+        assert keys(
+            "WHERE category.parent_id = %s AND category.deleted_at IS NULL"
+        )[0] == "ix_category_parent_id_deleted_at"
+        return
+
+    for statement, plan in plans.items():
+        assert not [step for step in plan if FULL_SCAN.match(step)], (statement, plan)
+
+    def first_step(fragment):
+        return steps(fragment)[0]
+
+    assert "ix_product_deleted_at_id (deleted_at=?)" in first_step(
+        "FROM product WHERE product.deleted_at IS NULL ORDER BY product.id"
+    )
+    assert "ix_product_deleted_at_category_id (deleted_at=? AND category_id=?)" in first_step(
+        "FROM product WHERE product.category_id = ? AND product.deleted_at IS NULL"
+    )
+    # The deleted listing reads both sides of its merge with the archive off their indexes
+    deleted_listing = " ".join(steps("FROM product WHERE product.deleted_at IS NOT NULL ORDER BY"))
+    assert "ix_product_deleted_at_id (deleted_at>?)" in deleted_listing
+    assert "USING COVERING INDEX ix_product_archive_deleted_at_id" in deleted_listing
+    assert "ix_category_parent_id_deleted_at (parent_id=? AND deleted_at=?)" in first_step(
+        "WHERE category.parent_id = ? AND category.deleted_at IS NULL"
+    )